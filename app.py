@@ -1,9 +1,9 @@
-import re
 import os
 import sys
-import json
 import datetime
 import uuid
+from collections import ChainMap
+from itertools import islice
 from backend.posting import *
 from flask import Flask, render_template, request, redirect, url_for, flash, session
 from werkzeug.utils import secure_filename
@@ -22,43 +22,93 @@ if BACKEND_DIR not in sys.path:
 
 # --- Imports from backend ---
 from backend.users_db import UsersDatabase
+from backend.users_sqlite import SQLiteUsersDatabase
 from backend.user import User
 from backend.change_password import SecureUser
 from backend.registration import validate_registration
 from backend.posting import Post
 from backend.editing_profile import update_personal_info, delete_account
 from backend.notification import FollowRequestNotification
+from backend.post_log import PostLog
+from backend.posts_sqlite import SQLitePostStore
+from backend.post_cache import PostCache
+from backend.hashtag_index import HashtagIndex
+from backend.post_search import PostSearchIndex
+from backend.timelines import TimelineService
+from backend.user_ids import user_ids
+from backend.time_index import TimeIndex, to_timestamp
+from backend.feed_query import FeedPlanner, FeedQuery
+from backend.content_flags import ContentFlagIndex
+from backend.recommendations import SuggestionEngine
+from backend.graph_analytics import ANALYTICS_DIR, GraphMetrics
+from backend.notification_store import NotificationStore, import_from_users
+from backend.pagination import decode_cursor, page_size, paginate
 
 app = Flask(__name__)
 app.secret_key = "super_secret_key"
 
 # --- Load database ---
-db = UsersDatabase("backend/users_database.json")
+# TWINSA_STORAGE=sqlite : base SQLite (importe le fichier JSON au premier démarrage)
+STORAGE_BACKEND = os.environ.get("TWINSA_STORAGE", "json")
+if STORAGE_BACKEND == "sqlite":
+    db = SQLiteUsersDatabase("backend/users_database.sqlite3", json_file="backend/users_database.json")
+else:
+    db = UsersDatabase("backend/users_database.json")
 
 # --- Password reset tokens (email -> token) ---
 reset_tokens = {}
 
 # --- Posts file ---
 POSTS_FILE = "posts.json"
+if STORAGE_BACKEND == "sqlite":
+    post_store = SQLitePostStore("posts.sqlite3", json_file=POSTS_FILE)
+else:
+    post_store = PostLog(POSTS_FILE)
+
+# --- Notifications ---
+# File bornée par utilisateur (TWINSA_NOTIFICATION_CAP), hors des fiches User.
+# Les notifications encore dans les fiches (ancien format) y sont déplacées au démarrage.
+NOTIFICATION_CAP = int(os.environ.get("TWINSA_NOTIFICATION_CAP", NotificationStore.CAPACITY))
+NOTIFICATIONS_SHOWN = 20
+notification_store = NotificationStore("backend/notifications.json", capacity=NOTIFICATION_CAP)
+User.notification_store = notification_store
+if import_from_users(notification_store, db.users_with_notifications()):
+    db.save_users()
+
+# Posts en lecture seule partagés entre les requêtes (ne pas modifier les dicts)
+post_cache = PostCache(post_store)
+hashtag_index = HashtagIndex(post_store)
+Post.hashtag_index = hashtag_index
+post_search_index = PostSearchIndex(post_store)
+time_index = TimeIndex(post_store)
+content_index = ContentFlagIndex(post_store)
+
+# Fils "Friends" matérialisés, tenus à jour à chaque post et à chaque (dés)abonnement.
+# Au-delà de TWINSA_FANOUT_THRESHOLD followers, les posts d'un compte sont lus à la lecture.
+FANOUT_THRESHOLD = int(os.environ.get("TWINSA_FANOUT_THRESHOLD", TimelineService.FANOUT_THRESHOLD))
+timelines = TimelineService(post_store, db, fanout_threshold=FANOUT_THRESHOLD)
+User.follow_listeners.append(timelines.on_follow_change)
+
+# Comptes autorisés à lire les métriques internes (/api/metrics/...) : TWINSA_ADMINS="alice,bob"
+ADMINS = {u.strip() for u in os.environ.get("TWINSA_ADMINS", "").split(",") if u.strip()}
+
+# Statistiques du graphe calculées par `python -m backend.graph_analytics` (None si absentes ou sans NumPy)
+graph_metrics = GraphMetrics.load(os.environ.get("TWINSA_ANALYTICS_DIR", ANALYTICS_DIR))
+
+# Suggestions "amis d'amis", gardées en cache par utilisateur
+suggestion_engine = SuggestionEngine(db, metrics=graph_metrics)
+User.follow_listeners.append(suggestion_engine.on_follow_change)
+
+# Filtres du feed : l'index le plus sélectif sert de source, le reste est filtré au fil de l'eau
+feed_planner = FeedPlanner(post_cache, hashtag_index, time_index, timelines, content_index, db)
 
 
 def load_posts():
-    if os.path.exists(POSTS_FILE):
-        with open(POSTS_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+    return post_cache.snapshot()
 
 
-def save_posts(posts):
-    with open(POSTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(posts, f, indent=4, default=str)
-
-
-def load_posts_bis(db):
-    raw_posts = load_posts()
+def load_posts_bis(db, username=None):
+    raw_posts = post_cache.posts_by(username) if username else load_posts()
     posts = []
 
     for p in raw_posts:
@@ -69,7 +119,7 @@ def load_posts_bis(db):
         post.content = p["content"]
         post.image = p.get("image", None)
         post.date = datetime.datetime.strptime(p["date"], "%Y-%m-%d %H:%M:%S")
-        post.likes = p["likes"]
+        post.likes = user_ids.usernames(p["likes"])
         post.comments = p["comments"]
         post.post_id = p.get("post_id", 0)
         posts.append(post)
@@ -77,6 +127,110 @@ def load_posts_bis(db):
     return posts
 
 
+def can_view_posts(viewer, author_username):
+    """Règles du feed : ses propres posts, ceux des comptes suivis et ceux des comptes publics."""
+    if viewer is not None and (author_username == viewer.username or author_username in viewer.following):
+        return True
+    author = db.get_user(author_username)
+    return author is not None and getattr(author, "is_public", False)
+
+
+def format_posts(posts):
+    """
+    Posts avec la photo actuelle de l'auteur : des vues (ChainMap) sur les
+    posts du cache, sans les copier. Le contenu HTML est déjà dans le cache.
+    """
+    formatted_posts = []
+    for p in posts:
+        user = db.get_user(p["poster_username"])
+        poster_pfp = user.profile_picture if user and user.profile_picture else "default_pfp.png"
+        formatted_posts.append(ChainMap({"poster_pfp": poster_pfp}, p))
+    return formatted_posts
+
+
+def selected_hashtags_from(args):
+    raw_hashtags = args.get("hashtags", "").strip()
+    return [h.strip().lower() for h in raw_hashtags.split(",") if h.strip()]
+
+
+def feed_date_range(args):
+    """Bornes [début, fin[ des filtres de date en secondes epoch (None si absentes ou invalides)."""
+    start = None
+    end = None
+
+    if args.get("start_date"):
+        try:
+            start = to_timestamp(datetime.datetime.strptime(args["start_date"], "%Y-%m-%d"))
+        except ValueError:
+            start = None
+
+    if args.get("end_date"):
+        try:
+            end = to_timestamp(datetime.datetime.strptime(args["end_date"], "%Y-%m-%d") + datetime.timedelta(days=1))
+        except ValueError:
+            end = None
+
+    return start, end
+
+
+def feed_query(current_user, args):
+    """Requête du feed décrite par les paramètres GET (feed_type, hashtags, match, dates, content_type)."""
+    start, end = feed_date_range(args)
+    return FeedQuery(
+        viewer=current_user,
+        feed_type=args.get("feed_type", "friends"),
+        hashtags=selected_hashtags_from(args),
+        match=args.get("match"),
+        start=start,
+        end=end,
+        content_types=args.getlist("content_type"),
+    )
+
+
+def next_page_url(endpoint, cursor, **values):
+    """Lien "Load more" : mêmes paramètres que la requête actuelle, avec le curseur suivant."""
+    if cursor is None:
+        return None
+    args = request.args.to_dict(flat=False)
+    args["cursor"] = cursor
+    return url_for(endpoint, **{**args, **values})
+
+
+def follow_page(kind, user):
+    """Page des followers (kind="followers") ou des abonnements de `user`, et lien vers la suivante."""
+    size = page_size(request.args.get("page_size"))
+    try:
+        offset = max(0, int(request.args.get("offset", 0)))
+    except ValueError:
+        offset = 0
+    usernames = list(islice(getattr(user, kind), offset, offset + size + 1))
+    next_url = None
+    if len(usernames) > size:
+        next_url = url_for(request.endpoint, **{**request.args.to_dict(), "username": user.username, "offset": offset + size})
+    users = [db.get_user(u) for u in usernames[:size]]
+    return [u for u in users if u is not None], next_url
+
+
+def recent_notifications(user):
+    """Dernières notifications de `user` (les plus récentes d'abord), pour la barre latérale."""
+    if user is None:
+        return []
+    return notification_store.page(user.username, limit=NOTIFICATIONS_SHOWN)[0]
+
+
+def notification_cursor(args):
+    try:
+        return int(args.get("before"))
+    except (TypeError, ValueError):
+        return None
+
+
+def search_usernames(query, followed, limit=10):
+    """Usernames commençant par `query` : suivis d'abord, puis les plus influents (si graph_metrics est chargé)."""
+    score = graph_metrics.influence if graph_metrics is not None else None
+    return db.username_index.search(query, followed, limit=limit, score=score)
+
+
 def get_secure_user(username):
     user_obj = db.get_user(username)
     if not user_obj:
@@ -162,11 +316,7 @@ def forgot_password():
     if request.method == "POST":
         email = request.form.get("email", "").strip()
 
-        user_found = None
-        for user_obj in db.get_all_users():
-            if user_obj.email == email:
-                user_found = user_obj
-                break
+        user_found = db.get_user_by_email(email)
 
         if not user_found:
             flash("Email not found.", "error")
@@ -195,13 +345,9 @@ def feed():
         flash("Please sign in to access TwINSA.", "error")
         return redirect(url_for("login"))
 
-    posts = load_posts()
     username = session["username"]
     current_user = db.get_user(username)
 
-    for idx, p in enumerate(posts):
-        p["index"] = idx
-
     image_file = None
     image_filename = None
 
@@ -247,153 +393,34 @@ def feed():
             "hashtags": new_post.hashtags,
             "post_id": new_post.post_id,
         }
-        posts.insert(0, post_data)
+        post_store.create(post_data)
         current_user.add_post(new_post)
-        db.save_users()
-        save_posts(posts)
+        db.save_user(current_user)
         flash("Post created successfully!", "success")
 
         return redirect(url_for("feed"))
 
-    for idx, p in enumerate(posts):
-        p["index"] = idx
-
-    feed_type = request.args.get("feed_type", "friends")
-    visible_posts = posts
-
-    if current_user is not None:
-        if feed_type == "discover":
-            visible = []
-            for p in posts:
-                poster = p.get("poster_username")
-                if not poster or poster == username:
-                    continue
-
-                author = db.get_user(poster)
-                if author is None:
-                    continue
-
-                if getattr(author, "is_public", False) and poster not in current_user.following:
-                    visible.append(p)
+    selected_hashtags = selected_hashtags_from(request.args)
+    hashtag_match = "all" if request.args.get("match") == "all" else "any"
 
-            visible_posts = visible
-        else:
-            allowed_usernames = set(current_user.following + [username])
-            visible_posts = [
-                p for p in posts if p.get("poster_username") in allowed_usernames
-            ]
+    # Une page à la fois : le curseur désigne le dernier post de la page précédente
+    size = page_size(request.args.get("page_size"))
+    posts = feed_planner.posts(feed_query(current_user, request.args), decode_cursor(request.args.get("cursor")), size + 1)
+    visible_posts, next_cursor = paginate(posts, size)
 
-    start_date_str = request.args.get("start_date")
-    end_date_str = request.args.get("end_date")
+    notifications = recent_notifications(current_user)
 
-    start_date = None
-    end_date = None
-
-    if start_date_str:
-        try:
-            start_date = datetime.datetime.strptime(start_date_str, "%Y-%m-%d")
-        except ValueError:
-            start_date = None
-
-    if end_date_str:
-        try:
-            end_date = datetime.datetime.strptime(end_date_str, "%Y-%m-%d") + datetime.timedelta(days=1)
-        except ValueError:
-            end_date = None
-
-    content_filters = request.args.getlist("content_type")
-
-    raw_hashtags = request.args.get("hashtags", "").strip()
-    selected_hashtags = []
-    if raw_hashtags:
-        selected_hashtags = [h.strip().lower() for h in raw_hashtags.split(",") if h.strip()]
-
-    if selected_hashtags:
-        filtered_posts = []
-        for p in visible_posts:
-            tags = p.get("hashtags", [])
-            if not tags and "content" in p:
-                temp_post = Post(p["content"], p["poster_username"], db)
-                tags = temp_post.hashtags
-                p["hashtags"] = tags
-
-            tags_lower = [t.lower() for t in tags]
-            if any(tag in tags_lower for tag in selected_hashtags):
-                filtered_posts.append(p)
-
-        filtered_posts.sort(
-            key=lambda p: datetime.datetime.strptime(p["date"], "%Y-%m-%d %H:%M:%S"),
-            reverse=True,
-        )
-        visible_posts = filtered_posts
-
-    if start_date or end_date:
-        filtered_by_date = []
-        for p in visible_posts:
-            date_str = p.get("date", "")
-            try:
-                post_date = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                continue
-
-            if start_date and post_date < start_date:
-                continue
-            if end_date and post_date >= end_date:
-                continue
-
-            filtered_by_date.append(p)
-
-        visible_posts = filtered_by_date
-
-    if content_filters:
-        filtered = []
-        for p in visible_posts:
-            ok = False
-            content = p.get("content", "") or ""
-            image = p.get("image")
-            hashtags = p.get("hashtags", []) or []
-
-            if "text" in content_filters and content.strip():
-                ok = True
-
-            if "image" in content_filters and image:
-                ok = True
-
-            if "hashtag" in content_filters and hashtags:
-                ok = True
-
-            if "emoji" in content_filters:
-                if re.search(r"[\U0001F300-\U0001FAFF]", content):
-                    ok = True
-
-            if ok:
-                filtered.append(p)
-
-        visible_posts = filtered
-
-    notifications = []
-    if current_user is not None and hasattr(current_user, "notifications"):
-        notifications = list(current_user.notifications)[-20:]
-        notifications.reverse()
-
-    for p in visible_posts:
-        user = db.get_user(p["poster_username"])
-        if user and user.profile_picture:
-            p["poster_pfp"] = user.profile_picture
-        else:
-            p["poster_pfp"] = "default_pfp.png"
-
-    formatted_posts = []
-    for p in visible_posts:
-        post_obj = Post(p["content"], p["poster_username"], db)
-        post_obj.hashtags = p.get("hashtags", [])
-        formatted_posts.append({**p, "html_content": post_obj.get_html_content()})
+    formatted_posts = format_posts(visible_posts)
 
     unselect_urls = {}
     for tag in selected_hashtags:
         remaining = [t for t in selected_hashtags if t != tag]
         if remaining:
-            unselect_urls[tag] = url_for("feed", hashtags=",".join(remaining))
+            unselect_urls[tag] = url_for(
+                "feed",
+                hashtags=",".join(remaining),
+                match="all" if hashtag_match == "all" else None,
+            )
         else:
             unselect_urls[tag] = url_for("feed")
 
@@ -404,9 +431,39 @@ def feed():
         notifications=notifications,
         selected_hashtags=selected_hashtags,
         unselect_urls=unselect_urls,
+        next_url=next_page_url("feed", next_cursor),
     )
 
 
+# --- FEED (API JSON) ---
+def post_json(post):
+    return {
+        "id": post["id"],
+        "poster_username": post["poster_username"],
+        "content": post["content"],
+        "html_content": post["html_content"],
+        "image": post.get("image"),
+        "date": post["date"],
+        "ts": post.get("ts"),
+        "hashtags": list(post.get("hashtags") or []),
+        "likes": user_ids.usernames(post["likes"]),
+        "comments": [dict(c) for c in post.get("comments") or []],
+    }
+
+
+@app.route("/api/feed")
+def feed_api():
+    """Mêmes paramètres et mêmes curseurs que /feed ; next_cursor vaut null à la dernière page."""
+    if "username" not in session:
+        return {"error": "Not signed in"}, 401
+
+    current_user = db.get_user(session["username"])
+    size = page_size(request.args.get("page_size"))
+    posts = feed_planner.posts(feed_query(current_user, request.args), decode_cursor(request.args.get("cursor")), size + 1)
+    page, next_cursor = paginate(posts, size)
+    return {"posts": [post_json(p) for p in page], "next_cursor": next_cursor}
+
+
 # --- NOTIFICATIONS PAGE ---
 @app.route("/notifications")
 def notifications():
@@ -417,10 +474,11 @@ def notifications():
     username = session["username"]
     current_user = db.get_user(username)
 
-    notifications = []
-    if current_user is not None and hasattr(current_user, "notifications"):
-        notifications = list(current_user.notifications)[-20:]
-        notifications.reverse()
+    # Une page à la fois (curseur : id de la dernière notification affichée), puis tout est marqué lu
+    notifications, next_cursor = [], None
+    if current_user is not None:
+        notifications, next_cursor = notification_store.page(username, notification_cursor(request.args), NOTIFICATIONS_SHOWN)
+        notification_store.mark_read(username)
 
     pending_requests = []
     if current_user is not None and hasattr(current_user, "pending_requests"):
@@ -431,108 +489,110 @@ def notifications():
         username=username,
         notifications=notifications,
         pending_requests=pending_requests,
+        next_url=url_for("notifications", before=next_cursor) if next_cursor else None,
     )
 
 
+@app.route("/api/notifications")
+def notifications_api():
+    """?before=<id> : page suivante. Ne marque rien comme lu."""
+    if "username" not in session:
+        return {"error": "Not signed in"}, 401
+
+    username = session["username"]
+    size = page_size(request.args.get("page_size"))
+    items, next_cursor = notification_store.page(username, notification_cursor(request.args), size)
+    return {"notifications": items, "unread": notification_store.unread_count(username), "next_cursor": next_cursor}
+
+
 # --- LIKE A POST ---
-@app.route("/like/<int:post_index>")
-def like(post_index):
+@app.route("/like/<int:post_id>")
+def like(post_id):
     if "username" not in session:
         return redirect(url_for("login"))
 
-    posts = load_posts()
-    if 0 <= post_index < len(posts):
-        post = posts[post_index]
+    post = post_store.get(post_id)
+    if post is not None:
         username = session["username"]
 
         already_liked = username in post["likes"]
 
         if already_liked:
-            post["likes"].remove(username)
+            post_store.unlike(post_id, username)
         else:
-            post["likes"].append(username)
+            post_store.like(post_id, username)
 
             owner_username = post.get("poster_username")
             if owner_username and owner_username != username:
                 owner = db.get_user(owner_username)
-                if owner is not None and hasattr(owner, "notifications"):
+                if owner is not None:
                     preview = post.get("content", "")
                     if len(preview) > 40:
                         preview = preview[:40] + "…"
-                    owner.notifications.append(
+                    owner.notify(
                         f"{username} liked your post: \"{preview}\""
                     )
-                    db.save_users()
-
-        save_posts(posts)
 
     return redirect(url_for("feed"))
 
 
 # --- COMMENT ON A POST ---
-@app.route("/comment/<int:post_index>", methods=["POST"])
-def comment(post_index):
+@app.route("/comment/<int:post_id>", methods=["POST"])
+def comment(post_id):
     if "username" not in session:
         return redirect(url_for("login"))
 
-    posts = load_posts()
-    if 0 <= post_index < len(posts):
+    post = post_store.get(post_id)
+    if post is not None:
         comment_text = request.form.get("comment", "").strip()
         if comment_text:
             username = session["username"]
             now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             comment = {"username": username, "comment": comment_text, "date": now}
 
-            if "comments" not in posts[post_index]:
-                posts[post_index]["comments"] = []
-            posts[post_index]["comments"].append(comment)
-            save_posts(posts)
+            post_store.comment(post_id, comment)
 
-            owner_username = posts[post_index].get("poster_username")
+            owner_username = post.get("poster_username")
             if owner_username and owner_username != username:
                 owner = db.get_user(owner_username)
-                if owner is not None and hasattr(owner, "notifications"):
+                if owner is not None:
                     short = comment_text if len(comment_text) <= 40 else comment_text[:40] + "…"
-                    owner.notifications.append(
+                    owner.notify(
                         f"{username} commented on your post: \"{short}\""
                     )
-                    db.save_users()
     return redirect(url_for("feed"))
 
 
 # --- DELETE A POST ---
-@app.route("/delete_post/<int:post_index>", methods=["POST"])
-def delete_post_route(post_index):
+@app.route("/delete_post/<int:post_id>", methods=["POST"])
+def delete_post_route(post_id):
     if "username" not in session:
         return redirect(url_for("login"))
 
     username = session["username"]
-    posts = load_posts()
+    post = post_store.get(post_id)
 
-    if 0 <= post_index < len(posts):
-        post = posts[post_index]
+    if post is not None:
         if post["poster_username"] != username:
             flash("You can only delete your own posts.", "error")
             return redirect(url_for("feed"))
 
-        posts.pop(post_index)
-        save_posts(posts)
+        post_store.delete(post_id)
         flash("Post deleted successfully!", "success")
 
     return redirect(url_for("feed"))
 
 
 # --- EDIT A POST ---
-@app.route("/edit_post/<int:post_index>", methods=["POST"])
-def edit_post_route(post_index):
+@app.route("/edit_post/<int:post_id>", methods=["POST"])
+def edit_post_route(post_id):
     if "username" not in session:
         return redirect(url_for("login"))
 
     username = session["username"]
-    posts = load_posts()
+    post = post_store.get(post_id)
 
-    if 0 <= post_index < len(posts):
-        post = posts[post_index]
+    if post is not None:
         if post["poster_username"] != username:
             flash("You can only edit your own posts.", "error")
             return redirect(url_for("feed"))
@@ -542,31 +602,32 @@ def edit_post_route(post_index):
             flash("Content cannot be empty.", "error")
             return redirect(url_for("feed"))
 
-        post["content"] = new_content
-        post["date"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        save_posts(posts)
+        post_store.edit(
+            post_id,
+            new_content,
+            datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            Post.extract_hashtags(new_content),
+        )
         flash("Post updated!", "success")
 
     return redirect(url_for("feed"))
 
 
 # --- DELETE A COMMENT ---
-@app.route("/delete_comment/<int:post_index>/<int:comment_index>")
-def delete_comment(post_index, comment_index):
+@app.route("/delete_comment/<int:post_id>/<int:comment_index>")
+def delete_comment(post_id, comment_index):
     if "username" not in session:
         return redirect(url_for("login"))
 
     username = session["username"]
-    posts = load_posts()
+    post = post_store.get(post_id)
 
-    if 0 <= post_index < len(posts):
-        comments = posts[post_index].get("comments", [])
+    if post is not None:
+        comments = post.get("comments", [])
         if 0 <= comment_index < len(comments):
             comment = comments[comment_index]
             if comment["username"] == username:
-                comments.pop(comment_index)
-                posts[post_index]["comments"] = comments
-                save_posts(posts)
+                post_store.delete_comment(post_id, comment_index)
                 flash("Comment deleted successfully.", "success")
 
     return redirect(url_for("feed"))
@@ -614,15 +675,9 @@ def profile(username):
         or user.username == current_user.username
     )
 
-    followers = [db.get_user(u) for u in user.followers]
-    followers = [f for f in followers if f is not None]
-    following = [db.get_user(u) for u in user.following]
-    following = [f for f in following if f is not None]
-
     visible = []
     if can_view:
-        posts = load_posts_bis(db)
-        visible = [p for p in posts if p.poster_username == username]
+        visible = load_posts_bis(db, username)
 
     return render_template(
         "profile.html",
@@ -631,8 +686,8 @@ def profile(username):
         current_user=current_user,
         can_view=can_view,
         visible=visible,
-        followers=followers,
-        following=following,
+        follower_count=len(user.followers),
+        following_count=len(user.following),
     )
 
 
@@ -659,7 +714,7 @@ def edit_profile2(username):
             save_path = os.path.join(UPLOAD_FOLDER, filename)
             file.save(save_path)
             user.profile_picture = filename
-            db.save_users()
+            db.save_user(user)
         else:
             flash(
                 f"Invalid file type: .{ext}. Allowed types: {', '.join(ALLOWED_EXT)}",
@@ -682,7 +737,7 @@ def edit_profile2(username):
         else:
             user.is_public = True
 
-        db.save_users()
+        db.save_user(user)
         flash("Profile updated successfully!", "success")
         return redirect(url_for("profile", username=user.username))
 
@@ -700,7 +755,17 @@ def delete_account_route():
 
     user = db.get_user(username)
     if user and checkpw(password.encode(), user.get_password().encode()):
+        # Retire d'abord les abonnements dans les deux sens avec unfollow, pour que les
+        # autres utilisateurs et les abonnés de User.follow_listeners soient à jour
+        for follower in [db.get_user(u) for u in list(user.followers)]:
+            if follower is not None:
+                follower.unfollow(user)
+        for followee in [db.get_user(u) for u in list(user.following)]:
+            if followee is not None:
+                user.unfollow(followee)
+        db.save_users()
         db.remove_user(username)
+        notification_store.clear(username)
         session.pop("username", None)
         flash("Account deleted successfully.", "success")
         return redirect(url_for("home"))
@@ -722,19 +787,18 @@ def search_users():
         session["search_history"] = []
 
     results = []
+    did_you_mean = []
 
     if request.method == "POST":
         query = request.form.get("query", "").strip()
         if query:
-            all_users = db.get_all_users()
-            matches = [
-                u for u in all_users if u.username.lower().startswith(query.lower())
-            ]
-
-            matches.sort(
-                key=lambda u: (not current_user.follows(u), u.username.lower())
-            )
-            results = matches[:10]
+            # Index des usernames : les 10 premiers, utilisateurs suivis d'abord puis les plus influents
+            followed = current_user.following if current_user else ()
+            matches = search_usernames(query, followed)
+            results = [db.get_user(u) for u in matches]
+            if not results:
+                # Recherche approchée (fautes de frappe) sur le username et le nom
+                did_you_mean = db.trigram_index.search(query, limit=5)
 
             if query not in session["search_history"]:
                 session["search_history"].insert(0, query)
@@ -745,6 +809,7 @@ def search_users():
         "search.html",
         current_user=current_user,
         results=results,
+        did_you_mean=did_you_mean,
         history=session.get("search_history", []),
     )
 
@@ -760,18 +825,81 @@ def search_suggestions():
         return {"results": []}
 
     current_user = db.get_user(session["username"])
-    all_users = db.get_all_users()
+    followed = current_user.following if current_user else ()
 
-    matches = [u.username for u in all_users if u.username.lower().startswith(query)]
+    results = search_usernames(query, followed)
+    if not results:
+        return {"results": [], "did_you_mean": db.trigram_index.search(query, limit=5)}
+    return {"results": results}
 
-    matches.sort(
-        key=lambda uname: (
-            not current_user.follows(db.get_user(uname)),
-            uname.lower(),
-        )
+
+# --- TIMELINE METRICS ---
+@app.route("/api/metrics/timelines")
+def timeline_metrics():
+    if "username" not in session:
+        return {"error": "Not signed in"}, 401
+    if session["username"] not in ADMINS:
+        return {"error": "Forbidden"}, 403
+    return timelines.metrics()
+
+
+# --- SEARCH POSTS (plein texte) ---
+def find_posts(query, current_user, limit):
+    """Posts visibles par current_user les plus pertinents pour query : liste de (post, score)."""
+    results = post_search_index.search(
+        query, limit=limit, allowed=lambda author: can_view_posts(current_user, author)
+    )
+    scores = dict(results)
+    posts = post_cache.get_many([post_id for post_id, _ in results])
+    return [(p, scores[p["id"]]) for p in posts]
+
+
+@app.route("/search/posts")
+def search_posts():
+    if "username" not in session:
+        flash("Please sign in to access search.", "error")
+        return redirect(url_for("login"))
+
+    username = session["username"]
+    current_user = db.get_user(username)
+    query = request.args.get("q", "").strip()
+
+    found = find_posts(query, current_user, limit=50) if query else []
+
+    notifications = recent_notifications(current_user)
+
+    return render_template(
+        "feed.html",
+        username=username,
+        tweets=format_posts([p for p, _ in found]),
+        notifications=notifications,
+        search_query=query,
     )
 
-    return {"results": matches[:10]}
+
+@app.route("/api/search_posts")
+def search_posts_api():
+    if "username" not in session:
+        return {"results": []}
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        return {"results": []}
+
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    current_user = db.get_user(session["username"])
+    return {
+        "results": [
+            {
+                "id": p["id"],
+                "poster_username": p["poster_username"],
+                "content": p["content"],
+                "date": p["date"],
+                "score": round(score, 4),
+            }
+            for p, score in find_posts(query, current_user, limit)
+        ]
+    }
 
 
 # --- VIEW PROFILE (via search / followers / following) ---
@@ -805,13 +933,7 @@ def view_profile(username):
     can_view = user.is_public or current_user.follows(user)
     visible = []
     if can_view:
-        posts = load_posts_bis(db)
-        visible = [p for p in posts if p.poster_username == username]
-
-    followers = [db.get_user(u) for u in user.followers if u is not None]
-    followers = [f for f in followers if f is not None]
-    following = [db.get_user(u) for u in user.following if u is not None]
-    following = [f for f in following if f is not None]
+        visible = load_posts_bis(db, username)
 
     return render_template(
         "profile.html",
@@ -820,8 +942,8 @@ def view_profile(username):
         current_user=current_user,
         can_view=can_view,
         visible=visible,
-        followers=followers,
-        following=following,
+        follower_count=len(user.followers),
+        following_count=len(user.following),
     )
 
 
@@ -836,6 +958,7 @@ def follow_user(username):
     user_to_follow = db.get_user(username)
     if user_to_follow:
         current_user.follow(user_to_follow)
+        db.save_users()
         flash(f"You are now following {username}", "success")
     else:
         flash("User not found.", "error")
@@ -853,6 +976,7 @@ def unfollow_user(username):
     user_to_unfollow = db.get_user(username)
     if user_to_unfollow:
         current_user.unfollow(user_to_unfollow)
+        db.save_users()
         flash(f"You have unfollowed {username}", "success")
     else:
         flash("User not found.", "error")
@@ -878,6 +1002,7 @@ def send_follow_request(username):
 
     notif = FollowRequestNotification(sender=current_user, receiver=user)
     notif.send_request()
+    db.save_users()
 
     flash(f"Follow request sent to {user.username}!", "success")
     return redirect(url_for("search_users"))
@@ -894,6 +1019,7 @@ def block_user(username):
     user_to_block = db.get_user(username)
     if user_to_block:
         current_user.block(user_to_block)
+        db.save_users()
         flash(f"{username} has been blocked.", "success")
     else:
         flash("User not found.", "error")
@@ -911,6 +1037,7 @@ def unblock_user(username):
     user_to_unblock = db.get_user(username)
     if user_to_unblock:
         current_user.unblock(user_to_unblock)
+        db.save_users()
         flash(f"{username} has been unblocked.", "success")
     else:
         flash("User not found.", "error")
@@ -931,8 +1058,7 @@ def view_followers(username):
 
     entry = request.args.get("entry", "feed")
 
-    followers = [db.get_user(u) for u in user.followers if u is not None]
-    followers = [f for f in followers if f is not None]
+    followers, next_url = follow_page("followers", user)
     current_user = db.get_user(session["username"])
 
     return render_template(
@@ -940,6 +1066,7 @@ def view_followers(username):
         entry=entry,
         user=user,
         followers=followers,
+        next_url=next_url,
         current_user=current_user,
     )
 
@@ -958,8 +1085,7 @@ def view_following(username):
         flash("User not found.", "error")
         return redirect(url_for("feed"))
 
-    following = [db.get_user(u) for u in user.following if u is not None]
-    following = [f for f in following if f is not None]
+    following, next_url = follow_page("following", user)
     current_user = db.get_user(session["username"])
 
     return render_template(
@@ -967,6 +1093,7 @@ def view_following(username):
         entry=entry,
         user=user,
         following=following,
+        next_url=next_url,
         current_user=current_user,
     )
 
@@ -992,18 +1119,7 @@ def suggestions():
         return redirect(url_for("login"))
 
     current_user = db.get_user(session["username"])
-    all_users = db.get_all_users()
-
-    suggested_users = [
-        u
-        for u in all_users
-        if u.username != current_user.username
-        and current_user.follows(u) is False
-        and u.username not in current_user.blocked_users
-        and u.is_public
-    ]
-
-    suggested_users.sort(key=lambda u: len(u.followers), reverse=True)
+    suggested_users = suggestion_engine.suggest(current_user, limit=20)
 
     return render_template(
         "suggestions.html",
@@ -1037,7 +1153,7 @@ def change_password():
 
         # Update
         user.change_password(old_password, new_password)
-        db.save_users()
+        db.save_user(user)
         flash("Password updated successfully!", "success")
         return redirect(url_for("profile", username=user.username))
 
@@ -1053,11 +1169,7 @@ def reset_password():
         new_password = request.form.get("new_password")
         confirm = request.form.get("confirm_password")
 
-        user = None
-        for u in db.get_all_users():
-            if u.email == email:
-                user = u
-                break
+        user = db.get_user_by_email(email)
 
         if not user:
             flash("Email not found.", "error")
@@ -1073,7 +1185,7 @@ def reset_password():
             return redirect(url_for("reset_password"))
 
         user._User__password = user.hash_password(new_password)
-        db.save_users()
+        db.save_user(user)
         del reset_tokens[email]
 
         flash("Password reset successfully! You can now sign in.", "success")
@@ -1089,7 +1201,6 @@ def hashtag_feed(tag):
         flash("Please sign in to access TwINSA.", "error")
         return redirect(url_for("login"))
 
-    posts = load_posts()
     username = session["username"]
     current_user = db.get_user(username)
 
@@ -1136,54 +1247,27 @@ def hashtag_feed(tag):
             "post_id": new_post.post_id,
         }
 
-        posts.insert(0, post_data)
+        post_store.create(post_data)
         current_user.add_post(new_post)
-        db.save_users()
-        save_posts(posts)
+        db.save_user(current_user)
         flash("Post created successfully!", "success")
 
         return redirect(url_for("hashtag_feed", tag=tag))
 
-    for idx, p in enumerate(posts):
-        p["index"] = idx
+    tag_lower = tag.lower()
 
-    visible_posts = posts
+    # Posts du hashtag (index inversé, du plus récent au plus ancien), une page à la fois
+    size = page_size(request.args.get("page_size"))
+    cursor = decode_cursor(request.args.get("cursor"))
+    posts = post_cache.iter_many(hashtag_index.iter_post_ids([tag_lower], before=cursor, batch=size + 1), size + 1)
     if current_user is not None:
         allowed_usernames = set(current_user.following + [username])
-        visible_posts = [
-            p for p in posts if p.get("poster_username") in allowed_usernames
-        ]
+        posts = (p for p in posts if p.get("poster_username") in allowed_usernames)
+    filtered, next_cursor = paginate(posts, size)
 
-    tag_lower = tag.lower()
+    notifications = recent_notifications(current_user)
 
-    filtered = []
-    for p in visible_posts:
-        hashtags = p.get("hashtags")
-
-        if not hashtags:
-            temp_post = Post(p["content"], p["poster_username"], db)
-            hashtags = temp_post.hashtags
-            p["hashtags"] = hashtags
-
-        hashtags_lower = [h.lower() for h in hashtags]
-        if tag_lower in hashtags_lower:
-            filtered.append(p)
-
-    filtered.sort(
-        key=lambda p: datetime.datetime.strptime(p["date"], "%Y-%m-%d %H:%M:%S"),
-        reverse=True,
-    )
-
-    notifications = []
-    if current_user is not None and hasattr(current_user, "notifications"):
-        notifications = list(current_user.notifications)[-20:]
-        notifications.reverse()
-
-    formatted_posts = []
-    for p in filtered:
-        post_obj = Post(p["content"], p["poster_username"], db)
-        post_obj.hashtags = p.get("hashtags", [])
-        formatted_posts.append({**p, "html_content": post_obj.get_html_content()})
+    formatted_posts = format_posts(filtered)
 
     return render_template(
         "feed.html",
@@ -1191,6 +1275,7 @@ def hashtag_feed(tag):
         tweets=formatted_posts,
         notifications=notifications,
         selected_hashtag=tag_lower,
+        next_url=next_page_url("hashtag_feed", next_cursor, tag=tag),
     )
 
 
@@ -1207,24 +1292,7 @@ def hashtag_suggestions():
     if query.startswith("#"):
         query = query[1:]
 
-    posts = load_posts()
-    all_tags = {}
-
-    for p in posts:
-        tags = p.get("hashtags", [])
-        if not tags and "content" in p:
-            temp_post = Post(p["content"], p["poster_username"], db)
-            tags = temp_post.hashtags
-            p["hashtags"] = tags
-
-        for t in tags:
-            t_norm = t.lower()
-            all_tags[t_norm] = all_tags.get(t_norm, 0) + 1
-
-    suggestions = [t for t in all_tags.keys() if t.startswith(query)]
-    suggestions.sort(key=lambda x: (-all_tags[x], x))
-
-    return {"results": suggestions[:10]}
+    return {"results": hashtag_index.suggest(query, 10)}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+# Types de contenu des posts (texte, image, hashtag, emoji) sous forme de bits
+
+import bisect
+import heapq
+import re
+from itertools import groupby, islice
+from backend.post_index import PostIndex
+
+HAS_TEXT = 1
+HAS_IMAGE = 2
+HAS_HASHTAG = 4
+HAS_EMOJI = 8
+
+EMOJI = re.compile(r"[\U0001F300-\U0001FAFF]")
+
+# Valeurs du paramètre content_type du feed
+FLAGS = {"text": HAS_TEXT, "image": HAS_IMAGE, "hashtag": HAS_HASHTAG, "emoji": HAS_EMOJI}
+
+
+def content_flags(post):
+    """Masque des types de contenu d'un post (calculé à l'écriture et gardé dans post["flags"])."""
+    content = post.get("content", "") or ""
+    flags = 0
+    if content.strip():
+        flags |= HAS_TEXT
+    if post.get("image"):
+        flags |= HAS_IMAGE
+    if post.get("hashtags"):
+        flags |= HAS_HASHTAG
+    if EMOJI.search(content):
+        flags |= HAS_EMOJI
+    return flags
+
+
+def flags_mask(content_types):
+    """Masque des types demandés (les valeurs inconnues sont ignorées)."""
+    mask = 0
+    for content_type in content_types:
+        mask |= FLAGS.get(content_type, 0)
+    return mask
+
+
+def _bits(mask):
+    return [flag for flag in FLAGS.values() if mask & flag]
+
+
+def _newest_first(ids, before=None):
+    end = len(ids) if before is None else bisect.bisect_left(ids, before)
+    return (ids[i] for i in range(end - 1, -1, -1))
+
+
+class ContentFlagIndex(PostIndex):
+    """
+    Pour chaque type de contenu, la liste triée des ids des posts qui l'ont.
+    Un filtre "image + emoji" est la fusion de deux listes au lieu d'une
+    recherche d'emoji (regex) dans chaque post. Le masque de chaque post est
+    celui gardé par le stockage dans post["flags"].
+    """
+
+    def _clear(self):
+        self._postings = {flag: [] for flag in FLAGS.values()}
+
+    def _build(self, posts):
+        self._clear()
+        for post in posts:
+            for flag in _bits(post["flags"]):
+                self._postings[flag].append(post["id"])
+        for ids in self._postings.values():
+            ids.sort()
+
+    def _add(self, post):
+        for flag in _bits(post["flags"]):
+            bisect.insort(self._postings[flag], post["id"])
+
+    def _remove(self, post):
+        for flag in _bits(post["flags"]):
+            ids = self._postings[flag]
+            i = bisect.bisect_left(ids, post["id"])
+            if i < len(ids) and ids[i] == post["id"]:
+                del ids[i]
+
+    # --- Requêtes ---
+    def estimate(self, mask):
+        """Nombre maximal de posts qui ont au moins un des types du masque."""
+        return self._read(lambda: sum(len(self._postings[flag]) for flag in _bits(mask)))
+
+    def _query(self, mask, limit, before):
+        lists = (_newest_first(self._postings[flag], before) for flag in _bits(mask))
+        merged = heapq.merge(*lists, reverse=True)
+        return list(islice((post_id for post_id, _ in groupby(merged)), limit))
+
+    def post_ids(self, mask, limit=None, before=None):
+        """
+        Ids des posts, du plus récent au plus ancien, qui ont au moins un des
+        types du masque : au plus `limit`, et seulement ceux d'id < before.
+        """
+        return self._read(lambda: self._query(mask, limit, before))
+
+    def iter_post_ids(self, mask, before=None, batch=100):
+        """Comme post_ids, mais paresseux : l'index est lu par lots de `batch` ids."""
+        while True:
+            ids = self._read(lambda: self._query(mask, batch, before))
+            yield from ids
+            if len(ids) < batch:
+                return
+            before = ids[-1]
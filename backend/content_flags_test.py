@@ -0,0 +1,44 @@
+import unittest
+from backend.post_cache import PostCache
+from backend.content_flags import (
+    ContentFlagIndex, HAS_EMOJI, HAS_HASHTAG, HAS_IMAGE, HAS_TEXT, content_flags, flags_mask,
+)
+from conftest import PostStoreTestCase, make_post
+
+
+class TestContentFlags(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = ContentFlagIndex(self.store)
+
+    def test_flags(self):
+        self.assertEqual(content_flags(make_post(content="hello")), HAS_TEXT)
+        self.assertEqual(content_flags(make_post(content="  ", image="a.png")), HAS_IMAGE)
+        self.assertEqual(content_flags(make_post(content="#insa 😀", hashtags=["insa"])), HAS_TEXT | HAS_HASHTAG | HAS_EMOJI)
+        self.assertEqual(flags_mask(["image", "emoji", "unknown"]), HAS_IMAGE | HAS_EMOJI)
+        self.assertEqual(flags_mask(["unknown"]), 0)
+
+    def test_posting_lists(self):
+        text = self.store.create(make_post(content="hello"))["id"]
+        image = self.store.create(make_post(content="", image="a.png"))["id"]
+        both = self.store.create(make_post(content="😀", image="b.png"))["id"]
+        mask = flags_mask(["image", "emoji"])
+
+        self.assertEqual(self.index.post_ids(mask), [both, image])
+        self.assertEqual(self.index.post_ids(mask, before=both), [image])
+        self.assertEqual(self.index.post_ids(flags_mask(["text"]), limit=1), [both])
+        self.assertEqual(list(self.index.iter_post_ids(flags_mask(["text", "image"]), batch=1)), [both, image, text])
+        self.assertEqual(self.index.estimate(mask), 3)
+        self.assertEqual(self.index.post_ids(0), [])
+
+        self.store.edit(both, "plain", "2025-12-02 10:00:00", [])
+        self.assertEqual(self.store.get(both)["flags"], HAS_TEXT | HAS_IMAGE)
+        self.assertEqual(self.index.post_ids(flags_mask(["emoji"])), [])
+        self.store.delete(image)
+        self.assertEqual(self.index.post_ids(flags_mask(["image"])), [both])
+        self.assertEqual(PostCache(self.store).get(both)["flags"], HAS_TEXT | HAS_IMAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
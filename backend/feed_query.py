@@ -0,0 +1,158 @@
+# Requêtes du feed : choix de l'index le plus sélectif puis filtres paresseux
+
+import bisect
+from backend.content_flags import flags_mask
+from backend.hashtag_index import post_hashtags
+from backend.time_index import to_timestamp
+
+
+def in_date_range(post, start, end):
+    ts = post.get("ts")
+    if ts is None:
+        return False
+    if start is not None and ts < start:
+        return False
+    if end is not None and ts >= end:
+        return False
+    return True
+
+
+class FeedQuery:
+    """
+    Paramètres d'une page du feed. `viewer` est l'utilisateur connecté (None :
+    pas de règle de visibilité), `start` / `end` les bornes [début, fin[ en
+    secondes epoch.
+    Les posts sortent du plus récent au plus ancien : par (date, id) si des
+    hashtags sont choisis, sinon par id (ordre de publication).
+    """
+
+    def __init__(self, viewer=None, feed_type="friends", hashtags=(), match="any",
+                 start=None, end=None, content_types=()):
+        self.viewer = viewer
+        self.feed_type = feed_type
+        self.hashtags = {t.lower().lstrip("#") for t in hashtags if t}
+        self.match = "all" if match == "all" else "any"
+        self.start = start
+        self.end = end
+        self.content_types = set(content_types)
+
+    @property
+    def by_date(self):
+        return bool(self.hashtags)
+
+    @property
+    def has_date_range(self):
+        return self.start is not None or self.end is not None
+
+    @property
+    def friends_only(self):
+        return self.viewer is not None and self.feed_type != "discover"
+
+
+class FeedPlanner:
+    """
+    Construit le flux de posts d'une FeedQuery :
+
+    - parmi les filtres indexés (hashtags, plage de dates, auteurs suivis via
+      les fils "Friends", types de contenu), celui qui donne le moins de candidats sert de
+      source, à condition de pouvoir sortir les posts dans l'ordre demandé ;
+    - les autres filtres sont appliqués un par un sur ce flux (générateurs),
+      les moins coûteux d'abord.
+
+    Rien n'est lu au-delà de ce que consomme l'appelant (paginate).
+    Seule exception, une plage de dates servant de source à un tri par id
+    doit être triée d'un bloc : elle n'est choisie que si elle compte au
+    plus DATE_SORT_LIMIT posts.
+    """
+
+    DATE_SORT_LIMIT = 1000
+
+    def __init__(self, cache, hashtag_index, time_index, timelines, content_index, users_db):
+        self.cache = cache
+        self.hashtag_index = hashtag_index
+        self.time_index = time_index
+        self.timelines = timelines
+        self.content_index = content_index
+        self.users_db = users_db
+
+    # --- Choix de la source ---
+    def candidates(self, query):
+        """Sources possibles pour la requête : liste de (nombre estimé de posts, nom)."""
+        # Le parcours complet sort les posts dans l'ordre des ids : exclu pour un tri par date
+        candidates = [] if query.by_date else [(self.cache.count(), "all")]
+        if query.hashtags:
+            candidates.append((self.hashtag_index.estimate(query.hashtags, query.match), "hashtags"))
+        if query.has_date_range:
+            count = self.time_index.count(query.start, query.end)
+            if query.by_date or count <= self.DATE_SORT_LIMIT:
+                candidates.append((count, "dates"))
+        if query.friends_only and not query.by_date:
+            # Les fils "Friends" sont dans l'ordre des ids : pas utilisables pour un tri par date
+            candidates.append((self.timelines.home_count(query.viewer.username), "authors"))
+        if query.content_types and not query.by_date:
+            candidates.append((self.content_index.estimate(flags_mask(query.content_types)), "content"))
+        return candidates
+
+    def plan(self, query):
+        """Nom de la source choisie (le premier des moins nombreux, "all" en dernier recours)."""
+        candidates = self.candidates(query)
+        return min(candidates, key=lambda c: (c[0], c[1] == "all"))[1]
+
+    def _source(self, name, query, cursor, batch):
+        before_id = cursor[1] if cursor else None
+        if name == "hashtags":
+            post_ids = self.hashtag_index.iter_post_ids(query.hashtags, query.match, before=cursor, batch=batch)
+        elif name == "authors":
+            post_ids = self.timelines.iter_home_ids(query.viewer.username, before=before_id, batch=batch)
+        elif name == "content":
+            post_ids = self.content_index.iter_post_ids(flags_mask(query.content_types), before=before_id, batch=batch)
+        elif name == "dates" and query.by_date:
+            before = (to_timestamp(cursor[0]) or 0, cursor[1]) if cursor else None
+            post_ids = self.time_index.iter_post_ids(query.start, query.end, before=before, batch=batch)
+        elif name == "dates":
+            # La plage (petite, voir candidates) est lue dans l'ordre des dates : on remet ses ids
+            # dans l'ordre de publication
+            post_ids = sorted(self.time_index.post_ids(query.start, query.end))
+            end = len(post_ids) if before_id is None else bisect.bisect_left(post_ids, before_id)
+            post_ids = post_ids[end - 1::-1] if end else []
+        else:
+            return self.cache.iter_posts(before=before_id)
+        return self.cache.iter_many(post_ids, batch)
+
+    # --- Filtres ---
+    def _filters(self, query, source):
+        """Prédicats des filtres que la source n'applique pas déjà, les moins coûteux d'abord."""
+        filters = []
+        if query.hashtags and source != "hashtags":
+            tags = query.hashtags
+            if query.match == "all":
+                filters.append(lambda p: tags <= post_hashtags(p))
+            else:
+                filters.append(lambda p: not tags.isdisjoint(post_hashtags(p)))
+        if query.has_date_range and source != "dates":
+            filters.append(lambda p: in_date_range(p, query.start, query.end))
+        if query.friends_only and source != "authors":
+            allowed = set(query.viewer.following) | {query.viewer.username}
+            filters.append(lambda p: p.get("poster_username") in allowed)
+        if query.viewer is not None and query.feed_type == "discover":
+            filters.append(lambda p: self.is_discoverable(query.viewer, p.get("poster_username")))
+        if query.content_types and source != "content":
+            # Masque de bits des posts en cache : plus de regex par post
+            mask = flags_mask(query.content_types)
+            filters.append(lambda p: p["flags"] & mask)
+        return filters
+
+    def is_discoverable(self, viewer, author_username):
+        """Fil "Discover" : les comptes publics que le lecteur ne suit pas encore."""
+        if not author_username or author_username == viewer.username or author_username in viewer.following:
+            return False
+        author = self.users_db.get_user(author_username)
+        return author is not None and getattr(author, "is_public", False)
+
+    def posts(self, query, cursor=None, batch=100):
+        """Posts de la requête à partir du curseur (date, id) : un itérateur paresseux."""
+        source = self.plan(query)
+        posts = self._source(source, query, cursor, batch)
+        for keep in self._filters(query, source):
+            posts = filter(keep, posts)
+        return posts
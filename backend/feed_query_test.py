@@ -0,0 +1,140 @@
+import random
+import re
+import unittest
+from itertools import product
+from backend.user import User
+from backend.users_db import UsersDatabase
+from backend.post_log import PostLog
+from backend.post_cache import PostCache
+from backend.hashtag_index import HashtagIndex, post_hashtags
+from backend.time_index import TimeIndex, to_timestamp
+from backend.timelines import TimelineService
+from backend.content_flags import ContentFlagIndex
+from backend.feed_query import FeedPlanner, FeedQuery, in_date_range
+from backend.pagination import paginate, decode_cursor
+from conftest import PostStoreTestCase, make_post
+
+
+def matches_content(post, content_types):
+    """Ancien filtre content_type du feed (regex sur chaque post)."""
+    content = post.get("content", "") or ""
+    return (("text" in content_types and bool(content.strip()))
+            or ("image" in content_types and bool(post.get("image")))
+            or ("hashtag" in content_types and bool(post.get("hashtags")))
+            or ("emoji" in content_types and bool(re.search(r"[\U0001F300-\U0001FAFF]", content))))
+
+
+class TestFeedPlanner(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = UsersDatabase(self.path("users.json"))
+        self.users = {}
+        for name, public in (("ines", True), ("alex", True), ("maria", False), ("noa", True)):
+            self.users[name] = User(name, f"{name}@mail.com", "Pass123!", name.title(), 20, "France", is_public=public)
+            self.db.add_user(self.users[name])
+        self.users["ines"].follow(self.users["alex"])
+
+        self.cache = PostCache(self.store)
+        self.timelines = TimelineService(self.store, self.db, size=4)
+        self.planner = FeedPlanner(
+            self.cache, HashtagIndex(self.store), TimeIndex(self.store), self.timelines,
+            ContentFlagIndex(self.store), self.db
+        )
+
+        rng = random.Random(4)
+        tags = ["insa", "maths", "sport"]
+        for i in range(40):
+            chosen = rng.sample(tags, rng.randint(0, 2))
+            content = " ".join(f"#{t}" for t in chosen) + (" 😀" if i % 5 == 0 else " hello")
+            date = f"2025-01-{rng.randint(1, 9):02d} {rng.randint(0, 23):02d}:00:00"
+            post = make_post(rng.choice(list(self.users)), content, chosen, date)
+            post["image"] = "photo.png" if i % 7 == 0 else None
+            self.store.create(post)
+        # Posts modifiés : leur date ne suit plus l'ordre des ids
+        for post_id in (3, 10, 17):
+            post = self.store.get(post_id)
+            self.store.edit(post_id, post["content"], "2025-01-09 23:30:00", post["hashtags"])
+
+    def reference(self, query):
+        """Ancien feed : tous les posts filtrés un par un, puis triés."""
+        viewer = query.viewer
+        posts = []
+        for p in self.cache.snapshot():
+            author = self.db.get_user(p["poster_username"])
+            if query.hashtags:
+                tags = post_hashtags(p)
+                if (query.match == "all" and not query.hashtags <= tags) or not (query.hashtags & tags):
+                    continue
+            if viewer is not None and query.feed_type == "discover":
+                if p["poster_username"] == viewer.username or p["poster_username"] in viewer.following or not author.is_public:
+                    continue
+            elif viewer is not None and p["poster_username"] not in viewer.following + [viewer.username]:
+                continue
+            if query.has_date_range and not in_date_range(p, query.start, query.end):
+                continue
+            if query.content_types and not matches_content(p, query.content_types):
+                continue
+            posts.append(p)
+        if query.by_date:
+            posts.sort(key=lambda p: (p["date"], p["id"]), reverse=True)
+        return [p["id"] for p in posts]
+
+    def test_same_output_whatever_the_source(self):
+        ranges = [(None, None), (to_timestamp("2025-01-03 00:00:00"), None),
+                  (to_timestamp("2025-01-02 00:00:00"), to_timestamp("2025-01-04 00:00:00"))]
+        sources = set()
+        for viewer, feed_type, tags, match, (start, end), types in product(
+            (None, self.users["ines"]), ("friends", "discover"), ((), ("insa",), ("insa", "maths")),
+            ("any", "all"), ranges, ((), ("emoji",), ("image", "emoji"), ("text",)),
+        ):
+            query = FeedQuery(viewer, feed_type, tags, match, start, end, types)
+            expected = self.reference(query)
+            sources.add(self.planner.plan(query))
+            self.assertEqual([p["id"] for p in self.planner.posts(query, batch=3)], expected)
+
+            # Page par page avec les curseurs
+            ids, cursor = [], None
+            while True:
+                page, next_cursor = paginate(self.planner.posts(query, decode_cursor(cursor), batch=3), 4)
+                ids += [p["id"] for p in page]
+                if next_cursor is None:
+                    break
+                cursor = next_cursor
+            self.assertEqual(ids, expected)
+        self.assertEqual(sources, {"all", "hashtags", "dates", "authors", "content"})
+
+    def test_plan_picks_the_most_selective_index(self):
+        ines = self.users["ines"]
+        self.assertEqual(self.planner.plan(FeedQuery(ines)), "authors")
+        self.assertEqual(self.planner.plan(FeedQuery(ines, "discover")), "all")
+        self.assertEqual(self.planner.plan(FeedQuery(None, hashtags=["insa"])), "hashtags")
+        narrow = FeedQuery(None, "discover", start=to_timestamp("2025-01-09 23:00:00"))
+        self.assertEqual(self.planner.plan(narrow), "dates")
+        # Tri par id : une plage trop large n'est pas triée d'un bloc, elle reste un filtre
+        self.planner.DATE_SORT_LIMIT = 0
+        self.assertEqual(self.planner.plan(narrow), "all")
+        self.assertEqual(self.planner.plan(FeedQuery(None, hashtags=["insa", "maths"], start=0, end=1)), "dates")
+        del self.planner.DATE_SORT_LIMIT
+        self.assertEqual(self.planner.plan(FeedQuery(None, hashtags=["nope"], start=0)), "hashtags")
+        self.assertEqual(self.planner.plan(FeedQuery(None, "discover", content_types=["image"])), "content")
+
+    def test_hashtag_order_when_estimate_exceeds_corpus(self):
+        # Somme des listes de "a" et "b" (6) > nombre de posts (3) : la source reste l'index des hashtags
+        store = PostLog(self.path("small.json"))
+        cache = PostCache(store)
+        planner = FeedPlanner(cache, HashtagIndex(store), TimeIndex(store), TimelineService(store, self.db),
+                              ContentFlagIndex(store), self.db)
+        for day in (1, 2, 3):
+            store.create(make_post("ines", "#a #b", ["a", "b"], f"2025-01-0{day} 10:00:00"))
+        store.edit(1, "#a #b edited", "2025-01-05 10:00:00", ["a", "b"])
+
+        one = [p["id"] for p in planner.posts(FeedQuery(hashtags=["a"]))]
+        both = FeedQuery(hashtags=["a", "b"])
+        self.assertEqual(planner.plan(both), "hashtags")
+        self.assertEqual(one, [1, 3, 2])
+        self.assertEqual([p["id"] for p in planner.posts(both)], one)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+# Statistiques du graphe des abonnements (tâche de fond, NumPy) et lecture par l'application
+#
+#   python -m backend.graph_analytics [dossier de sortie]
+#
+# Calcule pour chaque utilisateur le nombre d'abonnements réciproques, le nombre
+# de comptes atteints en deux sauts et un score d'influence (PageRank), puis les
+# écrit dans <dossier>/metrics.npy (tableau structuré, lu en mémoire partagée
+# avec mmap) et <dossier>/users.json (usernames, dans l'ordre des lignes).
+
+import json
+import os
+import sys
+import tempfile
+from backend.storage import atomic_write_json
+
+try:
+    import numpy as np
+except ImportError:  # NumPy n'est nécessaire que pour cette tâche et pour lire ses résultats
+    np = None
+
+ANALYTICS_DIR = "backend/analytics"
+METRICS_FILE = "metrics.npy"
+USERS_FILE = "users.json"
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for graph analytics (pip install numpy).")
+
+
+def metrics_dtype():
+    _require_numpy()
+    return np.dtype([("mutual", "<u4"), ("two_hop", "<u4"), ("pagerank", "<f4")])
+
+
+class CSRGraph:
+    """
+    Graphe "following" en matrice creuse CSR : les comptes suivis par
+    l'utilisateur i sont indices[indptr[i]:indptr[i + 1]] (triés).
+    Les ids sont les positions dans `usernames`.
+    """
+
+    def __init__(self, usernames, indptr, indices):
+        self.usernames = usernames
+        self.indptr = indptr
+        self.indices = indices
+
+    @property
+    def n(self):
+        return len(self.usernames)
+
+    @classmethod
+    def from_users(cls, users):
+        _require_numpy()
+        users = list(users)
+        usernames = sorted(u.username for u in users)
+        ids = {name: i for i, name in enumerate(usernames)}
+
+        rows, cols = [], []
+        for user in users:
+            i = ids[user.username]
+            for followed in user.following:
+                j = ids.get(followed)
+                if j is not None and j != i:
+                    rows.append(i)
+                    cols.append(j)
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(len(usernames) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(usernames)), out=indptr[1:])
+        return cls(usernames, indptr, cols[order])
+
+    def out_degrees(self):
+        return np.diff(self.indptr)
+
+    def rows(self):
+        """Ligne (id du follower) de chaque arête."""
+        return np.repeat(np.arange(self.n, dtype=np.int64), self.out_degrees())
+
+
+def mutual_counts(graph):
+    """Nombre d'abonnements réciproques (i suit j et j suit i) de chaque utilisateur."""
+    rows = graph.rows()
+    keys = rows * graph.n + graph.indices
+    reverse = graph.indices * graph.n + rows
+    mutual = np.isin(keys, reverse, assume_unique=True)
+    return np.bincount(rows[mutual], minlength=graph.n)
+
+
+def two_hop_reach(graph, chunk=1 << 20):
+    """
+    Nombre de comptes distincts atteints en un ou deux sauts depuis chaque
+    utilisateur (lui-même exclu). Les chemins à deux sauts sont générés par
+    blocs de lignes d'environ `chunk` chemins, pour borner la mémoire.
+    """
+    n, indptr, indices = graph.n, graph.indptr, graph.indices
+    reach = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return reach
+
+    out_degrees = graph.out_degrees()
+    rows = graph.rows()
+    # Nombre cumulé de chemins à deux sauts au début de chaque ligne
+    paths = np.concatenate(([0], np.cumsum(out_degrees[indices])))
+    row_paths = paths[indptr]
+
+    start = 0
+    while start < n:
+        end = int(np.searchsorted(row_paths, row_paths[start] + chunk, side="right")) - 1
+        end = min(max(end, start + 1), n)
+        e0, e1 = indptr[start], indptr[end]
+        src, mid = rows[e0:e1], indices[e0:e1]
+
+        counts = out_degrees[mid]
+        total = int(counts.sum())
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        second = indices[np.repeat(indptr[mid], counts) + np.arange(total) - offsets]
+
+        sources = np.concatenate((src, np.repeat(src, counts)))
+        targets = np.concatenate((mid, second))
+        keep = sources != targets
+        pairs = np.unique(sources[keep] * n + targets[keep])
+        reach += np.bincount(pairs // n, minlength=n)
+        start = end
+    return reach
+
+
+def pagerank(graph, damping=0.85, tol=1e-10, max_iter=100):
+    """
+    Score d'influence : PageRank sur le graphe "following" (suivre quelqu'un
+    lui transmet une part de son score). La somme des scores vaut 1.
+    """
+    n = graph.n
+    if n == 0:
+        return np.zeros(0)
+    out_degrees = graph.out_degrees().astype(np.float64)
+    dangling = out_degrees == 0
+    rows = graph.rows()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        share = np.divide(rank, out_degrees, out=np.zeros(n), where=~dangling)
+        received = np.bincount(graph.indices, weights=share[rows], minlength=n)
+        new_rank = damping * (received + rank[dangling].sum() / n) + (1 - damping) / n
+        delta = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if delta < tol:
+            break
+    return rank
+
+
+def compute_metrics(users):
+    """(usernames, tableau structuré metrics_dtype()) pour tous les utilisateurs."""
+    graph = CSRGraph.from_users(users)
+    metrics = np.zeros(graph.n, dtype=metrics_dtype())
+    metrics["mutual"] = mutual_counts(graph)
+    metrics["two_hop"] = two_hop_reach(graph)
+    metrics["pagerank"] = pagerank(graph)
+    return graph.usernames, metrics
+
+
+def write_metrics(directory, usernames, metrics):
+    """Écrit metrics.npy puis users.json (chacun de façon atomique)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, METRICS_FILE)
+    fd, tmp_path = tempfile.mkstemp(prefix=METRICS_FILE + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, metrics)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    atomic_write_json(os.path.join(directory, USERS_FILE), usernames, indent=None)
+
+
+class GraphMetrics:
+    """
+    Résultats de la tâche, lus par l'application : metrics.npy est projeté en
+    mémoire (mmap), seuls les usernames sont chargés.
+    """
+
+    def __init__(self, usernames, metrics):
+        self.metrics = metrics
+        self._rows = {name: i for i, name in enumerate(usernames)}
+
+    @classmethod
+    def load(cls, directory=ANALYTICS_DIR):
+        """Résultats de la dernière exécution, ou None (pas de NumPy, pas de fichiers, fichiers incohérents)."""
+        if np is None:
+            return None
+        try:
+            metrics = np.load(os.path.join(directory, METRICS_FILE), mmap_mode="r")
+            with open(os.path.join(directory, USERS_FILE), encoding="utf-8") as f:
+                usernames = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if metrics.dtype != metrics_dtype() or len(metrics) != len(usernames):
+            return None  # fichiers d'exécutions différentes
+        return cls(usernames, metrics)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, username, field):
+        row = self._rows.get(username)
+        return None if row is None else self.metrics[field][row].item()
+
+    def influence(self, username):
+        """PageRank ramené à la moyenne (1.0 = utilisateur moyen, 0.0 si inconnu)."""
+        rank = self.get(username, "pagerank")
+        return 0.0 if rank is None else rank * len(self)
+
+
+def main(argv):
+    from backend.users_db import UsersDatabase
+    from backend.users_sqlite import SQLiteUsersDatabase
+
+    _require_numpy()
+    directory = argv[1] if len(argv) > 1 else ANALYTICS_DIR
+    if os.environ.get("TWINSA_STORAGE", "json") == "sqlite":
+        db = SQLiteUsersDatabase("backend/users_database.sqlite3", json_file="backend/users_database.json")
+    else:
+        db = UsersDatabase("backend/users_database.json")
+
+    usernames, metrics = compute_metrics(db.get_all_users())
+    write_metrics(directory, usernames, metrics)
+    print(f"Graph metrics for {len(usernames)} users written to {directory}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,76 @@
+import unittest
+from backend.user import User
+from backend.users_db import UsersDatabase
+from backend import graph_analytics
+from backend.graph_analytics import CSRGraph, GraphMetrics, compute_metrics, write_metrics
+from conftest import TempDirTestCase
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGraphAnalytics(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = UsersDatabase(self.path("users.json"))
+        self.users = {}
+        for name in ("alex", "ines", "leo", "maria", "noa"):
+            self.users[name] = User(name, f"{name}@mail.com", "Pass123!", name.title(), 20, "France")
+            self.db.add_user(self.users[name])
+        for follower, followee in (
+            ("ines", "alex"), ("alex", "ines"), ("ines", "maria"), ("maria", "leo"),
+            ("alex", "leo"), ("leo", "alex"), ("noa", "alex"),
+        ):
+            self.users[follower].follow(self.users[followee])
+
+    def expected_reach(self, name):
+        first = set(self.users[name].following)
+        second = {v for u in first for v in self.users[u].following}
+        return len((first | second) - {name})
+
+    def test_metrics_match_a_direct_computation(self):
+        graph = CSRGraph.from_users(self.db.get_all_users())
+        self.assertEqual(graph.usernames, ["alex", "ines", "leo", "maria", "noa"])
+        self.assertEqual(graph.indptr.tolist(), [0, 2, 4, 5, 6, 7])
+
+        usernames, metrics = compute_metrics(self.db.get_all_users())
+        for i, name in enumerate(usernames):
+            user = self.users[name]
+            mutual = sum(1 for u in user.following if name in self.users[u].following)
+            self.assertEqual(metrics["mutual"][i], mutual, name)
+            self.assertEqual(metrics["two_hop"][i], self.expected_reach(name), name)
+
+        # Petits blocs : même résultat
+        self.assertEqual(graph_analytics.two_hop_reach(graph, chunk=1).tolist(), metrics["two_hop"].tolist())
+
+        rank = dict(zip(usernames, metrics["pagerank"].tolist()))
+        self.assertAlmostEqual(sum(rank.values()), 1.0, places=5)
+        self.assertEqual(max(rank, key=rank.get), "alex")
+        self.assertEqual(min(rank, key=rank.get), "noa")
+
+    def test_written_metrics_are_memory_mapped(self):
+        directory = self.path("analytics")
+        write_metrics(directory, *compute_metrics(self.db.get_all_users()))
+
+        loaded = GraphMetrics.load(directory)
+        self.assertIsInstance(loaded.metrics, np.memmap)
+        self.assertEqual(len(loaded), 5)
+        self.assertEqual(loaded.get("ines", "mutual"), 1)
+        self.assertIsNone(loaded.get("nobody", "mutual"))
+        self.assertGreater(loaded.influence("alex"), 1.0)
+        self.assertEqual(loaded.influence("nobody"), 0.0)
+
+        self.assertIsNone(GraphMetrics.load(self.path("missing")))
+
+    def test_empty_graph(self):
+        usernames, metrics = compute_metrics([])
+        self.assertEqual(usernames, [])
+        self.assertEqual(len(metrics), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+# Index inversé des hashtags : tag -> posts qui le contiennent, triés par date
+
+import bisect
+import heapq
+from itertools import groupby, islice
+from backend.post_index import PostIndex
+from backend.posting import Post
+
+
+def post_hashtags(post):
+    """Hashtags d'un post en minuscules (extraits du contenu s'ils ne sont pas stockés)."""
+    tags = post.get("hashtags")
+    if not tags:
+        tags = Post.extract_hashtags(post.get("content") or "")
+    return {t.lower() for t in tags}
+
+
+def _newest_first(postings, before=None):
+    """Parcourt une liste triée à l'envers, en partant des entrées < before."""
+    end = len(postings) if before is None else bisect.bisect_left(postings, before)
+    return (postings[i] for i in range(end - 1, -1, -1))
+
+
+def _contains(postings, entry):
+    i = bisect.bisect_left(postings, entry)
+    return i < len(postings) and postings[i] == entry
+
+
+class HashtagIndex(PostIndex):
+    """
+    Pour chaque hashtag, la liste triée des (date, id) des posts qui le
+    contiennent. Mise à jour à la création, à la modification et à la
+    suppression d'un post : une page de hashtag ne coûte plus que le nombre
+    de posts trouvés, quel que soit le nombre total de posts.
+
+    Pour l'autocomplétion, les tags sont aussi gardés dans une liste triée
+    (recherche par préfixe avec bisect) et les `TOP_K` tags les plus utilisés
+    de chaque préfixe demandé sont mémorisés, puis mis à jour à chaque
+    changement de compteur.
+    """
+
+    TOP_K = 10
+
+    def _clear(self):
+        self._postings = {}
+        self._tags = []     # tags triés (le nombre de posts est len(self._postings[tag]))
+        self._top = {}      # préfixe -> TOP_K tags les plus utilisés
+
+    def _build(self, posts):
+        self._clear()
+        for post in posts:
+            entry = (post["date"], post["id"])
+            for tag in post_hashtags(post):
+                self._postings.setdefault(tag, []).append(entry)
+        for postings in self._postings.values():
+            postings.sort()
+        self._tags = sorted(self._postings)
+
+    def _add(self, post):
+        entry = (post["date"], post["id"])
+        for tag in post_hashtags(post):
+            postings = self._postings.get(tag)
+            if postings is None:
+                postings = self._postings[tag] = []
+                bisect.insort(self._tags, tag)
+            bisect.insort(postings, entry)
+            self._count_changed(tag, increased=True)
+
+    def _remove(self, post):
+        entry = (post["date"], post["id"])
+        for tag in post_hashtags(post):
+            postings = self._postings.get(tag)
+            if not postings:
+                continue
+            i = bisect.bisect_left(postings, entry)
+            if i < len(postings) and postings[i] == entry:
+                del postings[i]
+            if not postings:
+                del self._postings[tag]
+                del self._tags[bisect.bisect_left(self._tags, tag)]
+            self._count_changed(tag, increased=False)
+
+    def _rank(self, tag):
+        return (-len(self._postings[tag]), tag)
+
+    def _count_changed(self, tag, increased):
+        # Seuls les classements des préfixes du tag peuvent changer
+        for i in range(len(tag) + 1):
+            prefix = tag[:i]
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            if tag in top:
+                if not increased and len(top) == self.TOP_K:
+                    # Un tag hors du classement peut maintenant passer devant : on recalculera
+                    del self._top[prefix]
+                    continue
+                if tag not in self._postings:
+                    top.remove(tag)
+                top.sort(key=self._rank)
+            elif increased and (len(top) < self.TOP_K or self._rank(tag) < self._rank(top[-1])):
+                top.append(tag)
+                top.sort(key=self._rank)
+                del top[self.TOP_K:]
+
+    # --- Requêtes ---
+    def post_ids(self, tags, match="any", limit=None, before=None):
+        """
+        Ids des posts, du plus récent au plus ancien, qui ont au moins un des
+        tags (match="any") ou tous les tags (match="all") : au plus `limit`,
+        et seulement ceux placés après le curseur `before` = (date, id).
+        """
+        tags = {t.lower().lstrip("#") for t in tags if t}
+        entries = self._read(lambda: self._query(tags, match, limit, before))
+        return [post_id for _, post_id in entries]
+
+    def iter_post_ids(self, tags, match="any", before=None, batch=100):
+        """Comme post_ids, mais paresseux : l'index est lu par lots de `batch` ids."""
+        tags = {t.lower().lstrip("#") for t in tags if t}
+        while True:
+            entries = self._read(lambda: self._query(tags, match, batch, before))
+            for _, post_id in entries:
+                yield post_id
+            if len(entries) < batch:
+                return
+            before = entries[-1]
+
+    def _query(self, tags, match, limit=None, before=None):
+        lists = [self._postings.get(tag, []) for tag in tags]
+        if not lists:
+            return []
+        if before is not None:
+            before = tuple(before)
+
+        if match == "all":
+            # On parcourt la plus courte liste et on cherche chaque entrée dans les autres
+            lists.sort(key=len)
+            shortest, others = lists[0], lists[1:]
+            entries = (e for e in _newest_first(shortest, before) if all(_contains(l, e) for l in others))
+        else:
+            # Fusion des listes (déjà triées) en supprimant les doublons
+            merged = heapq.merge(*(_newest_first(l, before) for l in lists), reverse=True)
+            entries = (e for e, _ in groupby(merged))
+        return list(islice(entries, limit))
+
+    def estimate(self, tags, match="any"):
+        """Nombre maximal de posts que renverrait post_ids(tags, match), sans faire la requête."""
+        tags = {t.lower().lstrip("#") for t in tags if t}
+        def reader():
+            counts = [len(self._postings.get(tag, ())) for tag in tags]
+            if not counts:
+                return 0
+            return min(counts) if match == "all" else sum(counts)
+        return self._read(reader)
+
+    def count(self, tag):
+        tag = tag.lower().lstrip("#")
+        return self._read(lambda: len(self._postings.get(tag, ())))
+
+    def tags(self):
+        """Tous les hashtags utilisés, triés."""
+        return self._read(lambda: list(self._tags))
+
+    def suggest(self, prefix, limit=TOP_K):
+        """Tags qui commencent par `prefix`, les plus utilisés d'abord (puis par ordre alphabétique)."""
+        prefix = prefix.lower().lstrip("#")
+        return self._read(lambda: self._top_for(prefix)[:limit])
+
+    def _top_for(self, prefix):
+        top = self._top.get(prefix)
+        if top is None:
+            lo = bisect.bisect_left(self._tags, prefix)
+            hi = bisect.bisect_left(self._tags, prefix + "\U0010ffff")
+            top = heapq.nsmallest(self.TOP_K, self._tags[lo:hi], key=self._rank)
+            if top:
+                self._top[prefix] = top
+        return top
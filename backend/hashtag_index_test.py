@@ -0,0 +1,79 @@
+import unittest
+from backend.hashtag_index import HashtagIndex
+from conftest import PostStoreTestCase, make_post
+
+
+class TestHashtagIndex(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = HashtagIndex(self.store)
+
+    def test_or_and_queries_sorted_by_date(self):
+        old = self.store.create(make_post("ines", "#insa #toulouse", ["insa", "toulouse"], "2025-01-01 10:00:00"))
+        new = self.store.create(make_post("alex", "#INSA", ["INSA"], "2025-03-01 10:00:00"))
+        mid = self.store.create(make_post("maria", "#toulouse", ["toulouse"], "2025-02-01 10:00:00"))
+
+        self.assertEqual(self.index.post_ids(["insa"]), [new["id"], old["id"]])
+        self.assertEqual(self.index.post_ids(["#insa", "toulouse"]), [new["id"], mid["id"], old["id"]])
+        self.assertEqual(self.index.post_ids(["insa", "toulouse"], match="all"), [old["id"]])
+        self.assertEqual(self.index.post_ids(["insa", "nope"], match="all"), [])
+        self.assertEqual(self.index.post_ids([]), [])
+
+    def test_pages_after_a_cursor(self):
+        dates = ["2025-01-01 10:00:00", "2025-01-03 10:00:00", "2025-01-02 10:00:00", "2025-01-02 10:00:00"]
+        ids = [self.store.create(make_post("ines", "#insa", ["insa"], d))["id"] for d in dates]
+        newest_first = [ids[1], ids[3], ids[2], ids[0]]
+
+        self.assertEqual(self.index.post_ids(["insa"], limit=2), newest_first[:2])
+        self.assertEqual(self.index.post_ids(["insa"], before=(dates[3], ids[3])), newest_first[2:])
+        self.assertEqual(self.index.post_ids(["insa", "nope"], match="all", before=(dates[1], ids[1])), [])
+        self.assertEqual(list(self.index.iter_post_ids(["insa"], batch=1)), newest_first)
+
+    def test_edit_and_delete(self):
+        post = self.store.create(make_post("ines", "#insa", ["insa"], "2025-01-01 10:00:00"))
+        self.store.like(post["id"], "alex")
+        self.assertEqual(self.index.count("insa"), 1)
+
+        self.store.edit(post["id"], "#maths", "2025-01-02 10:00:00", ["maths"])
+        self.assertEqual(self.index.post_ids(["insa"]), [])
+        self.assertEqual(self.index.post_ids(["maths"]), [post["id"]])
+
+        self.store.delete(post["id"])
+        self.assertEqual(self.index.post_ids(["maths"]), [])
+        self.assertEqual(self.index.reloads, 1)
+
+    def test_posts_without_stored_hashtags(self):
+        post = self.store.create(make_post("ines", "Bonjour #Insa", [], "2025-01-01 10:00:00"))
+        self.assertEqual(self.index.post_ids(["insa"]), [post["id"]])
+
+    def test_suggestions_follow_counts(self):
+        self.store.create(make_post("ines", "#insa", ["insa"], "2025-01-01 10:00:00"))
+        self.store.create(make_post("ines", "#info", ["info"], "2025-01-01 10:00:00"))
+        self.assertEqual(self.index.suggest("in"), ["info", "insa"])
+        self.assertEqual(self.index.suggest("#IN", limit=1), ["info"])
+
+        second = self.store.create(make_post("alex", "#insa", ["insa"], "2025-01-02 10:00:00"))
+        self.assertEqual(self.index.suggest("in"), ["insa", "info"])
+        self.store.delete(second["id"])
+        self.assertEqual(self.index.suggest("in"), ["info", "insa"])
+        self.assertEqual(self.index.suggest("x"), [])
+        self.assertEqual(self.index.tags(), ["info", "insa"])
+
+    def test_top_k_recomputed_when_a_tag_drops(self):
+        self.index.TOP_K = 2
+        posts = {}
+        for tag, n in (("aa", 3), ("ab", 2), ("ac", 1)):
+            for _ in range(n):
+                posts.setdefault(tag, []).append(
+                    self.store.create(make_post("ines", "#" + tag, [tag], "2025-01-01 10:00:00")))
+        self.assertEqual(self.index.suggest("a"), ["aa", "ab"])
+
+        for post in posts["aa"]:
+            self.store.delete(post["id"])
+        self.assertEqual(self.index.suggest("a"), ["ab", "ac"])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,7 +11,7 @@ class LikeNotification(Notification):
         self.notification_message = f"{self.sender.username} liked your post: {self.post.post_id}."
 
     def send(self):
-        self.receiver.notifications.append(self.notification_message)
+        self.receiver.notify(self.notification_message)
 
 class CommentNotification(Notification):
     def __init__(self, sender, receiver, post, comment):
@@ -22,7 +22,7 @@ class CommentNotification(Notification):
         self.notification_message = f"{self.sender.username} commented on your post: {self.post.post_id}. Comment: {self.comment}"
 
     def send(self):
-        self.receiver.notifications.append(self.notification_message)
+        self.receiver.notify(self.notification_message)
 
 class FollowRequestNotification(Notification):
     def __init__(self, sender, receiver):
@@ -31,7 +31,7 @@ class FollowRequestNotification(Notification):
         self.notification_message = f"{self.sender.username} has sent you a follow request."
 
     def send_request(self):
-        self.receiver.notifications.append(self.notification_message)
+        self.receiver.notify(self.notification_message)
         self.receiver.pending_requests.append(self.sender)
 
     def answer_request(self, accepted):
@@ -43,10 +43,10 @@ class FollowRequestNotification(Notification):
             self.receiver.pending_requests.remove(self.sender)
             self.receiver.notifications.remove(self)
             #add notifications
-            self.sender.notifications.append(f"You are now following {self.receiver.username}.")
-            self.receiver.notifications.append(f"{self.sender.username} is now following you.")
+            self.sender.notify(f"You are now following {self.receiver.username}.")
+            self.receiver.notify(f"{self.sender.username} is now following you.")
         else:
-            self.sender.notifications.append(f"{self.receiver.username} declined your follow request.")
+            self.sender.notify(f"{self.receiver.username} declined your follow request.")
 
 class NewFollowerNotification(Notification):
     def __init__(self, sender, receiver):
@@ -55,9 +55,8 @@ class NewFollowerNotification(Notification):
         self.notification_message = f"{self.sender.username} is now following you."
 
     def send(self):
+        # Les listes followers/following sont déjà mises à jour par User.follow
         if self.receiver.is_public :
-            self.sender.followers.append(self.receiver)
-            self.receiver.following.append(self.sender)
-            self.receiver.notifications.append(self.notification_message)
+            self.receiver.notify(self.notification_message)
 
 
@@ -0,0 +1,178 @@
+# Notifications des utilisateurs : une file bornée par utilisateur, hors des fiches User
+
+import datetime
+import json
+import os
+import threading
+from collections import deque
+from backend.storage import read_jsonl, atomic_write_json, GroupCommitWriter
+from backend.time_index import DATE_FORMAT
+
+
+class NotificationStore:
+    """
+    Notifications de chaque utilisateur, gardées à part des fiches User
+    (qui restent petites, et dont la sauvegarde ne réécrit plus l'historique).
+
+    - Chaque utilisateur a une file circulaire (deque) d'au plus `capacity`
+      notifications : les plus anciennes sont oubliées.
+    - Un compteur de non-lues par utilisateur : les `unread` notifications
+      les plus récentes ; mark_read() le remet à zéro.
+    - Chaque notification a un id croissant (numéro d'événement) qui sert de
+      curseur de pagination : page(before=id).
+    - Stockage comme PostLog : un snapshot JSON et un journal JSONL (une
+      ligne par événement), compacté tous les `compact_every` événements.
+      Le snapshot garde le numéro du dernier événement inclus, le rejeu
+      ignore ce qui y est déjà.
+    """
+
+    CAPACITY = 100
+    COMPACT_EVERY = 500
+
+    def __init__(self, snapshot_file="notifications.json", log_file=None,
+                 capacity=CAPACITY, compact_every=COMPACT_EVERY):
+        self.snapshot_file = snapshot_file
+        if log_file is None:
+            log_file = os.path.splitext(snapshot_file)[0] + ".log.jsonl"
+        self.log_file = log_file
+        self.capacity = capacity
+        self.compact_every = compact_every
+        self.writer = GroupCommitWriter(self.log_file)
+        self._lock = threading.RLock()
+        self.load()
+
+    # --- Chargement ---
+    def load(self):
+        with self._lock:
+            self._inboxes = {}   # username -> deque de (id, message, date), du plus ancien au plus récent
+            self._unread = {}    # username -> nombre de non-lues
+            snapshot = self._read_snapshot()
+            self.seq = snapshot.get("seq", 0)
+            for username, inbox in snapshot.get("users", {}).items():
+                self._inboxes[username] = deque((tuple(item) for item in inbox["items"]), maxlen=self.capacity)
+                self._unread[username] = min(inbox.get("unread", 0), len(self._inboxes[username]))
+
+            self.pending_events = 0
+            for event in read_jsonl(self.log_file):
+                if event.get("seq", 0) > self.seq:
+                    self._apply(event)
+                    self.seq = event["seq"]
+                self.pending_events += 1
+
+    def _read_snapshot(self):
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                try:
+                    return json.load(f)
+                except json.JSONDecodeError:
+                    return {}
+        return {}
+
+    # --- Lecture ---
+    def __contains__(self, username):
+        return username in self._inboxes
+
+    def unread_count(self, username):
+        with self._lock:
+            return self._unread.get(username, 0)
+
+    def page(self, username, before=None, limit=20):
+        """
+        Notifications de `username`, de la plus récente à la plus ancienne,
+        d'id < before : (au plus `limit` dicts, curseur de la page suivante
+        ou None). Chaque dict a "id", "message", "date" et "unread".
+        """
+        with self._lock:
+            inbox = self._inboxes.get(username, ())
+            unread = self._unread.get(username, 0)
+            items = []
+            for position, (notif_id, message, date) in enumerate(reversed(inbox)):
+                if before is not None and notif_id >= before:
+                    continue
+                if len(items) == limit:
+                    return items, items[-1]["id"]
+                items.append({"id": notif_id, "message": message, "date": date, "unread": position < unread})
+        return items, None
+
+    # --- Écriture ---
+    def add(self, username, message):
+        """Ajoute une notification ; renvoie son id."""
+        date = datetime.datetime.now().strftime(DATE_FORMAT)
+        return self._record([{"op": "added", "user": username, "message": message, "date": date}])[0]
+
+    def mark_read(self, username):
+        if self.unread_count(username):
+            self._record([{"op": "read", "user": username}])
+
+    def clear(self, username):
+        """Oublie les notifications d'un compte supprimé."""
+        if username in self:
+            self._record([{"op": "cleared", "user": username}])
+
+    def import_messages(self, username, messages):
+        """
+        Reprend les notifications d'une fiche User (ancien format : liste de
+        messages, du plus ancien au plus récent), considérées comme lues.
+        Sans effet si l'utilisateur a déjà des notifications ici.
+        """
+        if username in self or not messages:
+            return
+        events = [{"op": "added", "user": username, "message": m, "date": None}
+                  for m in list(messages)[-self.capacity:]]
+        self._record(events + [{"op": "read", "user": username}])
+
+    def _record(self, events):
+        with self._lock:
+            for event in events:
+                self.seq += 1
+                event["seq"] = self.seq
+                self._apply(event)
+            # Comme PostLog : l'ordre est fixé sous le verrou, l'attente du disque se fait en dehors
+            ticket = self.writer.submit(events)
+            self.pending_events += len(events)
+            if self.pending_events >= self.compact_every:
+                self.compact()
+        self.writer.wait(ticket)
+        return [event["seq"] for event in events]
+
+    def _apply(self, event):
+        op, username = event["op"], event["user"]
+        if op == "added":
+            inbox = self._inboxes.setdefault(username, deque(maxlen=self.capacity))
+            inbox.append((event["seq"], event["message"], event.get("date")))
+            self._unread[username] = min(self._unread.get(username, 0) + 1, len(inbox))
+        elif op == "read":
+            if username in self._unread:
+                self._unread[username] = 0
+        elif op == "cleared":
+            self._inboxes.pop(username, None)
+            self._unread.pop(username, None)
+
+    # --- Compaction ---
+    def compact(self):
+        """Réécrit le snapshot (au plus `capacity` notifications par utilisateur) et vide le journal."""
+        with self._lock:
+            self.writer.flush()
+            users = {
+                username: {"unread": self._unread.get(username, 0), "items": [list(item) for item in inbox]}
+                for username, inbox in self._inboxes.items()
+            }
+            atomic_write_json(self.snapshot_file, {"seq": self.seq, "users": users}, indent=None)
+            self.writer.truncate()
+            self.pending_events = 0
+
+
+def import_from_users(store, users):
+    """
+    Déplace dans `store` les notifications encore gardées dans les fiches
+    User (ancien format) et vide ces listes. Renvoie les utilisateurs
+    modifiés, à sauvegarder.
+    """
+    moved = []
+    for user in users:
+        messages = getattr(user, "notifications", None)
+        if messages:
+            store.import_messages(user.username, messages)
+            user.notifications = []
+            moved.append(user)
+    return moved
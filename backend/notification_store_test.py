@@ -0,0 +1,89 @@
+import os
+import unittest
+from backend.notification_store import NotificationStore, import_from_users
+from backend.user import User
+from conftest import TempDirTestCase
+
+
+class TestNotificationStore(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.snapshot = self.path("notifications.json")
+
+    def messages(self, items):
+        return [n["message"] for n in items]
+
+    def test_ring_buffer_keeps_latest(self):
+        store = NotificationStore(self.snapshot, capacity=3)
+        for i in range(5):
+            store.add("ines", f"n{i}")
+        items, cursor = store.page("ines")
+        self.assertEqual(self.messages(items), ["n4", "n3", "n2"])
+        self.assertIsNone(cursor)
+        self.assertEqual(store.unread_count("ines"), 3)
+        self.assertEqual(store.page("alex"), ([], None))
+
+    def test_cursor_pagination(self):
+        store = NotificationStore(self.snapshot)
+        ids = [store.add("ines", f"n{i}") for i in range(5)]
+        store.add("alex", "other")
+
+        first, cursor = store.page("ines", limit=2)
+        self.assertEqual(self.messages(first), ["n4", "n3"])
+        self.assertEqual(cursor, ids[3])
+        second, cursor = store.page("ines", before=cursor, limit=2)
+        self.assertEqual(self.messages(second), ["n2", "n1"])
+        last, cursor = store.page("ines", before=cursor, limit=2)
+        self.assertEqual(self.messages(last), ["n0"])
+        self.assertIsNone(cursor)
+
+    def test_unread_counter(self):
+        store = NotificationStore(self.snapshot)
+        store.add("ines", "a")
+        store.add("ines", "b")
+        store.mark_read("ines")
+        store.add("ines", "c")
+        items, _ = store.page("ines")
+        self.assertEqual(store.unread_count("ines"), 1)
+        self.assertEqual([n["unread"] for n in items], [True, False, False])
+
+    def test_replay_and_compaction(self):
+        store = NotificationStore(self.snapshot, capacity=4, compact_every=5)
+        for i in range(7):
+            store.add("ines", f"n{i}")
+        store.mark_read("ines")
+        store.add("alex", "hello")
+        store.clear("maria")  # inconnu : rien à écrire
+        self.assertTrue(os.path.exists(self.snapshot))
+
+        reloaded = NotificationStore(self.snapshot, capacity=4)
+        self.assertEqual(self.messages(reloaded.page("ines")[0]), ["n6", "n5", "n4", "n3"])
+        self.assertEqual(reloaded.unread_count("ines"), 0)
+        self.assertEqual(reloaded.unread_count("alex"), 1)
+        self.assertGreater(reloaded.add("ines", "n7"), store.seq)
+
+        reloaded.clear("alex")
+        self.assertNotIn("alex", NotificationStore(self.snapshot))
+
+    def test_user_notify_and_legacy_import(self):
+        store = NotificationStore(self.snapshot)
+        alex = User("alex", "alex@mail.com", "Pass123!", "Alex", 20, "France")
+        alex.notifications = ["old 1", "old 2"]
+        self.assertEqual(import_from_users(store, [alex]), [alex])
+        self.assertEqual(alex.notifications, [])
+        self.assertEqual(store.unread_count("alex"), 0)
+
+        User.notification_store = store
+        try:
+            alex.mark_clean()
+            alex.notify("ines liked your post")
+            self.assertFalse(alex.is_dirty())
+        finally:
+            User.notification_store = None
+        self.assertEqual(self.messages(store.page("alex")[0]), ["ines liked your post", "old 2", "old 1"])
+        self.assertEqual(store.unread_count("alex"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# Pagination des fils par curseur (pages HTML et API JSON)
+
+import base64
+import json
+from itertools import islice
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(post):
+    """Curseur opaque de la position juste après `post` : (date, id) en base64."""
+    raw = json.dumps([post.get("date") or "", post["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(date, id) d'un curseur, ou None s'il est absent ou invalide (première page)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, post_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(date, str) or type(post_id) is not int:
+        return None
+    return date, post_id
+
+
+def page_size(value, default=PAGE_SIZE):
+    """Taille de page demandée, ramenée entre 1 et MAX_PAGE_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(posts, size):
+    """
+    Prend au plus `size` posts d'un itérable (lu au fur et à mesure) :
+    renvoie (page, curseur de la page suivante ou None s'il n'y en a pas).
+    """
+    page = list(islice(posts, size + 1))
+    if len(page) <= size:
+        return page, None
+    del page[size:]
+    return page, encode_cursor(page[-1])
@@ -0,0 +1,41 @@
+import unittest
+from backend.pagination import MAX_PAGE_SIZE, PAGE_SIZE, decode_cursor, encode_cursor, page_size, paginate
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor({"id": 42, "date": "2025-12-01 10:00:00"})
+        self.assertNotIn("42", cursor)
+        self.assertEqual(decode_cursor(cursor), ("2025-12-01 10:00:00", 42))
+
+    def test_invalid_cursors_restart_from_the_first_page(self):
+        for cursor in (None, "", "garbage", "!!!", encode_cursor({"id": "x", "date": "d"})):
+            self.assertIsNone(decode_cursor(cursor))
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(page_size(None), PAGE_SIZE)
+        self.assertEqual(page_size("abc"), PAGE_SIZE)
+        self.assertEqual(page_size("5"), 5)
+        self.assertEqual(page_size("0"), 1)
+        self.assertEqual(page_size("100000"), MAX_PAGE_SIZE)
+
+    def test_paginate_stops_once_the_page_is_filled(self):
+        read = []
+        def posts():
+            for i in range(10, 0, -1):
+                read.append(i)
+                yield {"id": i, "date": "2025-12-01 10:00:00"}
+
+        page, cursor = paginate(posts(), 3)
+        self.assertEqual([p["id"] for p in page], [10, 9, 8])
+        self.assertEqual(decode_cursor(cursor), ("2025-12-01 10:00:00", 8))
+        self.assertEqual(read, [10, 9, 8, 7])
+
+        page, cursor = paginate(iter(page), 3)
+        self.assertEqual(len(page), 3)
+        self.assertIsNone(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# Cache des posts partagé par toutes les requêtes du processus
+
+import bisect
+from itertools import islice
+from types import MappingProxyType
+from backend.post_index import PostIndex
+from backend.time_index import to_timestamp
+from backend.posting import Post
+from backend.user_ids import user_ids
+
+
+def _negated_id(post):
+    return -post["id"]
+
+
+def freeze(value):
+    """Copie en lecture seule d'un post (dict -> mappingproxy, listes -> tuples)."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def _cached(post, previous=None):
+    """
+    Post figé, avec les champs calculés une fois pour toutes : "ts" (date en
+    secondes epoch, None si invalide) et "html_content" (contenu HTML, repris
+    de `previous` si le texte et les hashtags n'ont pas changé, par exemple
+    après un like). "flags" est gardé tel que le stockage l'a calculé.
+    Les likes sont gardés sous forme d'ids (user_ids).
+    """
+    if (previous is not None and previous.get("content") == post.get("content")
+            and previous.get("hashtags") == freeze(post.get("hashtags"))):
+        html_content = previous["html_content"]
+    else:
+        html_content = Post.render_html(post.get("content"), post.get("hashtags"))
+    return freeze({
+        **post,
+        "ts": to_timestamp(post.get("date")),
+        "html_content": html_content,
+        "likes": [user_ids.intern(u) for u in post.get("likes") or ()],
+    })
+
+
+class PostCache(PostIndex):
+    """
+    Vue en mémoire des posts, tenue à jour par les notifications du stockage :
+    les pages en lecture ne relisent plus rien.
+
+    - snapshot() renvoie un tuple de posts immuables, du plus récent au plus
+      ancien ; le même tuple est partagé tant qu'aucun post ne change.
+    - Les fichiers (mtime/taille) ou la base (PRAGMA data_version) ne sont
+      vérifiés qu'une fois toutes les `check_interval` secondes, pour voir les
+      modifications faites par un autre processus.
+    - Chaque post a en plus les champs "ts" (sa date en secondes epoch) et
+      "html_content" (rendu une fois, recalculé seulement quand le post est
+      modifié) ; "flags" vient du stockage (voir content_flags).
+    - Les likes sont des ids entiers (user_ids.usernames pour les afficher).
+    """
+
+    def _clear(self):
+        self._by_id = {}        # id -> post figé
+        self._ids = []          # ids triés par ordre croissant
+        self._snapshot = None   # tuple reconstruit à la demande
+
+    def _build(self, posts):
+        self._clear()
+        self._by_id = {p["id"]: _cached(p) for p in posts}
+        self._ids = sorted(self._by_id)
+
+    def _add(self, post):
+        if post["id"] not in self._by_id:
+            bisect.insort(self._ids, post["id"])
+        self._by_id[post["id"]] = _cached(post, self._by_id.get(post["id"]))
+        self._snapshot = None
+
+    def _remove(self, post):
+        if self._by_id.pop(post["id"], None) is not None:
+            del self._ids[bisect.bisect_left(self._ids, post["id"])]
+        self._snapshot = None
+
+    _touch = _add
+
+    def _build_snapshot(self):
+        if self._snapshot is None:
+            self._snapshot = tuple(self._by_id[i] for i in reversed(self._ids))
+        return self._snapshot
+
+    def snapshot(self):
+        return self._read(self._build_snapshot)
+
+    def count(self):
+        return self._read(lambda: len(self._by_id))
+
+    def get(self, post_id):
+        return self._read(lambda: self._by_id.get(post_id))
+
+    def posts_by(self, username):
+        return [p for p in self.snapshot() if p["poster_username"] == username]
+
+    def get_many(self, post_ids):
+        """Posts correspondant aux ids, dans le même ordre (les ids inconnus sont ignorés)."""
+        def reader():
+            found = (self._by_id.get(i) for i in post_ids)
+            return [p for p in found if p is not None]
+        return self._read(reader)
+
+    def iter_posts(self, before=None):
+        """Posts du plus récent au plus ancien, à partir des ids < before (sans copie du snapshot)."""
+        posts = self.snapshot()
+        start = 0 if before is None else bisect.bisect_right(posts, -before, key=_negated_id)
+        return islice(posts, start, None)
+
+    def iter_many(self, post_ids, batch=100):
+        """Comme get_many, mais paresseux : les ids (itérable) sont lus par lots de `batch`."""
+        post_ids = iter(post_ids)
+        while True:
+            ids = list(islice(post_ids, batch))
+            if not ids:
+                return
+            yield from self.get_many(ids)
@@ -0,0 +1,104 @@
+import unittest
+from backend.post_log import PostLog
+from backend.posts_sqlite import SQLitePostStore
+from backend.post_cache import PostCache
+from backend.posting import Post
+from backend.user_ids import user_ids
+from conftest import TempDirTestCase, make_post
+
+
+class TestPostCache(TempDirTestCase):
+
+    def test_snapshot_is_shared_and_immutable(self):
+        store = PostLog(self.snapshot)
+        first = store.create(make_post("ines", "hello"))
+        cache = PostCache(store)
+
+        snapshot = cache.snapshot()
+        self.assertIs(cache.snapshot(), snapshot)
+        self.assertEqual(cache.reloads, 1)
+        with self.assertRaises(TypeError):
+            snapshot[0]["content"] = "changed"
+        self.assertEqual(snapshot[0]["likes"], ())
+
+        store.like(first["id"], "alex")
+        self.assertEqual(user_ids.usernames(cache.get(first["id"])["likes"]), ["alex"])
+        self.assertEqual(snapshot[0]["likes"], ())  # l'ancien snapshot ne bouge pas
+        self.assertEqual(cache.reloads, 1)
+
+    def test_lazy_iteration(self):
+        store = PostLog(self.snapshot)
+        ids = [store.create(make_post("ines", f"post {i}"))["id"] for i in range(4)]
+        cache = PostCache(store)
+
+        self.assertEqual([p["id"] for p in cache.iter_posts()], ids[::-1])
+        self.assertEqual([p["id"] for p in cache.iter_posts(before=ids[2])], [ids[1], ids[0]])
+        self.assertEqual([p["id"] for p in cache.iter_many(iter([ids[3], 999, ids[0]]), batch=2)], [ids[3], ids[0]])
+
+    def test_html_rendered_once_per_version(self):
+        self.assertEqual(
+            Post.render_html("Go #Insa & #insa2025 <b>#nope</b>", ["insa"]),
+            'Go <a href="/hashtag/insa" class="hashtag">#Insa</a> &amp; #insa2025 &lt;b&gt;#nope&lt;/b&gt;',
+        )
+
+        store = PostLog(self.snapshot)
+        post = make_post("ines", "Bonjour #insa")
+        post["hashtags"] = ["insa"]
+        post_id = store.create(post)["id"]
+        cache = PostCache(store)
+        html = cache.get(post_id)["html_content"]
+        self.assertEqual(html, 'Bonjour <a href="/hashtag/insa" class="hashtag">#insa</a>')
+
+        store.like(post_id, "alex")
+        self.assertIs(cache.get(post_id)["html_content"], html)
+
+        store.edit(post_id, "Salut #maths", "2025-12-02 10:00:00", ["maths"])
+        self.assertEqual(cache.get(post_id)["html_content"], 'Salut <a href="/hashtag/maths" class="hashtag">#maths</a>')
+
+    def test_follows_store_changes(self):
+        store = PostLog(self.snapshot)
+        cache = PostCache(store)
+        first = store.create(make_post("ines", "hello"))
+        second = store.create(make_post("alex", "world"))
+        self.assertEqual([p["id"] for p in cache.snapshot()], [second["id"], first["id"]])
+
+        store.edit(first["id"], "hello #insa", "2025-12-02 09:00:00", ["insa"])
+        store.delete(second["id"])
+        self.assertEqual([p["content"] for p in cache.snapshot()], ["hello #insa"])
+        self.assertEqual(len(cache.posts_by("ines")), 1)
+        self.assertIsNone(cache.get(second["id"]))
+        self.assertEqual(cache.reloads, 1)
+
+    def test_reloads_after_external_write(self):
+        store = PostLog(self.snapshot)
+        store.create(make_post("ines", "hello"))
+        cache = PostCache(store, check_interval=0)
+        self.assertEqual(len(cache.snapshot()), 1)
+
+        # Un autre processus écrit dans le même journal
+        other = PostLog(self.snapshot)
+        other.create(make_post("alex", "from another worker"))
+        self.assertEqual(len(cache.snapshot()), 2)
+        self.assertEqual(cache.reloads, 2)
+
+        # Sans modification, pas de relecture
+        cache.snapshot()
+        self.assertEqual(cache.reloads, 2)
+
+    def test_sqlite_store(self):
+        db_file = self.path("posts.sqlite3")
+        store = SQLitePostStore(db_file)
+        cache = PostCache(store, check_interval=0)
+        post = store.create(make_post("ines", "hello"))
+        store.comment(post["id"], {"username": "alex", "comment": "hi", "date": None})
+        self.assertEqual(cache.get(post["id"])["comments"][0]["comment"], "hi")
+
+        other = SQLitePostStore(db_file)
+        other.create(make_post("alex", "from another worker"))
+        self.assertEqual(len(cache.snapshot()), 2)
+        other.conn.close()
+        store.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
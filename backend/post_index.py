@@ -0,0 +1,94 @@
+# Base des structures en mémoire tenues à jour par un stockage de posts
+
+import threading
+import time
+
+
+class PostIndex:
+    """
+    Index en mémoire construit à partir d'un stockage de posts (PostLog ou
+    SQLitePostStore) puis maintenu par ses notifications (subscribe).
+
+    Les sous-classes redéfinissent _clear, _add, _remove et, si besoin,
+    _edit (modification), _touch (likes / commentaires) et _build
+    (construction complète).
+    Les lectures passent par _read(), qui (re)construit l'index à la demande :
+    au premier appel, et après un rechargement du stockage ("reloaded").
+    """
+
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, store, check_interval=CHECK_INTERVAL):
+        self.store = store
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._changes = 0
+        self._last_check = time.monotonic()
+        self.version = 0        # incrémenté à chaque modification vue par l'index
+        self.reloads = 0
+        store.subscribe(self._on_change)
+
+    # --- À redéfinir ---
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, post):
+        raise NotImplementedError
+
+    def _remove(self, post):
+        raise NotImplementedError
+
+    def _edit(self, post, previous):
+        self._remove(previous)
+        self._add(post)
+
+    def _touch(self, post):
+        """Likes ou commentaires modifiés : rien à faire par défaut."""
+
+    def _build(self, posts):
+        self._clear()
+        for post in posts:
+            self._add(post)
+
+    # --- Notifications du stockage ---
+    def _on_change(self, op, post, previous):
+        with self._lock:
+            self._changes += 1
+            self.version += 1
+            if not self._loaded:
+                return
+            if op == "reloaded":
+                self._loaded = False
+            elif op == "post_created":
+                self._add(post)
+            elif op == "deleted":
+                self._remove(previous)
+            elif op == "edited" and previous is not None:
+                self._edit(post, previous)
+            elif post is not None:
+                self._touch(post)
+
+    # --- Lecture ---
+    def _check_store(self):
+        # Modifications faites par un autre processus (mtime/taille, PRAGMA data_version)
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.store.refresh()
+
+    def _read(self, reader):
+        self._check_store()
+        while True:
+            with self._lock:
+                if self._loaded:
+                    return reader()
+                changes = self._changes
+            # Lecture du stockage hors de notre verrou (il prend le sien pour nous notifier)
+            posts = self.store.all()
+            with self._lock:
+                # Si un post a changé pendant la lecture, on recommence
+                if not self._loaded and self._changes == changes:
+                    self._build(posts)
+                    self._loaded = True
+                    self.reloads += 1
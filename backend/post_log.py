@@ -0,0 +1,238 @@
+# Journal append-only des posts (remplace les réécritures complètes de posts.json)
+
+import json
+import os
+import threading
+from backend.storage import read_jsonl, atomic_write_json, file_signature, GroupCommitWriter
+from backend.content_flags import content_flags
+
+
+class PostLog:
+    """
+    Stockage des posts sous forme d'un snapshot (posts.json) et d'un journal
+    d'événements JSONL (un événement par ligne).
+
+    - Chaque action (création, like, commentaire, édition, suppression) ajoute
+      une seule ligne au journal au lieu de réécrire tout le fichier.
+    - La liste self.posts est la vue matérialisée (posts les plus récents en
+      premier), reconstruite au démarrage en rejouant le journal sur le snapshot.
+    - Tous les `compact_every` événements, la vue est réécrite dans le snapshot
+      et le journal est vidé.
+    - Chaque événement a un numéro `seq` et chaque post garde dans "version" le
+      numéro du dernier événement appliqué : si l'arrêt survient entre l'écriture
+      du snapshot et le vidage du journal, le rejeu ignore ce qui est déjà inclus.
+    - Chaque post garde dans "flags" ses types de contenu (voir content_flags),
+      calculés à la création et à l'édition : les index n'ont pas à les recalculer.
+    - Les abonnés (subscribe) sont prévenus de chaque modification, ce qui
+      permet de tenir des caches et des index à jour sans relire les fichiers.
+    """
+
+    COMPACT_EVERY = 500
+
+    def __init__(self, snapshot_file="posts.json", log_file=None, compact_every=COMPACT_EVERY):
+        self.snapshot_file = snapshot_file
+        if log_file is None:
+            log_file = os.path.splitext(snapshot_file)[0] + ".log.jsonl"
+        self.log_file = log_file
+        self.compact_every = compact_every
+        self.writer = GroupCommitWriter(self.log_file)
+        self._lock = threading.RLock()
+        self.posts = []
+        self._by_id = {}
+        self.next_id = 1
+        self.seq = 0
+        self.pending_events = 0
+        self.version = 0          # incrémenté à chaque modification de la vue
+        self._listeners = []
+        self._known_files = None  # (snapshot, journal) après notre dernière écriture
+        self.load()
+
+    # --- Chargement ---
+    def load(self):
+        with self._lock:
+            self.posts = self._read_snapshot()
+            self._by_id = {}
+
+            # Les anciens posts n'ont pas d'identifiant global ni de "flags" : on les
+            # ajoute (ids du plus ancien au plus récent) puis on réécrit le snapshot une fois.
+            self.next_id = max((p["id"] for p in self.posts if "id" in p), default=0) + 1
+            migrated = False
+            for p in reversed(self.posts):
+                if "id" not in p:
+                    p["id"] = self.next_id
+                    self.next_id += 1
+                    migrated = True
+                if "flags" not in p:
+                    p["flags"] = content_flags(p)
+                    migrated = True
+                self._by_id[p["id"]] = p
+            self.seq = max((p.get("version", 0) for p in self.posts), default=0)
+
+            self.pending_events = 0
+            for event in read_jsonl(self.log_file):
+                self._apply(event, replay=True)
+                self.seq = max(self.seq, event.get("seq", 0))
+                self.pending_events += 1
+
+            if migrated:
+                self.compact()
+            self._known_files = self._file_signatures()
+            self.version += 1
+            self._notify("reloaded", None, None)
+
+    def _read_snapshot(self):
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                try:
+                    return json.load(f)
+                except json.JSONDecodeError:
+                    return []
+        return []
+
+    # --- Abonnements et détection des modifications externes ---
+    def subscribe(self, listener):
+        """
+        listener(op, post, previous) est appelé après chaque modification, sous
+        le verrou du stockage : op est l'opération du journal ("post_created",
+        "liked", ..., "deleted") ou "reloaded" quand toute la vue a été relue.
+        post est le post après modification (None pour "deleted"), previous le
+        post avant modification pour "edited" et "deleted" (None sinon).
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, op, post, previous):
+        for listener in self._listeners:
+            listener(op, post, previous)
+
+    def _file_signatures(self):
+        return (file_signature(self.snapshot_file), file_signature(self.log_file))
+
+    def refresh(self):
+        """
+        Relit les fichiers si leur mtime/taille a changé depuis notre dernière
+        écriture (autre processus, modification à la main).
+        Renvoie True si la vue a été rechargée.
+        """
+        with self._lock:
+            # Des événements encore en attente d'écriture seraient perdus par un rechargement
+            if not self.writer.idle() or self._file_signatures() == self._known_files:
+                return False
+            self.load()
+            return True
+
+    # --- Lecture ---
+    def all(self):
+        """Copie superficielle de la vue : les routes peuvent ajouter des clés sans toucher au stockage."""
+        with self._lock:
+            return [dict(p) for p in self.posts]
+
+    def get(self, post_id):
+        return self._by_id.get(post_id)
+
+    def posts_by(self, username):
+        with self._lock:
+            return [dict(p) for p in self.posts if p["poster_username"] == username]
+
+    # --- Écriture ---
+    def create(self, post):
+        with self._lock:
+            post = dict(post)
+            post["id"] = self.next_id
+            post["flags"] = content_flags(post)
+            self._record({"op": "post_created", "post": post})
+            return post
+
+    def like(self, post_id, username):
+        self._record({"op": "liked", "id": post_id, "username": username})
+
+    def unlike(self, post_id, username):
+        self._record({"op": "unliked", "id": post_id, "username": username})
+
+    def comment(self, post_id, comment):
+        self._record({"op": "commented", "id": post_id, "comment": comment})
+
+    def delete_comment(self, post_id, comment_index):
+        self._record({"op": "comment_deleted", "id": post_id, "index": comment_index})
+
+    def edit(self, post_id, content, date, hashtags):
+        self._record({"op": "edited", "id": post_id, "content": content, "date": date, "hashtags": hashtags})
+
+    def delete(self, post_id):
+        self._record({"op": "deleted", "id": post_id})
+
+    def _record(self, event):
+        with self._lock:
+            if event["op"] != "post_created" and event["id"] not in self._by_id:
+                return
+            self.seq += 1
+            event["seq"] = self.seq
+            previous = None
+            if event["op"] in ("edited", "deleted"):
+                previous = dict(self._by_id[event["id"]])
+            self._apply(event)
+            self.version += 1
+            post = event["post"] if event["op"] == "post_created" else self._by_id.get(event["id"])
+            self._notify(event["op"], post, previous)
+            # L'ordre du journal est fixé sous le verrou ; l'attente du disque se fait
+            # en dehors pour que les requêtes simultanées partagent le même fsync.
+            ticket = self.writer.submit([event])
+            self.pending_events += 1
+            if self.pending_events >= self.compact_every:
+                self.compact()
+        self.writer.wait(ticket)
+        with self._lock:
+            if self.writer.idle():
+                self._known_files = self._file_signatures()
+
+    def _apply(self, event, replay=False):
+        op = event["op"]
+
+        if op == "post_created":
+            post = event["post"]
+            if replay and post["id"] in self._by_id:
+                return
+            if "flags" not in post:  # événement écrit avant l'ajout de "flags"
+                post["flags"] = content_flags(post)
+            post["version"] = event.get("seq", 0)
+            self.posts.insert(0, post)
+            self._by_id[post["id"]] = post
+            self.next_id = max(self.next_id, post["id"] + 1)
+            return
+
+        post = self._by_id.get(event["id"])
+        if post is None:
+            return
+        if replay and "seq" in event and post.get("version", 0) >= event["seq"]:
+            return
+        post["version"] = event.get("seq", 0)
+
+        if op == "liked":
+            if event["username"] not in post["likes"]:
+                post["likes"].append(event["username"])
+        elif op == "unliked":
+            if event["username"] in post["likes"]:
+                post["likes"].remove(event["username"])
+        elif op == "commented":
+            post.setdefault("comments", []).append(event["comment"])
+        elif op == "comment_deleted":
+            comments = post.get("comments", [])
+            if 0 <= event["index"] < len(comments):
+                comments.pop(event["index"])
+        elif op == "edited":
+            post["content"] = event["content"]
+            post["date"] = event["date"]
+            post["hashtags"] = event["hashtags"]
+            post["flags"] = content_flags(post)
+        elif op == "deleted":
+            self.posts.remove(post)
+            del self._by_id[post["id"]]
+
+    # --- Compaction ---
+    def compact(self):
+        """Réécrit le snapshot à partir de la vue et vide le journal."""
+        with self._lock:
+            self.writer.flush()
+            atomic_write_json(self.snapshot_file, self.posts)
+            self.writer.truncate()
+            self.pending_events = 0
+            self._known_files = self._file_signatures()
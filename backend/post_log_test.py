@@ -0,0 +1,70 @@
+import os
+import json
+import unittest
+from backend.post_log import PostLog
+from backend.content_flags import HAS_TEXT
+from conftest import TempDirTestCase, make_post
+
+
+class TestPostLog(TempDirTestCase):
+
+    def test_replay_after_restart(self):
+        log = PostLog(self.snapshot)
+        first = log.create(make_post("ines", "hello"))
+        second = log.create(make_post("alex", "world"))
+        log.like(first["id"], "alex")
+        log.comment(first["id"], {"username": "alex", "comment": "hi", "date": "2025-12-01 10:01:00"})
+        log.edit(second["id"], "world #insa", "2025-12-01 10:02:00", ["insa"])
+        log.delete_comment(first["id"], 0)
+        log.unlike(first["id"], "alex")
+        log.like(first["id"], "maria")
+
+        reloaded = PostLog(self.snapshot)
+        self.assertEqual(reloaded.all(), log.all())
+        self.assertEqual(reloaded.get(first["id"])["likes"], ["maria"])
+        self.assertEqual(reloaded.get(second["id"])["hashtags"], ["insa"])
+        self.assertEqual([p["id"] for p in reloaded.all()], [second["id"], first["id"]])
+
+    def test_like_appends_one_line(self):
+        log = PostLog(self.snapshot)
+        post = log.create(make_post("ines", "hello"))
+        size = os.path.getsize(log.log_file)
+        log.like(post["id"], "alex")
+        appended = os.path.getsize(log.log_file) - size
+        self.assertLess(appended, 100)
+        self.assertFalse(os.path.exists(self.snapshot))
+
+    def test_compaction(self):
+        log = PostLog(self.snapshot, compact_every=3)
+        post = log.create(make_post("ines", "hello"))
+        log.like(post["id"], "alex")
+        log.like(post["id"], "maria")
+        self.assertEqual(os.path.getsize(log.log_file), 0)
+        with open(self.snapshot, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)[0]["likes"], ["alex", "maria"])
+
+        log.delete(post["id"])
+        self.assertEqual(PostLog(self.snapshot).all(), [])
+
+    def test_legacy_snapshot_gets_ids(self):
+        with open(self.snapshot, "w", encoding="utf-8") as f:
+            json.dump([make_post("ines", "newest"), make_post("ines", "oldest")], f)
+        log = PostLog(self.snapshot)
+        self.assertEqual([p["id"] for p in log.all()], [2, 1])
+        self.assertEqual(log.create(make_post("ines", "new"))["id"], 3)
+        with open(self.snapshot, encoding="utf-8") as f:
+            self.assertEqual([p["flags"] for p in json.load(f)], [HAS_TEXT, HAS_TEXT])
+
+    def test_truncated_last_line_is_ignored(self):
+        log = PostLog(self.snapshot)
+        post = log.create(make_post("ines", "hello"))
+        with open(log.log_file, "a", encoding="utf-8") as f:
+            f.write('{"op": "liked", "id": ')
+        reloaded = PostLog(self.snapshot)
+        self.assertEqual(reloaded.get(post["id"])["likes"], [])
+        reloaded.like(post["id"], "alex")
+        self.assertEqual(PostLog(self.snapshot).get(post["id"])["likes"], ["alex"])
+
+
+if __name__ == "__main__":
+    unittest.main()
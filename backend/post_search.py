@@ -0,0 +1,90 @@
+# Recherche plein texte dans le contenu des posts (index inversé + classement BM25)
+
+import heapq
+import math
+import re
+from collections import Counter
+from backend.post_index import PostIndex
+from backend.text import fold
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Mots d'un texte, en minuscules et sans accents ("Été à l'INSA" -> ["ete", "a", "l", "insa"])."""
+    return _WORD.findall(fold(text or ""))
+
+
+class PostSearchIndex(PostIndex):
+    """
+    Index inversé du contenu des posts : mot -> {id du post: nombre d'occurrences}.
+    Mis à jour à la création, à la modification et à la suppression d'un post ;
+    une recherche n'examine que les posts qui contiennent un des mots, classés
+    avec BM25.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def _clear(self):
+        self._postings = {}
+        self._docs = {}          # id -> (auteur, nombre de mots, mots distincts)
+        self._total_length = 0
+
+    def _add(self, post):
+        counts = Counter(tokenize(post.get("content")))
+        length = sum(counts.values())
+        self._docs[post["id"]] = (post["poster_username"], length, tuple(counts))
+        self._total_length += length
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[post["id"]] = tf
+
+    def _remove(self, post):
+        doc = self._docs.pop(post["id"], None)
+        if doc is None:
+            return
+        _, length, terms = doc
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            del postings[post["id"]]
+            if not postings:
+                del self._postings[term]
+
+    # --- Requêtes ---
+    def search(self, query, limit=20, allowed=None):
+        """
+        Les `limit` posts les plus pertinents pour `query` : liste de (id, score).
+        allowed(auteur) permet d'écarter les posts que l'utilisateur ne peut pas voir.
+        """
+        terms = set(tokenize(query))
+        return self._read(lambda: self._search(terms, limit, allowed))
+
+    def _search(self, terms, limit, allowed):
+        n = len(self._docs)
+        if not n or not terms:
+            return []
+        average_length = self._total_length / n or 1
+
+        scores = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for post_id, tf in postings.items():
+                length = self._docs[post_id][1]
+                norm = self.K1 * (1 - self.B + self.B * length / average_length)
+                scores[post_id] = scores.get(post_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+
+        candidates = ((score, post_id) for post_id, score in scores.items())
+        if allowed is not None:
+            visible = {}  # une seule vérification par auteur
+            def is_visible(post_id):
+                author = self._docs[post_id][0]
+                if author not in visible:
+                    visible[author] = allowed(author)
+                return visible[author]
+            candidates = ((score, post_id) for score, post_id in candidates if is_visible(post_id))
+
+        return [(post_id, score) for score, post_id in heapq.nlargest(limit, candidates)]
@@ -0,0 +1,44 @@
+import unittest
+from backend.post_search import PostSearchIndex, tokenize
+from conftest import PostStoreTestCase, make_post
+
+
+class TestPostSearchIndex(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = PostSearchIndex(self.store)
+
+    def ids(self, query, **kwargs):
+        return [post_id for post_id, _ in self.index.search(query, **kwargs)]
+
+    def test_tokenize_folds_accents(self):
+        self.assertEqual(tokenize("Été à l'INSA #Toulouse"), ["ete", "a", "l", "insa", "toulouse"])
+
+    def test_bm25_ranking(self):
+        short = self.store.create(make_post("ines", "Café à Toulouse"))
+        long = self.store.create(make_post("alex", "Un long message sur la ville de Toulouse et ses cafes, ses rues"))
+        other = self.store.create(make_post("maria", "Rien à voir"))
+
+        self.assertEqual(self.ids("cafe toulouse"), [short["id"], long["id"]])
+        self.assertEqual(self.ids("CAFÉ"), [short["id"]])
+        self.assertEqual(self.ids("voir"), [other["id"]])
+        self.assertEqual(self.ids("toulouse", limit=1), [short["id"]])
+        self.assertEqual(self.ids("introuvable"), [])
+        self.assertEqual(self.ids("toulouse", allowed=lambda author: author != "ines"), [long["id"]])
+
+    def test_follows_edit_and_delete(self):
+        post = self.store.create(make_post("ines", "Bonjour tout le monde"))
+        self.assertEqual(self.ids("bonjour"), [post["id"]])
+
+        self.store.edit(post["id"], "Bonsoir", "2025-12-02 10:00:00", [])
+        self.assertEqual(self.ids("bonjour"), [])
+        self.assertEqual(self.ids("bonsoir"), [post["id"]])
+
+        self.store.delete(post["id"])
+        self.assertEqual(self.ids("bonsoir"), [])
+        self.assertEqual(self.index.reloads, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
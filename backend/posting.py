@@ -1,4 +1,5 @@
 import datetime
+import html
 import os
 import json
 import re
@@ -6,9 +7,12 @@ from .user import User
 from .users_db import UsersDatabase
 from .notification import LikeNotification, CommentNotification
 
+_HASHTAG = re.compile(r"#(\w+)")
+
+
 class Post:
-     # 🔹 Liste générale de tous les hashtags rencontrés (en mémoire)
-    general_hashtags = set()
+    # 🔹 Index des hashtags de tous les posts (HashtagIndex, branché par l'application)
+    hashtag_index = None
     def __init__(self, content, poster_username, database, image=None):
         self.poster_username = poster_username
         self.database = database
@@ -21,8 +25,6 @@ class Post:
         self.id_comment = 0
         # 🔹 Extraction des hashtags dans le contenu
         self.hashtags = self.extract_hashtags(self.content)
-        # 🔹 Mise à jour de la liste générale
-        Post.general_hashtags.update(self.hashtags)
         if self.user is not None:
             self.post_id = len(self.user.posts) + 1
         else:
@@ -131,7 +133,9 @@ class Post:
     @classmethod
     def get_general_hashtags(cls):
         """Renvoie la liste générale triée de tous les hashtags."""
-        return sorted(cls.general_hashtags)
+        if cls.hashtag_index is None:
+            return []
+        return cls.hashtag_index.tags()
 
 
     def get_html_content(self):
@@ -139,16 +143,25 @@ class Post:
         Retourne le contenu du post où les hashtags sont remplacés
         par des liens cliquables <a href="/hashtag/...">.
         """
-        formatted = self.content
+        return self.render_html(self.content, self.hashtags)
+
+    @staticmethod
+    def render_html(content, hashtags):
+        """
+        Contenu HTML d'un post en une seule passe (regex) : le texte est échappé
+        et chaque hashtag du post devient un lien <a href="/hashtag/...">.
+        Calculé une fois par version du post (voir PostCache).
+        """
+        tags = {t.lower() for t in hashtags or ()}
+
+        def link(match):
+            tag = match.group(1)
+            if tag.lower() not in tags:
+                return match.group(0)
+            return f'<a href="/hashtag/{tag.lower()}" class="hashtag">#{tag}</a>'
 
-        for tag in self.hashtags:
-            formatted = formatted.replace(
-                f"#{tag}",
-                f'<a href="/hashtag/{tag}" class="hashtag">#{tag}</a>'
-            )
+        return _HASHTAG.sub(link, html.escape(content or "", quote=False))
 
-        return formatted
-    
     @staticmethod
     def validate_hashtags(hashtags):
         """
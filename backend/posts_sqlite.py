@@ -0,0 +1,283 @@
+# Stockage des posts dans SQLite (alternative au journal posts.log.jsonl)
+
+import os
+import sqlite3
+import threading
+from backend.content_flags import HAS_IMAGE, content_flags
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id              INTEGER PRIMARY KEY,
+    poster_username TEXT NOT NULL,
+    poster_pfp      TEXT,
+    content         TEXT NOT NULL,
+    image           TEXT,
+    date            TEXT NOT NULL,
+    post_id         INTEGER,
+    flags           INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_posts_poster_date ON posts(poster_username, date);
+CREATE INDEX IF NOT EXISTS idx_posts_date ON posts(date);
+
+CREATE TABLE IF NOT EXISTS post_hashtags (
+    post_id  INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tag      TEXT NOT NULL,
+    PRIMARY KEY (post_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_post_hashtags_tag ON post_hashtags(tag);
+
+CREATE TABLE IF NOT EXISTS post_likes (
+    post_id  INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    PRIMARY KEY (post_id, username)
+);
+
+CREATE TABLE IF NOT EXISTS post_comments (
+    id       INTEGER PRIMARY KEY,
+    post_id  INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    comment  TEXT NOT NULL,
+    date     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_post_comments_post ON post_comments(post_id);
+"""
+
+
+class SQLitePostStore:
+    """
+    Même API que PostLog (all, get, create, like, unlike, comment,
+    delete_comment, edit, delete) : chaque action sur un post est une
+    recherche par clé primaire au lieu d'une lecture complète de posts.json.
+    Comme PostLog, prévient ses abonnés (subscribe) de chaque modification,
+    et garde les types de contenu de chaque post dans la colonne flags.
+    """
+
+    def __init__(self, db_file="posts.sqlite3", json_file=None):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._migrate_flags()
+        self.version = 0
+        self._listeners = []
+        self._data_version = self._read_data_version()
+
+        # Premier démarrage : on importe posts.json (et son journal) s'il existe
+        empty = self.conn.execute("SELECT 1 FROM posts LIMIT 1").fetchone() is None
+        if json_file and os.path.exists(json_file) and empty:
+            self.import_json(json_file)
+
+    def import_json(self, json_file):
+        from backend.post_log import PostLog
+        with self._lock, self.conn:
+            for post in reversed(PostLog(json_file).all()):
+                self._insert(post)
+        self._changed("reloaded")
+
+    def _migrate_flags(self):
+        # Bases créées avant la colonne flags : on l'ajoute et on la remplit une fois
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(posts)")]
+        with self._lock, self.conn:
+            if "flags" not in columns:
+                self.conn.execute("ALTER TABLE posts ADD COLUMN flags INTEGER")
+            self.conn.executemany(
+                "UPDATE posts SET flags = ? WHERE id = ?",
+                [(content_flags(p), p["id"]) for p in self._select("WHERE flags IS NULL")],
+            )
+
+    # --- Abonnements et détection des modifications externes ---
+    def subscribe(self, listener):
+        """listener(op, post, previous) : voir PostLog.subscribe."""
+        self._listeners.append(listener)
+
+    def _changed(self, op, post_id=None, previous=None):
+        self.version += 1
+        post = self.get(post_id) if post_id is not None and self._listeners else None
+        for listener in self._listeners:
+            listener(op, post, previous)
+
+    def _previous(self, post_id):
+        return self.get(post_id) if self._listeners else None
+
+    def _read_data_version(self):
+        # PRAGMA data_version change quand une autre connexion a modifié la base
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Renvoie True (et prévient les abonnés) si un autre processus a modifié la base."""
+        with self._lock:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            self._changed("reloaded")
+            return True
+
+    # --- Lecture ---
+    _COLUMNS = "SELECT id, poster_username, poster_pfp, content, image, date, post_id, flags FROM posts"
+
+    def _select(self, where="", params=(), order=""):
+        """
+        Posts qui vérifient `where`, avec leurs likes, commentaires et hashtags.
+        Les tables liées sont filtrées par une sous-requête sur posts (et non
+        une liste d'ids en paramètres, limitée par SQLite à 999 ou 32766
+        variables) : le nombre de paramètres ne dépend pas du nombre de posts.
+        """
+        posts = []
+        by_id = {}
+        for row in self.conn.execute(f"{self._COLUMNS} {where} {order}", params):
+            post_id, poster, pfp, content, image, date, user_post_id, flags = row
+            post = {
+                "poster_username": poster,
+                "poster_pfp": pfp,
+                "content": content,
+                "image": image,
+                "date": date,
+                "likes": [],
+                "comments": [],
+                "hashtags": [],
+                "post_id": user_post_id,
+                "id": post_id,
+                "flags": flags,
+            }
+            posts.append(post)
+            by_id[post_id] = post
+        if not by_id:
+            return posts
+
+        subquery = f"post_id IN (SELECT id FROM posts {where})"
+        for post_id, username in self.conn.execute(
+            f"SELECT post_id, username FROM post_likes WHERE {subquery} ORDER BY rowid", params
+        ):
+            by_id[post_id]["likes"].append(username)
+        for post_id, username, comment, date in self.conn.execute(
+            f"SELECT post_id, username, comment, date FROM post_comments WHERE {subquery} ORDER BY id", params
+        ):
+            by_id[post_id]["comments"].append({"username": username, "comment": comment, "date": date})
+        for post_id, tag in self.conn.execute(
+            f"SELECT post_id, tag FROM post_hashtags WHERE {subquery} ORDER BY position", params
+        ):
+            by_id[post_id]["hashtags"].append(tag)
+        return posts
+
+    def all(self):
+        with self._lock:
+            return self._select(order="ORDER BY id DESC")
+
+    def get(self, post_id):
+        with self._lock:
+            posts = self._select("WHERE id = ?", (post_id,))
+            return posts[0] if posts else None
+
+    def posts_by(self, username):
+        with self._lock:
+            return self._select("WHERE poster_username = ?", (username,), "ORDER BY id DESC")
+
+    # --- Écriture ---
+    def _insert(self, post):
+        post["flags"] = content_flags(post)
+        cursor = self.conn.execute(
+            "INSERT INTO posts (id, poster_username, poster_pfp, content, image, date, post_id, flags) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                post.get("id"), post["poster_username"], post.get("poster_pfp"), post["content"],
+                post.get("image"), post["date"], post.get("post_id"), post["flags"],
+            ),
+        )
+        post_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO post_likes (post_id, username) VALUES (?, ?)",
+            [(post_id, u) for u in post.get("likes", [])],
+        )
+        self.conn.executemany(
+            "INSERT INTO post_comments (post_id, username, comment, date) VALUES (?, ?, ?, ?)",
+            [(post_id, c["username"], c["comment"], c.get("date")) for c in post.get("comments", [])],
+        )
+        self._set_hashtags(post_id, post.get("hashtags", []))
+        return post_id
+
+    def _set_hashtags(self, post_id, hashtags):
+        self.conn.execute("DELETE FROM post_hashtags WHERE post_id = ?", (post_id,))
+        self.conn.executemany(
+            "INSERT INTO post_hashtags (post_id, position, tag) VALUES (?, ?, ?)",
+            [(post_id, i, t.lower()) for i, t in enumerate(hashtags)],
+        )
+
+    def create(self, post):
+        with self._lock:
+            with self.conn:
+                post = dict(post)
+                post.pop("id", None)
+                post["id"] = self._insert(post)
+            self._changed("post_created", post["id"])
+            return post
+
+    def like(self, post_id, username):
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO post_likes (post_id, username) "
+                    "SELECT id, ? FROM posts WHERE id = ?",
+                    (username, post_id),
+                )
+            if cursor.rowcount:
+                self._changed("liked", post_id)
+
+    def unlike(self, post_id, username):
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "DELETE FROM post_likes WHERE post_id = ? AND username = ?", (post_id, username)
+                )
+            if cursor.rowcount:
+                self._changed("unliked", post_id)
+
+    def comment(self, post_id, comment):
+        with self._lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "INSERT INTO post_comments (post_id, username, comment, date) "
+                    "SELECT id, ?, ?, ? FROM posts WHERE id = ?",
+                    (comment["username"], comment["comment"], comment.get("date"), post_id),
+                )
+            if cursor.rowcount:
+                self._changed("commented", post_id)
+
+    def delete_comment(self, post_id, comment_index):
+        with self._lock:
+            with self.conn:
+                row = self.conn.execute(
+                    "SELECT id FROM post_comments WHERE post_id = ? ORDER BY id LIMIT 1 OFFSET ?",
+                    (post_id, comment_index),
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute("DELETE FROM post_comments WHERE id = ?", row)
+            if row is not None:
+                self._changed("comment_deleted", post_id)
+
+    def edit(self, post_id, content, date, hashtags):
+        with self._lock:
+            previous = self._previous(post_id)
+            with self.conn:
+                # L'image ne change pas à l'édition : on garde son bit
+                flags = content_flags({"content": content, "hashtags": hashtags})
+                cursor = self.conn.execute(
+                    "UPDATE posts SET content = ?, date = ?, flags = (flags & ?) | ? WHERE id = ?",
+                    (content, date, HAS_IMAGE, flags, post_id),
+                )
+                if cursor.rowcount:
+                    self._set_hashtags(post_id, hashtags)
+            if cursor.rowcount:
+                self._changed("edited", post_id, previous)
+
+    def delete(self, post_id):
+        with self._lock:
+            previous = self._previous(post_id)
+            with self.conn:
+                cursor = self.conn.execute("DELETE FROM posts WHERE id = ?", (post_id,))
+            if cursor.rowcount:
+                self._changed("deleted", None, previous)
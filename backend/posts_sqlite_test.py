@@ -0,0 +1,100 @@
+import json
+import sqlite3
+import unittest
+from backend.posts_sqlite import SQLitePostStore
+from backend.content_flags import HAS_HASHTAG, HAS_IMAGE, HAS_TEXT
+from conftest import TempDirTestCase, make_post
+
+
+class TestSQLitePostStore(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db_file = self.path("posts.sqlite3")
+        self.store = SQLitePostStore(self.db_file)
+
+    def tearDown(self):
+        self.store.conn.close()
+        super().tearDown()
+
+    def test_ids_are_stable(self):
+        first = self.store.create(make_post("ines", "hello"))
+        second = self.store.create(make_post("alex", "world #insa", ["insa"]))
+        self.store.like(first["id"], "alex")
+        self.store.like(first["id"], "alex")
+        self.store.comment(first["id"], {"username": "alex", "comment": "hi", "date": "2025-12-01 10:01:00"})
+
+        # Un nouveau post ne décale pas les identifiants existants
+        self.store.create(make_post("maria", "third"))
+        post = self.store.get(first["id"])
+        self.assertEqual(post["content"], "hello")
+        self.assertEqual(post["likes"], ["alex"])
+        self.assertEqual(post["comments"][0]["comment"], "hi")
+        self.assertEqual(self.store.get(second["id"])["hashtags"], ["insa"])
+        self.assertIsNone(self.store.get(999))
+
+    def test_edit_delete_and_order(self):
+        first = self.store.create(make_post("ines", "hello"))
+        second = self.store.create(make_post("ines", "world"))
+        self.store.edit(first["id"], "hello #toulouse", "2025-12-02 09:00:00", ["toulouse"])
+        self.store.comment(second["id"], {"username": "alex", "comment": "a", "date": None})
+        self.store.comment(second["id"], {"username": "alex", "comment": "b", "date": None})
+        self.store.delete_comment(second["id"], 0)
+        self.store.unlike(second["id"], "nobody")
+
+        self.assertEqual([p["id"] for p in self.store.all()], [second["id"], first["id"]])
+        self.assertEqual(self.store.get(first["id"])["hashtags"], ["toulouse"])
+        self.assertEqual([c["comment"] for c in self.store.get(second["id"])["comments"]], ["b"])
+        self.assertEqual(len(self.store.posts_by("ines")), 2)
+
+        self.store.delete(first["id"])
+        self.assertIsNone(self.store.get(first["id"]))
+        self.assertEqual(self.store.conn.execute("SELECT COUNT(*) FROM post_hashtags").fetchone()[0], 0)
+
+    def test_import_keeps_json_ids(self):
+        json_file = self.path("posts.json")
+        legacy = [make_post("ines", "newest"), make_post("ines", "oldest")]
+        legacy[0]["likes"] = ["alex"]
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+
+        store = SQLitePostStore(self.path("imported.sqlite3"), json_file=json_file)
+        self.assertEqual([(p["id"], p["content"]) for p in store.all()], [(2, "newest"), (1, "oldest")])
+        self.assertEqual(store.get(2)["likes"], ["alex"])
+        store.conn.close()
+
+    def test_all_beyond_sql_variable_limit(self):
+        # Plus de posts que de variables SQL autorisées (999 avant SQLite 3.32)
+        self.store.conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 20)
+        for i in range(50):
+            post = self.store.create(make_post("ines", f"post {i} #insa", ["insa"]))
+            self.store.like(post["id"], "alex")
+        posts = self.store.all()
+        self.assertEqual(len(posts), 50)
+        self.assertTrue(all(p["likes"] == ["alex"] and p["hashtags"] == ["insa"] for p in posts))
+        self.assertEqual(len(self.store.posts_by("ines")), 50)
+
+    def test_flags_are_stored(self):
+        post = self.store.create(make_post("ines", "hello", image="a.png"))
+        self.assertEqual(post["flags"], HAS_TEXT | HAS_IMAGE)
+        self.store.edit(post["id"], "#insa", "2025-12-02 09:00:00", ["insa"])
+        self.assertEqual(self.store.get(post["id"])["flags"], HAS_TEXT | HAS_IMAGE | HAS_HASHTAG)
+
+    def test_old_database_gets_flags_column(self):
+        db_file = self.path("old.sqlite3")
+        conn = sqlite3.connect(db_file)
+        conn.execute(
+            "CREATE TABLE posts (id INTEGER PRIMARY KEY, poster_username TEXT NOT NULL, poster_pfp TEXT, "
+            "content TEXT NOT NULL, image TEXT, date TEXT NOT NULL, post_id INTEGER)"
+        )
+        conn.execute("INSERT INTO posts VALUES (1, 'ines', NULL, 'hello', 'a.png', '2025-12-01 10:00:00', 1)")
+        conn.commit()
+        conn.close()
+
+        store = SQLitePostStore(db_file)
+        self.assertEqual(store.get(1)["flags"], HAS_TEXT | HAS_IMAGE)
+        store.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# Suggestions de comptes à suivre (amis d'amis), gardées en cache par utilisateur
+
+import math
+import threading
+import time
+from collections import Counter
+from backend.user_ids import user_ids
+
+
+class SuggestionEngine:
+    """
+    Suggestions personnalisées pour /suggestions. Un candidat est un compte
+    public que l'utilisateur ne suit pas, qu'il n'a pas bloqué et qui ne l'a
+    pas bloqué. Score :
+
+    - MUTUAL_WEIGHT par compte suivi qui suit déjà le candidat (parcours à
+      deux sauts des listes "following" : seuls les voisins sont lus) ;
+    - POPULARITY_WEIGHT * log(1 + nombre de followers) ;
+    - COUNTRY_BONUS si le candidat est du même pays ;
+    - INFLUENCE_WEIGHT * log(1 + influence) (PageRank de la tâche graph_analytics),
+      si ses résultats sont disponibles (`metrics`).
+
+    Les amis d'amis sont complétés par les comptes publics les plus suivis.
+
+    Le classement de chaque utilisateur est gardé en cache. Un abonnement de
+    A à B (ou sa fin) l'invalide pour A et pour les followers de A, dont les
+    amis d'amis changent. Les autres changements (popularité, pays, nouveaux
+    inscrits) sont pris en compte au plus tard après `max_age` secondes. Les
+    abonnements et blocages sont revérifiés à chaque lecture.
+    Les classements sont des listes d'ids (user_ids), traduits à la lecture.
+    """
+
+    MUTUAL_WEIGHT = 10.0
+    POPULARITY_WEIGHT = 1.0
+    COUNTRY_BONUS = 2.0
+    INFLUENCE_WEIGHT = 1.0
+    MAX_AGE = 300.0
+    RANKED = 100    # candidats gardés par utilisateur
+
+    def __init__(self, users_db, max_age=MAX_AGE, metrics=None):
+        self.users_db = users_db
+        self.metrics = metrics
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._rankings = {}     # id -> (instant du calcul, ids classés)
+        self._popular = None    # (instant du calcul, usernames publics les plus suivis)
+        self.stats = dict.fromkeys(("hits", "misses", "invalidations"), 0)
+
+    # --- Changements d'abonnements (User.follow_listeners) ---
+    def on_follow_change(self, follower, followee, added):
+        user = self.users_db.get_user(follower)
+        stale = [user_ids.intern(follower), *(user.followers.ids() if user is not None else ())]
+        with self._lock:
+            for user_id in stale:
+                if self._rankings.pop(user_id, None) is not None:
+                    self.stats["invalidations"] += 1
+
+    # --- Calcul ---
+    def eligible(self, user, candidate):
+        return (
+            candidate is not None
+            and candidate.username != user.username
+            and getattr(candidate, "is_public", False)
+            and candidate.username not in user.following
+            and candidate.username not in user.blocked_users
+            and user.username not in candidate.blocked_users
+        )
+
+    def _fresh(self, computed_at):
+        return time.monotonic() - computed_at < self.max_age
+
+    def _popular_usernames(self):
+        with self._lock:
+            popular = self._popular
+        if popular is not None and self._fresh(popular[0]):
+            return popular[1]
+        usernames = self.users_db.popular_usernames()
+        with self._lock:
+            self._popular = (time.monotonic(), usernames)
+        return usernames
+
+    def score(self, user, candidate, mutual):
+        score = self.MUTUAL_WEIGHT * mutual
+        score += self.POPULARITY_WEIGHT * math.log1p(len(candidate.followers))
+        if candidate.country and candidate.country == user.country:
+            score += self.COUNTRY_BONUS
+        if self.metrics is not None:
+            score += self.INFLUENCE_WEIGHT * math.log1p(self.metrics.influence(candidate.username))
+        return score
+
+    def _rank(self, user):
+        # Amis d'amis : pour chaque compte suivi, les comptes qu'il suit
+        mutual = Counter()
+        for followed in user.following:
+            friend = self.users_db.get_user(followed)
+            if friend is not None:
+                mutual.update(friend.following.ids())
+
+        candidates = dict.fromkeys(mutual)
+        extra = 0
+        for username in self._popular_usernames():
+            if extra >= self.RANKED:
+                break
+            user_id = user_ids.intern(username)
+            if user_id not in candidates:
+                candidates[user_id] = None
+                extra += 1
+
+        scored = []
+        for user_id in candidates:
+            candidate = self.users_db.get_user(user_ids.username(user_id))
+            if self.eligible(user, candidate):
+                scored.append((-self.score(user, candidate, mutual[user_id]), candidate.username, user_id))
+        scored.sort()
+        return [user_id for _, _, user_id in scored[:self.RANKED]]
+
+    # --- Lecture ---
+    def suggest(self, user, limit=20):
+        """Au plus `limit` comptes (objets User) à suggérer à `user`, le meilleur d'abord."""
+        key = user_ids.intern(user.username)
+        with self._lock:
+            cached = self._rankings.get(key)
+        if cached is not None and self._fresh(cached[0]):
+            self.stats["hits"] += 1
+            ranking = cached[1]
+        else:
+            self.stats["misses"] += 1
+            ranking = self._rank(user)
+            with self._lock:
+                self._rankings[key] = (time.monotonic(), ranking)
+
+        results = []
+        for user_id in ranking:
+            if len(results) == limit:
+                break
+            candidate = self.users_db.get_user(user_ids.username(user_id))
+            if self.eligible(user, candidate):
+                results.append(candidate)
+        return results
@@ -0,0 +1,71 @@
+import unittest
+from backend.user import User
+from backend.users_db import UsersDatabase
+from backend.recommendations import SuggestionEngine
+from conftest import TempDirTestCase
+
+
+class TestSuggestionEngine(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = UsersDatabase(self.path("users.json"))
+        self.users = {}
+        for name, country, public in (
+            ("ines", "France", True), ("alex", "Spain", True), ("maria", "Spain", True),
+            ("noa", "France", True), ("leo", "Italy", True), ("zoe", "France", False),
+            ("star", "USA", True),
+        ):
+            self.users[name] = User(name, f"{name}@mail.com", "Pass123!", name.title(), 20, country, is_public=public)
+            self.db.add_user(self.users[name])
+        self.engine = SuggestionEngine(self.db)
+        User.follow_listeners.append(self.engine.on_follow_change)
+
+    def tearDown(self):
+        User.follow_listeners.remove(self.engine.on_follow_change)
+        super().tearDown()
+
+    def follow(self, follower, followee):
+        self.users[follower].follow(self.users[followee])
+
+    def suggested(self, username, limit=20):
+        return [u.username for u in self.engine.suggest(self.users[username], limit)]
+
+    def test_friends_of_friends_first(self):
+        for fan in ("alex", "maria", "noa", "leo"):
+            self.follow(fan, "star")
+        self.follow("ines", "alex")
+        self.follow("ines", "maria")
+        self.follow("alex", "leo")
+        self.follow("maria", "leo")
+
+        # leo : 2 amis en commun ; star : 2 aussi et plus de followers ; zoe est privée
+        self.assertEqual(self.suggested("ines"), ["star", "leo", "noa"])
+        self.assertEqual(self.suggested("ines", limit=1), ["star"])
+
+    def test_country_breaks_ties(self):
+        self.assertEqual(self.suggested("ines")[0], "noa")
+
+    def test_cache_and_invalidation(self):
+        self.follow("ines", "alex")
+        self.assertNotIn("leo", self.suggested("ines")[:1])
+        self.assertEqual(self.engine.stats["misses"], 1)
+        self.suggested("ines")
+        self.assertEqual(self.engine.stats["hits"], 1)
+
+        # alex suit leo : le classement de ines (follower d'alex) est recalculé
+        self.follow("alex", "leo")
+        self.assertEqual(self.suggested("ines")[0], "leo")
+        self.assertEqual(self.engine.stats["misses"], 2)
+
+        # Suivi et blocage revérifiés à la lecture, même depuis le cache
+        self.follow("ines", "leo")
+        self.assertNotIn("leo", self.suggested("ines"))
+        self.users["ines"].block(self.users["noa"])
+        self.assertNotIn("noa", self.suggested("ines"))
+        self.users["maria"].block(self.users["ines"])
+        self.assertNotIn("maria", self.suggested("ines"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,10 +41,9 @@ def validate_registration(user : User, confirm_password : str):
         return False, "Username already exists. Please choose a different username."
     
     # Unique email check
-    for existing_user in users_db.users_list:
-        if existing_user.email == user.email:
-            return False, "Email already exists. Please choose a different email."
-        
+    if users_db.get_user_by_email(user.email) is not None:
+        return False, "Email already exists. Please choose a different email."
+
     # All checks passed
     return True, "Registration successful."
 
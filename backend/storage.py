@@ -0,0 +1,171 @@
+# Outils communs pour les fichiers de données (journaux JSONL, snapshots JSON)
+
+import json
+import os
+import tempfile
+import threading
+
+
+def read_jsonl(path):
+    """
+    Lit un journal JSONL et renvoie la liste des enregistrements.
+    Une dernière ligne tronquée (arrêt pendant une écriture) est retirée du fichier.
+    """
+    if not os.path.exists(path):
+        return []
+    records = []
+    valid_size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                if line.strip():
+                    records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            valid_size += len(line)
+        truncated = f.tell() != valid_size
+    if truncated:
+        with open(path, "r+b") as f:
+            f.truncate(valid_size)
+    return records
+
+
+def file_signature(path):
+    """(mtime, taille) d'un fichier, ou None s'il n'existe pas."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # pas de fsync de dossier possible (Windows)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data, indent=4):
+    """
+    Écrit un fichier JSON de façon atomique : fichier temporaire dans le même
+    dossier, fsync, puis os.replace. Un arrêt pendant l'écriture laisse
+    l'ancien fichier intact.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(path)
+
+
+class GroupCommitWriter:
+    """
+    Écriture d'un journal JSONL avec "group commit".
+
+    submit() met des enregistrements en file (dans l'ordre d'appel) et renvoie
+    un numéro de lot ; wait() attend que ce lot soit sur le disque. Le premier
+    thread qui attend devient le "leader" : il laisse `window` secondes aux
+    autres requêtes pour s'ajouter, écrit tout le lot en un seul write + fsync,
+    puis réveille tous les threads du lot ensemble.
+    """
+
+    WINDOW = 0.005
+
+    def __init__(self, path, window=WINDOW):
+        self.path = path
+        self.window = window
+        self._cond = threading.Condition()
+        self._pending = []
+        self._batch = 0          # lot en cours de remplissage
+        self._committed = -1     # dernier lot écrit sur le disque
+        self._flushing = False
+        self._errors = {}
+        self.commits = 0         # nombre d'écritures sur le disque
+        self.records = 0         # nombre d'enregistrements écrits
+
+    def submit(self, records):
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        with self._cond:
+            self._pending.append((data, len(records)))
+            return self._batch
+
+    def wait(self, ticket, window=None):
+        window = self.window if window is None else window
+        with self._cond:
+            while self._committed < ticket:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._commit(window)
+            error = self._errors.get(ticket)
+        if error is not None:
+            raise error
+
+    def idle(self):
+        """Vrai si tout ce qui a été soumis est déjà sur le disque."""
+        with self._cond:
+            return not self._pending and not self._flushing
+
+    def append(self, records):
+        self.wait(self.submit(records))
+
+    def flush(self):
+        """Écrit immédiatement tout ce qui est en attente."""
+        with self._cond:
+            ticket = self._batch if self._pending else self._committed
+        self.wait(ticket, window=0)
+
+    def truncate(self):
+        """Vide le journal (après une compaction). Tout ce qui est en attente est écrit avant."""
+        self.flush()
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _commit(self, window):
+        # Appelé avec le verrou : ce thread devient le leader du lot courant
+        self._flushing = True
+        if window:
+            self._cond.wait(window)
+        batch, self._pending = self._pending, []
+        ticket = self._batch
+        self._batch += 1
+
+        self._cond.release()
+        error = None
+        try:
+            if batch:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(data for data, _ in batch))
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            error = e
+        finally:
+            self._cond.acquire()
+
+        if error is not None:
+            self._errors[ticket] = error
+        self._errors.pop(ticket - 100, None)
+        if batch and error is None:
+            self.commits += 1
+            self.records += sum(n for _, n in batch)
+        self._committed = ticket
+        self._flushing = False
+        self._cond.notify_all()
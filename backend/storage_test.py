@@ -0,0 +1,70 @@
+import os
+import json
+import threading
+import unittest
+from backend.storage import read_jsonl, atomic_write_json, GroupCommitWriter
+from backend.post_log import PostLog
+from conftest import TempDirTestCase, make_post
+
+
+class TestAtomicWrite(TempDirTestCase):
+
+    def test_replace_and_no_leftover(self):
+        path = self.path("data.json")
+        atomic_write_json(path, {"a": 1})
+        atomic_write_json(path, {"a": 2})
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"a": 2})
+        self.assertEqual(os.listdir(self.tmp.name), ["data.json"])
+
+
+class TestGroupCommitWriter(TempDirTestCase):
+
+    def test_concurrent_appends_share_commits(self):
+        writer = GroupCommitWriter(self.path("log.jsonl"), window=0.02)
+        barrier = threading.Barrier(20)
+
+        def worker(i):
+            barrier.wait()
+            writer.append([{"n": i}])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        records = read_jsonl(writer.path)
+        self.assertEqual(sorted(r["n"] for r in records), list(range(20)))
+        self.assertEqual(writer.records, 20)
+        self.assertLess(writer.commits, 20)
+
+    def test_submit_order_is_kept(self):
+        writer = GroupCommitWriter(self.path("log.jsonl"))
+        tickets = [writer.submit([{"n": i}]) for i in range(5)]
+        writer.wait(tickets[-1])
+        self.assertEqual([r["n"] for r in read_jsonl(writer.path)], list(range(5)))
+        writer.truncate()
+        self.assertEqual(read_jsonl(writer.path), [])
+
+
+class TestPostLogCrashRecovery(TempDirTestCase):
+
+    def test_log_already_in_snapshot_is_not_replayed_twice(self):
+        log = PostLog(self.snapshot)
+        post = log.create(make_post(content="hi"))
+        log.comment(post["id"], {"username": "alex", "comment": "hello", "date": None})
+        log.comment(post["id"], {"username": "alex", "comment": "again", "date": None})
+
+        # Arrêt simulé entre l'écriture du snapshot et le vidage du journal
+        atomic_write_json(self.snapshot, log.posts)
+
+        reloaded = PostLog(self.snapshot)
+        self.assertEqual(len(reloaded.all()), 1)
+        self.assertEqual([c["comment"] for c in reloaded.get(post["id"])["comments"]], ["hello", "again"])
+        reloaded.like(post["id"], "maria")
+        self.assertEqual(PostLog(self.snapshot).get(post["id"])["likes"], ["maria"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,9 @@
+# Normalisation du texte pour les recherches
+
+import unicodedata
+
+
+def fold(text):
+    """Minuscules sans accents : "École" -> "ecole"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
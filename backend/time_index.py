@@ -0,0 +1,95 @@
+# Index des posts triés par date (filtres de dates du feed)
+
+import bisect
+import calendar
+import datetime
+from itertools import islice
+from backend.post_index import PostIndex
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def to_timestamp(value):
+    """
+    Secondes epoch d'une date "%Y-%m-%d %H:%M:%S" ou d'un datetime, lue comme
+    une heure UTC (seul l'ordre compte) ; None si la date est invalide.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.strptime(value, DATE_FORMAT)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime.datetime):
+        return None
+    return calendar.timegm(value.timetuple())
+
+
+def _newest_first(entries, lo, hi):
+    return (entries[i] for i in range(hi - 1, lo - 1, -1))
+
+
+class TimeIndex(PostIndex):
+    """
+    Liste triée des (timestamp, id) de tous les posts : la date n'est lue
+    qu'une fois par post, et une plage de dates se résume à deux recherches
+    dichotomiques (bisect) suivies d'un parcours de la tranche.
+    Les posts dont la date est invalide ne sont pas indexés.
+    """
+
+    def _clear(self):
+        self._entries = []
+
+    def _build(self, posts):
+        entries = ((to_timestamp(p.get("date")), p["id"]) for p in posts)
+        self._entries = sorted(e for e in entries if e[0] is not None)
+
+    def _add(self, post):
+        ts = to_timestamp(post.get("date"))
+        if ts is not None:
+            bisect.insort(self._entries, (ts, post["id"]))
+
+    def _remove(self, post):
+        entry = (to_timestamp(post.get("date")), post["id"])
+        if entry[0] is None:
+            return
+        i = bisect.bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+
+    # --- Requêtes ---
+    def _range(self, start, end, before):
+        lo = 0 if start is None else bisect.bisect_left(self._entries, (start,))
+        hi = len(self._entries) if end is None else bisect.bisect_left(self._entries, (end,))
+        if before is not None:
+            hi = min(hi, bisect.bisect_left(self._entries, tuple(before)))
+        return lo, max(lo, hi)
+
+    def count(self, start=None, end=None):
+        """Nombre de posts dont le timestamp est dans [start, end[."""
+        def reader():
+            lo, hi = self._range(start, end, None)
+            return hi - lo
+        return self._read(reader)
+
+    def post_ids(self, start=None, end=None, limit=None, before=None):
+        """
+        Ids des posts dont le timestamp est dans [start, end[ (bornes
+        facultatives), du plus récent au plus ancien : au plus `limit`, et
+        seulement ceux placés après le curseur `before` = (timestamp, id).
+        """
+        entries = self._read(lambda: self._slice(start, end, before, limit))
+        return [post_id for _, post_id in entries]
+
+    def iter_post_ids(self, start=None, end=None, before=None, batch=100):
+        """Comme post_ids, mais paresseux : l'index est lu par lots de `batch` ids."""
+        while True:
+            entries = self._read(lambda: self._slice(start, end, before, batch))
+            for _, post_id in entries:
+                yield post_id
+            if len(entries) < batch:
+                return
+            before = entries[-1]
+
+    def _slice(self, start, end, before, limit):
+        lo, hi = self._range(start, end, before)
+        return list(islice(_newest_first(self._entries, lo, hi), limit))
@@ -0,0 +1,51 @@
+import unittest
+from backend.post_cache import PostCache
+from backend.time_index import TimeIndex, to_timestamp
+from conftest import PostStoreTestCase, make_post
+
+
+class TestTimeIndex(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = TimeIndex(self.store)
+
+    def test_to_timestamp(self):
+        self.assertEqual(to_timestamp("1970-01-02 00:00:00"), 86400)
+        self.assertIsNone(to_timestamp("02/01/1970"))
+        self.assertIsNone(to_timestamp(None))
+
+    def test_date_ranges(self):
+        dates = ["2025-01-03 09:00:00", "2025-01-01 10:00:00", "2025-01-02 23:59:59", "2025-01-03 00:00:00"]
+        ids = [self.store.create(make_post("ines", date=d))["id"] for d in dates]
+        self.store.create(make_post("ines", date="not a date"))
+        jan2, jan3 = to_timestamp("2025-01-02 00:00:00"), to_timestamp("2025-01-03 00:00:00")
+
+        self.assertEqual(self.index.post_ids(), [ids[0], ids[3], ids[2], ids[1]])
+        self.assertEqual(self.index.post_ids(jan2, jan3), [ids[2]])
+        self.assertEqual(self.index.post_ids(start=jan3), [ids[0], ids[3]])
+        self.assertEqual(self.index.post_ids(end=jan3, limit=1), [ids[2]])
+        self.assertEqual(self.index.count(start=jan2), 3)
+
+        cursor = (to_timestamp(dates[3]), ids[3])
+        self.assertEqual(self.index.post_ids(before=cursor), [ids[2], ids[1]])
+        self.assertEqual(list(self.index.iter_post_ids(start=jan2, batch=1)), [ids[0], ids[3], ids[2]])
+
+    def test_edit_and_delete(self):
+        post = self.store.create(make_post("ines", date="2025-01-01 10:00:00"))
+        self.assertEqual(self.index.count(), 1)
+
+        self.store.edit(post["id"], "edited", "2025-02-01 10:00:00", [])
+        self.assertEqual(self.index.post_ids(start=to_timestamp("2025-02-01 00:00:00")), [post["id"]])
+
+        self.store.delete(post["id"])
+        self.assertEqual(self.index.post_ids(), [])
+
+    def test_cached_posts_carry_their_timestamp(self):
+        post = self.store.create(make_post("ines", date="2025-01-01 10:00:00"))
+        cache = PostCache(self.store)
+        self.assertEqual(cache.get(post["id"])["ts"], to_timestamp("2025-01-01 10:00:00"))
+
+
+if __name__ == "__main__":
+    unittest.main()
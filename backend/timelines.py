@@ -0,0 +1,270 @@
+# Fils d'actualité "Friends" matérialisés (fan-out à l'écriture, hybride pour les comptes très suivis)
+
+import bisect
+import heapq
+from collections import deque
+from itertools import islice
+from backend.post_index import PostIndex
+from backend.user_ids import user_ids
+
+
+def _newest_first(ids, before=None):
+    """Parcourt une liste d'ids croissante à l'envers, en partant des ids < before."""
+    end = len(ids) if before is None else bisect.bisect_left(ids, before)
+    return (ids[i] for i in range(end - 1, -1, -1))
+
+
+def _negate(post_id):
+    return -post_id
+
+
+def _unique(ids):
+    """Retire les doublons consécutifs (un post à la fois poussé et lu chez l'auteur)."""
+    last = None
+    for post_id in ids:
+        if post_id != last:
+            yield post_id
+            last = post_id
+
+
+class TimelineService(PostIndex):
+    """
+    Fil "Friends" de chaque utilisateur : les ids des `size` posts les plus
+    récents de ses abonnements et des siens, du plus récent au plus ancien.
+
+    - À la création d'un post, son id est poussé dans le fil de l'auteur et
+      dans celui de chacun de ses followers (fan-out à l'écriture).
+    - Un fil n'est construit qu'à sa première lecture. Suivre quelqu'un y
+      fusionne ses posts récents ; ne plus le suivre (ou le bloquer) les retire.
+    - Un fil est toujours le début exact de la liste complète : au-delà, les
+      posts plus anciens sont lus dans les listes de posts de chaque auteur.
+    - Hybride : les posts des comptes qui ont plus de `fanout_threshold`
+      followers (compte officiel de l'INSA...) ne sont pas poussés ; ils sont
+      lus dans la liste de l'auteur au moment de la lecture et fusionnés.
+
+    Les auteurs et les lecteurs sont désignés par leur id entier (user_ids).
+    """
+
+    SIZE = 500
+    FANOUT_THRESHOLD = 1000
+
+    def __init__(self, store, users_db, size=SIZE, fanout_threshold=FANOUT_THRESHOLD,
+                 check_interval=PostIndex.CHECK_INTERVAL):
+        self.users_db = users_db
+        self.size = size
+        self.fanout_threshold = fanout_threshold
+        # Compteurs exposés par metrics()
+        self.stats = dict.fromkeys((
+            "reads", "timeline_hits", "timeline_builds", "hybrid_reads", "deep_reads",
+            "fanout_writes", "pulled_posts",
+        ), 0)
+        super().__init__(store, check_interval)
+
+    def _clear(self):
+        self._by_author = {}   # id de l'auteur -> ids de ses posts (ordre croissant)
+        self._authors = {}     # id du post -> id de l'auteur
+        self._timelines = {}   # id du lecteur -> deque d'ids de posts, du plus récent au plus ancien
+        self._followers = {}   # id -> nombre de followers (tenu à jour par on_follow_change)
+        self._pulled_authors = set()   # ids des comptes lus à la lecture
+        self._pushed_counts = {}       # id du lecteur -> nombre de posts des auteurs poussés qu'il lit
+
+    def _build(self, posts):
+        self._clear()
+        self._followers = {
+            user_ids.intern(username): n for username, n in self.users_db.follower_counts().items()
+        }
+        self._pulled_authors = {a for a, n in self._followers.items() if n > self.fanout_threshold}
+        for post in posts:
+            author = user_ids.intern(post["poster_username"])
+            self._by_author.setdefault(author, []).append(post["id"])
+            self._authors[post["id"]] = author
+        for ids in self._by_author.values():
+            ids.sort()
+
+    def _audience(self, author):
+        user = self.users_db.get_user(user_ids.username(author))
+        return [author, *(user.followers.ids() if user is not None else ())]
+
+    def _update_mode(self, author):
+        """Passe l'auteur en lecture (ou en fan-out) quand son nombre de followers franchit le seuil."""
+        pulled = self._followers.get(author, 0) > self.fanout_threshold
+        if pulled != (author in self._pulled_authors):
+            # Changement de mode : les fils de ses followers sont reconstruits à la lecture
+            self._pulled_authors.symmetric_difference_update((author,))
+            for reader in self._audience(author):
+                self._timelines.pop(reader, None)
+                self._pushed_counts.pop(reader, None)
+
+    def _add(self, post):
+        post_id, author = post["id"], user_ids.intern(post["poster_username"])
+        bisect.insort(self._by_author.setdefault(author, []), post_id)
+        self._authors[post_id] = author
+        if author in self._pulled_authors:
+            self.stats["pulled_posts"] += 1
+            return
+
+        # Fan-out : seulement dans les fils déjà construits
+        for reader in self._audience(author):
+            if reader in self._pushed_counts:
+                self._pushed_counts[reader] += 1
+            timeline = self._timelines.get(reader)
+            if timeline is None:
+                continue
+            if not timeline or post_id > timeline[0]:
+                timeline.appendleft(post_id)
+                self.stats["fanout_writes"] += 1
+            else:
+                del self._timelines[reader]  # post plus ancien que le fil : reconstruit à la lecture
+
+    def _remove(self, post):
+        post_id, author = post["id"], user_ids.intern(post["poster_username"])
+        ids = self._by_author.get(author)
+        if ids:
+            i = bisect.bisect_left(ids, post_id)
+            if i < len(ids) and ids[i] == post_id:
+                del ids[i]
+            if not ids:
+                del self._by_author[author]
+        self._authors.pop(post_id, None)
+
+        for reader in self._audience(author):
+            if author not in self._pulled_authors and reader in self._pushed_counts:
+                self._pushed_counts[reader] -= 1
+            timeline = self._timelines.get(reader)
+            if timeline is not None and post_id in timeline:
+                timeline.remove(post_id)
+
+    def _edit(self, post, previous):
+        """L'auteur et l'id d'un post modifié ne changent pas : rien à faire."""
+
+    # --- Changements d'abonnements (User.follow_listeners) ---
+    def on_follow_change(self, follower, followee, added):
+        follower, followee = user_ids.intern(follower), user_ids.intern(followee)
+        with self._lock:
+            if not self._loaded:
+                return  # les compteurs seront lus dans la base à la construction
+            self._followers[followee] = self._followers.get(followee, 0) + (1 if added else -1)
+            self._update_mode(followee)
+            self._pushed_counts.pop(follower, None)
+            timeline = self._timelines.get(follower)
+            if timeline is None:
+                return
+            if not added:
+                self._timelines[follower] = deque(
+                    (i for i in timeline if self._authors.get(i) != followee), maxlen=self.size
+                )
+            elif followee in self._pulled_authors:
+                pass  # ses posts sont lus à chaque lecture
+            elif len(timeline) == self.size:
+                recent = _newest_first(self._by_author.get(followee, []))
+                merged = heapq.merge(timeline, recent, reverse=True)
+                self._timelines[follower] = deque(islice(merged, self.size), maxlen=self.size)
+            else:
+                # Fil incomplet : une simple fusion ne garantirait plus l'ordre exact
+                del self._timelines[follower]
+
+    # --- Lecture ---
+    def _following(self, reader):
+        user = self.users_db.get_user(user_ids.username(reader))
+        return user.following.ids() if user is not None else {}.keys()
+
+    def _pulled_of(self, reader, following):
+        """Comptes lus à la lecture parmi ceux de `reader` : le petit ensemble est parcouru, pas ses abonnements."""
+        return [a for a in self._pulled_authors if a == reader or a in following]
+
+    def _pushed_of(self, reader, following):
+        return [a for a in (reader, *following) if a not in self._pulled_authors]
+
+    def _pull(self, authors, before=None):
+        """Fusion des listes de posts des auteurs, du plus récent au plus ancien."""
+        lists = (self._by_author.get(author) for author in authors)
+        return heapq.merge(*(_newest_first(ids, before) for ids in lists if ids), reverse=True)
+
+    def _pushed_ids(self, reader, following, before):
+        """
+        Ids du fil matérialisé puis, au-delà de sa fin, des listes de ses
+        auteurs (la liste des auteurs n'est faite qu'à la construction du fil
+        et pour cette lecture profonde).
+        """
+        timeline = self._timelines.get(reader)
+        if timeline is None:
+            authors = self._pushed_of(reader, following)
+            timeline = deque(islice(self._pull(authors), self.size), maxlen=self.size)
+            self._timelines[reader] = timeline
+            self.stats["timeline_builds"] += 1
+        else:
+            self.stats["timeline_hits"] += 1
+
+        start = 0 if before is None else bisect.bisect_right(timeline, -before, key=_negate)
+        yield from islice(timeline, start, None)
+
+        bounds = [b for b in (timeline[-1] if timeline else None, before) if b is not None]
+        older = self._pull(self._pushed_of(reader, following), min(bounds) if bounds else None)
+        first = next(older, None)
+        if first is None:
+            return  # le fil contenait déjà tout
+        self.stats["deep_reads"] += 1  # la lecture dépasse vraiment le fil matérialisé
+        yield first
+        yield from older
+
+    def home_ids(self, username, limit=None, before=None):
+        """
+        Ids des posts du fil "Friends" de `username`, du plus récent au plus
+        ancien : au plus `limit`, et seulement ceux plus anciens que l'id `before`.
+        """
+        reader_id = user_ids.intern(username)
+
+        def reader():
+            self.stats["reads"] += 1
+            following = self._following(reader_id)
+            pulled = self._pulled_of(reader_id, following)
+
+            ids = self._pushed_ids(reader_id, following, before)
+            if pulled:
+                # Comptes très suivis : lus maintenant et fusionnés avec le fil
+                self.stats["hybrid_reads"] += 1
+                ids = _unique(heapq.merge(ids, self._pull(pulled, before), reverse=True))
+            return list(islice(ids, limit))
+
+        return self._read(reader)
+
+    def home_count(self, username):
+        """
+        Nombre de posts du fil "Friends" complet de `username`. La part des
+        auteurs poussés est gardée par lecteur (mise à jour par le fan-out),
+        celle des auteurs lus à la lecture est recalculée.
+        """
+        reader_id = user_ids.intern(username)
+
+        def reader():
+            following = self._following(reader_id)
+            pushed = self._pushed_counts.get(reader_id)
+            if pushed is None:
+                pushed = sum(len(self._by_author.get(a, ())) for a in self._pushed_of(reader_id, following))
+                self._pushed_counts[reader_id] = pushed
+            return pushed + sum(len(self._by_author.get(a, ())) for a in self._pulled_of(reader_id, following))
+        return self._read(reader)
+
+    def iter_home_ids(self, username, before=None, batch=100):
+        """Comme home_ids, mais paresseux : le fil est lu par lots de `batch` ids."""
+        while True:
+            ids = self.home_ids(username, batch, before)
+            yield from ids
+            if len(ids) < batch:
+                return
+            before = ids[-1]
+
+    def metrics(self):
+        """Seuil du mode hybride, compteurs et taux de réussite des lectures."""
+        with self._lock:
+            stats = dict(self.stats)
+            reads = stats["reads"] or 1
+            stats.update(
+                fanout_threshold=self.fanout_threshold,
+                timelines=len(self._timelines) if self._loaded else 0,
+                pulled_authors=len(self._pulled_authors) if self._loaded else 0,
+                timeline_hit_rate=stats["timeline_hits"] / reads,
+                hybrid_read_rate=stats["hybrid_reads"] / reads,
+                deep_read_rate=stats["deep_reads"] / reads,
+            )
+            return stats
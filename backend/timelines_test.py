@@ -0,0 +1,167 @@
+import unittest
+from backend.user import User
+from backend.users_db import UsersDatabase
+from backend.timelines import TimelineService
+from backend.user_ids import user_ids
+from conftest import PostStoreTestCase, make_post
+
+
+class TestTimelineService(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = UsersDatabase(self.path("users.json"))
+        self.users = {}
+        for name in ("ines", "alex", "maria"):
+            self.users[name] = User(name, f"{name}@mail.com", "Pass123!", name.title(), 20, "France")
+            self.db.add_user(self.users[name])
+        self.timelines = TimelineService(self.store, self.db, size=3)
+        User.follow_listeners.append(self.timelines.on_follow_change)
+
+    def tearDown(self):
+        User.follow_listeners.remove(self.timelines.on_follow_change)
+        super().tearDown()
+
+    def post(self, username, content="hello"):
+        return self.store.create(make_post(username, content))["id"]
+
+    def test_fan_out_on_write(self):
+        self.users["ines"].follow(self.users["alex"])
+        first = self.post("alex")
+        self.post("maria")
+        self.assertEqual(self.timelines.home_ids("ines"), [first])
+
+        # Fil construit : les nouveaux posts y sont poussés
+        mine = self.post("ines")
+        second = self.post("alex")
+        self.assertEqual(self.timelines.home_ids("ines"), [second, mine, first])
+        self.assertEqual(self.timelines.home_ids("ines", limit=2), [second, mine])
+        self.assertEqual(self.timelines.home_ids("ines", limit=2, before=mine), [first])
+        self.assertEqual(self.timelines.home_ids("alex"), [second, first])
+
+    def test_deep_reads_only_past_the_timeline(self):
+        self.users["ines"].follow(self.users["alex"])
+        self.post("alex")
+        self.timelines.home_ids("ines", limit=10)  # fil court : rien au-delà
+        self.assertEqual(self.timelines.metrics()["deep_reads"], 0)
+        for _ in range(3):
+            self.post("alex")
+        self.timelines.home_ids("ines", limit=3)
+        self.assertEqual(self.timelines.metrics()["deep_reads"], 0)
+        self.timelines.home_ids("ines", limit=10)  # le 4e post n'est plus dans le fil (size=3)
+        self.assertEqual(self.timelines.metrics()["deep_reads"], 1)
+
+    def test_older_posts_beyond_the_capped_timeline(self):
+        self.users["ines"].follow(self.users["alex"])
+        ids = [self.post("alex") for _ in range(5)]
+        self.assertEqual(self.timelines.home_ids("ines"), ids[::-1])
+        self.assertEqual(self.timelines.home_ids("ines", limit=2, before=ids[2]), [ids[1], ids[0]])
+        self.assertEqual(list(self.timelines.iter_home_ids("ines", batch=2)), ids[::-1])
+        self.assertEqual(list(self.timelines.iter_home_ids("ines", before=ids[3], batch=2)), ids[2::-1])
+
+    def test_follow_unfollow_and_block(self):
+        alex_posts = [self.post("alex") for _ in range(2)]
+        maria_post = self.post("maria")
+        self.assertEqual(self.timelines.home_ids("ines"), [])
+
+        self.users["ines"].follow(self.users["alex"])
+        self.users["ines"].follow(self.users["maria"])
+        self.assertEqual(self.timelines.home_ids("ines"), [maria_post] + alex_posts[::-1])
+
+        self.users["ines"].unfollow(self.users["maria"])
+        self.assertEqual(self.timelines.home_ids("ines"), alex_posts[::-1])
+
+        self.users["alex"].block(self.users["ines"])
+        self.assertEqual(self.timelines.home_ids("ines"), [])
+
+    def test_follow_merges_into_a_full_timeline(self):
+        maria_post = self.post("maria")
+        self.users["ines"].follow(self.users["alex"])
+        alex_posts = [self.post("alex") for _ in range(3)]
+        self.assertEqual(self.timelines.home_ids("ines"), alex_posts[::-1])
+
+        self.users["ines"].follow(self.users["maria"])
+        self.assertEqual(self.timelines.home_ids("ines"), alex_posts[::-1] + [maria_post])
+
+    def test_deleted_posts_leave_the_timeline(self):
+        self.users["ines"].follow(self.users["alex"])
+        post_id = self.post("alex")
+        self.assertEqual(self.timelines.home_ids("ines"), [post_id])
+        self.store.delete(post_id)
+        self.assertEqual(self.timelines.home_ids("ines"), [])
+
+
+class TestHybridTimelines(PostStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = UsersDatabase(self.path("users.json"))
+        self.users = {}
+        for name in ("insa", "ines", "alex", "maria"):
+            self.users[name] = User(name, f"{name}@mail.com", "Pass123!", name.title(), 20, "France")
+            self.db.add_user(self.users[name])
+        self.timelines = TimelineService(self.store, self.db, fanout_threshold=2)
+        User.follow_listeners.append(self.timelines.on_follow_change)
+
+    def tearDown(self):
+        User.follow_listeners.remove(self.timelines.on_follow_change)
+        super().tearDown()
+
+    def post(self, username):
+        return self.store.create(make_post(username, "hello"))["id"]
+
+    def test_popular_accounts_are_pulled_at_read_time(self):
+        for name in ("ines", "alex", "maria"):
+            self.users[name].follow(self.users["insa"])
+        self.users["ines"].follow(self.users["alex"])
+        first = self.post("insa")
+        self.assertEqual(self.timelines.home_ids("ines"), [first])
+
+        mine = self.post("alex")
+        second = self.post("insa")
+        self.assertEqual(self.timelines.home_ids("ines"), [second, mine, first])
+        self.assertEqual(self.timelines.home_ids("ines", limit=1, before=second), [mine])
+        self.assertNotIn(second, self.timelines._timelines[user_ids.get("ines")])
+
+        metrics = self.timelines.metrics()
+        self.assertEqual(metrics["fanout_threshold"], 2)
+        self.assertEqual(metrics["pulled_authors"], 1)
+        self.assertEqual(metrics["pulled_posts"], 1)
+        self.assertEqual(metrics["hybrid_read_rate"], 1.0)
+
+    def test_author_dropping_below_threshold(self):
+        for name in ("ines", "alex", "maria"):
+            self.users[name].follow(self.users["insa"])
+        pulled = self.post("insa")
+        self.assertEqual(self.timelines.home_ids("ines"), [pulled])
+
+        self.users["maria"].unfollow(self.users["insa"])
+        pushed = self.post("insa")
+        self.assertEqual(self.timelines.home_ids("ines"), [pushed, pulled])
+        self.assertEqual(self.timelines.metrics()["pulled_authors"], 0)
+
+    def test_reads_do_not_walk_the_following_list(self):
+        for name in ("ines", "alex", "maria"):
+            self.users[name].follow(self.users["insa"])
+        self.users["ines"].follow(self.users["alex"])
+        ids = [self.post(name) for name in ("insa", "alex", "maria", "insa", "ines")]
+        self.assertEqual(self.timelines.home_count("ines"), len(self.timelines.home_ids("ines")))
+
+        lookups = []
+        get_user = self.db.get_user
+        self.db.get_user = lambda username: lookups.append(username) or get_user(username)
+        try:
+            self.assertEqual(self.timelines.home_ids("ines", limit=2), [ids[4], ids[3]])
+            self.assertEqual(self.timelines.home_count("ines"), 4)
+        finally:
+            del self.db.get_user
+        self.assertEqual(lookups, ["ines", "ines"])  # le lecteur seulement, pas chaque auteur suivi
+
+        self.post("alex")
+        self.assertEqual(self.timelines.home_count("ines"), 5)
+        self.users["ines"].unfollow(self.users["alex"])
+        self.assertEqual(self.timelines.home_count("ines"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,162 @@
 from .notification import *
+from .user_ids import user_ids
 import bcrypt
 
+
+def _username(item):
+    return getattr(item, "username", item)
+
+
+class UsernameSet:
+    """
+    Ensemble de usernames qui garde l'ordre d'insertion (followers, following,
+    blocked_users, pending_requests).
+    S'utilise comme une liste (append, remove, in, len, for, +) mais les tests
+    d'appartenance et les suppressions sont en O(1). Un objet User est ramené
+    à son username.
+    En interne, ce sont les ids entiers du registre (user_ids) qui sont
+    gardés ; ids() les donne directement, sans traduction.
+    """
+
+    __slots__ = ("_items", "_owner", "_name")
+
+    def __init__(self, items=(), owner=None, name=None):
+        self._items = dict.fromkeys(user_ids.intern(_username(i)) for i in items)
+        self._owner = owner
+        self._name = name
+
+    def _changed(self, username, added):
+        if self._owner is not None:
+            self._owner.mark_dirty()
+            self._owner._username_set_changed(self._name, username, added)
+
+    def __contains__(self, item):
+        user_id = user_ids.get(_username(item))
+        return user_id is not None and user_id in self._items
+
+    def __iter__(self):
+        return map(user_ids.username, self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __eq__(self, other):
+        if isinstance(other, (UsernameSet, list, tuple)):
+            return list(self) == [_username(i) for i in other]
+        return NotImplemented
+
+    def __repr__(self):
+        return f"UsernameSet({list(self)!r})"
+
+    def ids(self):
+        """Ids (user_ids) des usernames de l'ensemble, dans l'ordre d'insertion."""
+        return self._items.keys()
+
+    def append(self, item):
+        username = _username(item)
+        user_id = user_ids.intern(username)
+        if user_id not in self._items:
+            self._items[user_id] = None
+            self._changed(username, True)
+
+    add = append
+
+    def remove(self, item):
+        username = _username(item)
+        try:
+            del self._items[user_ids.get(username)]
+        except KeyError:
+            raise ValueError(f"{username!r} not in set") from None
+        self._changed(username, False)
+
+    def discard(self, item):
+        username = _username(item)
+        if self._items.pop(user_ids.get(username), _MISSING) is not _MISSING:
+            self._changed(username, False)
+
+
+_MISSING = object()
+
+
+def _username_set_property(name):
+    """Attribut de User qui convertit toute liste assignée en UsernameSet."""
+    attr = "_" + name
+
+    def getter(self):
+        return getattr(self, attr)
+
+    def setter(self, value):
+        setattr(self, attr, UsernameSet(value, owner=self, name=name))
+        self._relation_changes()[name] = None  # liste remplacée : réécrite en entier
+
+    return property(getter, setter)
+
+
+class MessageList(list):
+    """
+    Notifications gardées dans la fiche User (doublons permis) : append et
+    remove sont notés dans les modifications de l'utilisateur, comme pour
+    UsernameSet, pour n'écrire que les messages ajoutés ou retirés.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, items=(), owner=None):
+        super().__init__(items)
+        self._owner = owner
+
+    def _changed(self, message, added):
+        if self._owner is not None:
+            self._owner.mark_dirty()
+            self._owner._record_change("notifications", message, added)
+
+    def append(self, message):
+        super().append(message)
+        self._changed(message, True)
+
+    def remove(self, message):
+        super().remove(message)
+        self._changed(message, False)
+
+
+def _message_list_property():
+    def getter(self):
+        return self._notifications
+
+    def setter(self, value):
+        self._notifications = MessageList(value, owner=self)
+        self._relation_changes()["notifications"] = None  # liste remplacée : réécrite en entier
+
+    return property(getter, setter)
+
+
 class User:
+    followers = _username_set_property("followers")
+    following = _username_set_property("following")
+    blocked_users = _username_set_property("blocked_users")
+    pending_requests = _username_set_property("pending_requests")
+    notifications = _message_list_property()
+
+    # Abonnés aux changements de `following` (fils d'actualité, recommandations...) :
+    # listener(follower, followee, added), appelé à chaque ajout ou retrait
+    follow_listeners = []
+
+    # Stockage des notifications (NotificationStore) ; sans lui, elles restent dans la fiche
+    notification_store = None
+
+    # Attributs sauvegardés : les modifier marque l'utilisateur comme "dirty"
+    PERSISTED_ATTRS = {
+        "username", "email", "_User__password", "name", "profile_picture", "age",
+        "country", "is_public", "_followers", "_following", "_blocked_users",
+        "_pending_requests", "_notifications",
+    }
+
     def __init__(self, username, email, password, name, age, country, is_public=True, profile_picture = None, hashed=False):
         self.username = username
         self.email = email
@@ -23,6 +178,56 @@ class User:
         self.notifications = []
         self.pending_requests = []
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in User.PERSISTED_ATTRS:
+            self.mark_dirty()
+
+    # --- Suivi des modifications (seuls les utilisateurs modifiés sont sauvegardés) ---
+    def mark_dirty(self):
+        object.__setattr__(self, "_dirty", True)
+        # La base de données qui possède l'utilisateur garde l'ensemble des modifiés
+        sink = getattr(self, "_dirty_sink", None)
+        if sink is not None:
+            sink.add(self)
+
+    def mark_clean(self):
+        object.__setattr__(self, "_dirty", False)
+        object.__setattr__(self, "_relations_changed", {})
+
+    def _relation_changes(self):
+        """
+        Modifications des listes depuis la dernière sauvegarde, pour les bases
+        qui écrivent une ligne par élément : nom de la liste -> liste de
+        (username ou message, ajouté ?), ou None si la liste a été remplacée.
+        """
+        changes = self.__dict__.get("_relations_changed")
+        if changes is None:
+            changes = {}
+            object.__setattr__(self, "_relations_changed", changes)
+        return changes
+
+    def is_dirty(self):
+        return getattr(self, "_dirty", True)
+
+    def _record_change(self, name, value, added):
+        changes = self._relation_changes()
+        if changes.get(name, ()) is not None:
+            changes.setdefault(name, []).append((value, added))
+
+    def _username_set_changed(self, name, username, added):
+        self._record_change(name, username, added)
+        if name == "following":
+            for listener in User.follow_listeners:
+                listener(self.username, username, added)
+
+    def notify(self, message):
+        """Ajoute une notification : dans User.notification_store s'il existe, sinon dans la fiche (à sauvegarder)."""
+        if User.notification_store is not None:
+            User.notification_store.add(self.username, message)
+            return
+        self.notifications.append(message)
+
     def display_info(self):
         print(f"Name: {self.name}, Email: {self.email}, Age: {self.age}, Country: {self.country}")
 
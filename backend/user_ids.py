@@ -0,0 +1,54 @@
+# Identifiants entiers des utilisateurs (structures en mémoire)
+
+import sys
+import threading
+
+
+class UserIdRegistry:
+    """
+    Associe à chaque username un entier dense (0, 1, 2...), attribué à sa
+    première apparition et stable pendant toute la vie du processus.
+
+    Les structures en mémoire (abonnements, fils d'actualité, likes en cache,
+    suggestions) gardent ces entiers au lieu de copies des usernames : un seul
+    exemplaire de chaque username, et des ensembles d'entiers moins coûteux à
+    comparer. Les fichiers et les bases gardent les usernames ; la traduction
+    se fait à leur lecture, et à l'affichage (templates, JSON).
+    """
+
+    def __init__(self):
+        self._ids = {}       # username -> id
+        self._names = []     # id -> username
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, username):
+        return username in self._ids
+
+    def intern(self, username):
+        """Id de `username`, attribué s'il n'en a pas encore."""
+        user_id = self._ids.get(username)
+        if user_id is None:
+            with self._lock:
+                user_id = self._ids.get(username)
+                if user_id is None:
+                    user_id = len(self._names)
+                    self._names.append(sys.intern(username))
+                    self._ids[username] = user_id
+        return user_id
+
+    def get(self, username):
+        """Id de `username`, ou None s'il n'en a pas (sans en attribuer)."""
+        return self._ids.get(username)
+
+    def username(self, user_id):
+        return self._names[user_id]
+
+    def usernames(self, user_ids):
+        return [self._names[i] for i in user_ids]
+
+
+# Registre partagé par tout le processus
+user_ids = UserIdRegistry()
@@ -0,0 +1,35 @@
+import unittest
+from backend.user import User, UsernameSet
+from backend.user_ids import UserIdRegistry, user_ids
+
+
+class TestUserIdRegistry(unittest.TestCase):
+
+    def test_dense_and_stable_ids(self):
+        registry = UserIdRegistry()
+        self.assertEqual([registry.intern(u) for u in ("ines", "alex", "ines")], [0, 1, 0])
+        self.assertEqual(registry.get("alex"), 1)
+        self.assertIsNone(registry.get("maria"))
+        self.assertNotIn("maria", registry)
+        self.assertEqual(registry.username(1), "alex")
+        self.assertEqual(registry.usernames([1, 0]), ["alex", "ines"])
+        self.assertEqual(len(registry), 2)
+
+    def test_username_sets_share_the_registry(self):
+        ines = User("ines", "ines@mail.com", "Pass123!", "Ines", 20, "France")
+        ines.following = ["alex", "maria"]
+        other = UsernameSet(["maria"])
+
+        self.assertEqual(list(ines.following.ids()), [user_ids.get("alex"), user_ids.get("maria")])
+        self.assertEqual(set(ines.following.ids()) & set(other.ids()), {user_ids.get("maria")})
+        self.assertEqual(list(ines.following), ["alex", "maria"])
+
+        # Une recherche ne crée pas d'id
+        self.assertNotIn("unknown-user-xyz", ines.following)
+        self.assertNotIn("unknown-user-xyz", user_ids)
+        with self.assertRaises(ValueError):
+            ines.following.remove("unknown-user-xyz")
+
+
+if __name__ == "__main__":
+    unittest.main()
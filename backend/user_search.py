@@ -0,0 +1,219 @@
+# Index de recherche des utilisateurs (tenus à jour par la base des utilisateurs)
+
+import bisect
+import heapq
+from collections import Counter
+from itertools import islice
+from backend.text import fold
+
+
+class UsernameIndex:
+    """
+    Usernames triés en minuscules : une recherche par préfixe est une
+    recherche dichotomique (bisect) qui donne directement la plage des
+    candidats, sans parcourir tous les utilisateurs.
+
+    Classement par score (search(score=...)) : pour les préfixes courts
+    (au plus RANKED_PREFIX_LEN caractères), dont les plages sont les plus
+    grandes, les RANKED_TOP meilleurs usernames sont calculés une fois puis
+    tenus à jour par add/remove. Pour les préfixes plus longs, seuls les
+    MAX_SCAN premiers candidats de la plage sont classés : le coût d'une
+    recherche ne dépend pas du nombre d'utilisateurs.
+    """
+
+    RANKED_PREFIX_LEN = 2
+    RANKED_TOP = 50
+    MAX_SCAN = 1000
+
+    def __init__(self, usernames=()):
+        self._keys = sorted((u.lower(), u) for u in usernames)
+        self._score = None   # fonction de score des listes de self._ranked
+        self._ranked = {}    # préfixe court -> meilleurs usernames, triés par _rank_key
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, username):
+        key = (username.lower(), username)
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def add(self, username):
+        if username in self:
+            return
+        bisect.insort(self._keys, (username.lower(), username))
+        if self._score is not None:
+            for prefix in self._short_prefixes(username):
+                ranked = self._ranked.get(prefix)
+                if ranked is None:
+                    continue  # calculée à la prochaine recherche
+                ranked.append(username)
+                ranked.sort(key=self._rank_key)
+                del ranked[self.RANKED_TOP:]
+
+    def remove(self, username):
+        key = (username.lower(), username)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+            for prefix in self._short_prefixes(username):
+                ranked = self._ranked.get(prefix)
+                if ranked is not None and username in ranked:
+                    # La liste était peut-être complète : recalculée à la prochaine recherche
+                    del self._ranked[prefix]
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self._keys, (prefix,))
+        hi = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",))
+        return lo, hi
+
+    # --- Classement par score ---
+    def _short_prefixes(self, username):
+        key = username.lower()
+        return [key[:n] for n in range(1, min(len(key), self.RANKED_PREFIX_LEN) + 1)]
+
+    def _rank_key(self, username):
+        # Score décroissant, puis ordre alphabétique
+        return (-self._score(username), username.lower(), username)
+
+    def _set_score(self, score):
+        """Calcule les meilleurs usernames de chaque préfixe court (une fois par fonction de score)."""
+        if self._score is not None and self._score == score:
+            return
+        self._score = score
+        heaps = {}
+        for key, username in self._keys:
+            entry = (self._score(username), username)
+            for n in range(1, min(len(key), self.RANKED_PREFIX_LEN) + 1):
+                heap = heaps.setdefault(key[:n], [])
+                if len(heap) < self.RANKED_TOP:
+                    heapq.heappush(heap, entry)
+                elif entry[0] > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+        self._ranked = {
+            prefix: sorted((u for _, u in heap), key=self._rank_key) for prefix, heap in heaps.items()
+        }
+
+    def _ranked_candidates(self, prefix, lo, hi):
+        """Candidats de la plage [lo, hi) du préfixe, les mieux classés d'abord."""
+        if len(prefix) <= self.RANKED_PREFIX_LEN:
+            ranked = self._ranked.get(prefix)
+            if ranked is None:
+                ranked = heapq.nsmallest(self.RANKED_TOP, (u for _, u in self._keys[lo:hi]), key=self._rank_key)
+                self._ranked[prefix] = ranked
+            if len(ranked) == hi - lo or len(ranked) >= self.RANKED_TOP:
+                return ranked
+        return sorted((u for _, u in self._keys[lo:min(hi, lo + self.MAX_SCAN)]), key=self._rank_key)
+
+    def search(self, prefix, followed=(), limit=10, score=None):
+        """
+        Au plus `limit` usernames qui commencent par `prefix` (sans tenir compte
+        de la casse) : les utilisateurs de `followed` d'abord, puis les autres,
+        chaque groupe par ordre alphabétique.
+        Avec `score` (fonction username -> nombre), chaque groupe est classé par
+        score décroissant (à score égal, ordre alphabétique) : voir la classe
+        pour les candidats examinés.
+        """
+        prefix = prefix.lower()
+        lo, hi = self._range(prefix)
+        if lo == hi:
+            return []
+        if score is not None:
+            self._set_score(score)
+
+        # Utilisateurs suivis : on parcourt le plus petit des deux ensembles (au plus MAX_SCAN)
+        if len(followed) < hi - lo:
+            first = [
+                u for u in islice(followed, self.MAX_SCAN) if u.lower().startswith(prefix) and u in self
+            ]
+        else:
+            first = [u for _, u in self._keys[lo:min(hi, lo + self.MAX_SCAN)] if u in followed]
+        first = sorted(first, key=self._rank_key if score is not None else lambda u: (u.lower(), u))[:limit]
+
+        results = list(first)
+        first = set(first)
+        if score is not None:
+            others = (u for u in self._ranked_candidates(prefix, lo, hi) if u not in first)
+            return results + list(islice(others, limit - len(results)))
+        i = lo
+        while len(results) < limit and i < hi:
+            username = self._keys[i][1]
+            if username not in first:
+                results.append(username)
+            i += 1
+        return results
+
+
+def trigrams(text):
+    """Trigrammes d'un texte normalisé (minuscules, sans accents), avec un espace autour."""
+    text = " ".join(fold(text or "").split())
+    if not text:
+        return frozenset()
+    text = f" {text} "
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class TrigramIndex:
+    """
+    Index des trigrammes (groupes de 3 caractères) du username et du nom de
+    chaque utilisateur, pour une recherche tolérante aux fautes de frappe
+    ("Did you mean"). Seuls les utilisateurs qui partagent des trigrammes avec
+    la recherche sont examinés ; le score est la similarité de Jaccard avec le
+    username ou le nom (le meilleur des deux).
+    """
+
+    MIN_SIMILARITY = 0.3
+    MAX_CANDIDATES = 50
+
+    def __init__(self, users=()):
+        self._postings = {}   # trigramme -> usernames
+        self._fields = {}     # username -> (trigrammes du username, trigrammes du nom)
+        for username, name in users:
+            self.add(username, name)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def add(self, username, name):
+        """Ajoute un utilisateur, ou le met à jour si son nom a changé."""
+        fields = (trigrams(username), trigrams(name))
+        if self._fields.get(username) == fields:
+            return
+        self.remove(username)
+        self._fields[username] = fields
+        for gram in fields[0] | fields[1]:
+            self._postings.setdefault(gram, set()).add(username)
+
+    def remove(self, username):
+        fields = self._fields.pop(username, None)
+        if fields is None:
+            return
+        for gram in fields[0] | fields[1]:
+            users = self._postings[gram]
+            users.discard(username)
+            if not users:
+                del self._postings[gram]
+
+    def search(self, query, limit=5, exclude=()):
+        """Usernames les plus proches de `query`, du plus au moins similaire."""
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        scored = []
+        for username, _ in shared.most_common(self.MAX_CANDIDATES):
+            if username in exclude:
+                continue
+            score = max(_similarity(grams, field) for field in self._fields[username])
+            if score >= self.MIN_SIMILARITY:
+                scored.append((-score, username))
+        scored.sort()
+        return [username for _, username in scored[:limit]]
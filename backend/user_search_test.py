@@ -0,0 +1,122 @@
+import unittest
+from backend.user import User
+from backend.users_db import UsersDatabase
+from backend.users_sqlite import SQLiteUsersDatabase
+from backend.user_search import UsernameIndex, TrigramIndex
+from conftest import TempDirTestCase
+
+
+class TestUsernameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = UsernameIndex(["alex", "Alice", "albert", "bob", "alain", "maria"])
+
+    def test_prefix_search(self):
+        self.assertEqual(self.index.search("AL"), ["alain", "albert", "alex", "Alice"])
+        self.assertEqual(self.index.search("al", limit=2), ["alain", "albert"])
+        self.assertEqual(self.index.search("z"), [])
+
+    def test_followed_users_first(self):
+        self.assertEqual(self.index.search("al", followed={"alex", "bob"}), ["alex", "alain", "albert", "Alice"])
+        # Plus d'utilisateurs suivis que de candidats : on parcourt la plage
+        followed = {"Alice", "bob", "maria", "zoe", "yann"}
+        self.assertEqual(self.index.search("ali", followed=followed), ["Alice"])
+        # Un utilisateur suivi qui n'existe plus n'est pas proposé
+        self.assertEqual(self.index.search("alw", followed={"alwin"}), [])
+
+    def test_ranked_over_whole_prefix_range(self):
+        influence = {"Alice": 5.0, "alain": 0.5, "alex": 2.0}.get
+        score = lambda u: influence(u, 0.0)
+        self.assertEqual(self.index.search("al", limit=2, score=score), ["Alice", "alex"])
+        self.assertEqual(self.index.search("al", followed={"albert", "alain"}, limit=3, score=score),
+                         ["alain", "albert", "Alice"])
+        self.assertEqual(self.index.search("al", followed={"alex"}, limit=1, score=score), ["alex"])
+
+    def test_ranked_lists_follow_add_remove(self):
+        scores = {"Alice": 5.0, "alex": 2.0}
+        score = lambda u: scores.get(u, 0.0)
+        self.assertEqual(self.index.search("a", limit=2, score=score), ["Alice", "alex"])
+        scores["alba"] = 9.0
+        self.index.add("alba")
+        self.assertEqual(self.index.search("a", limit=2, score=score), ["alba", "Alice"])
+        self.index.remove("Alice")
+        self.assertEqual(self.index.search("al", limit=2, score=score), ["alba", "alex"])
+
+    def test_ranking_scans_a_bounded_window(self):
+        index = UsernameIndex([f"user{i:04}" for i in range(30)])
+        index.MAX_SCAN = 10
+        calls = []
+        score = lambda u: calls.append(u) or int(u[-2:])
+        # Préfixe long : seuls les MAX_SCAN premiers candidats sont classés
+        self.assertEqual(index.search("user", limit=2, score=score), ["user0009", "user0008"])
+        # Préfixe court : listes calculées une fois, la recherche ne rappelle pas score
+        calls.clear()
+        self.assertEqual(index.search("u", limit=2, score=score), ["user0029", "user0028"])
+        self.assertEqual(calls, [])
+
+    def test_add_remove(self):
+        self.index.add("alba")
+        self.index.add("alba")
+        self.index.remove("alex")
+        self.index.remove("nobody")
+        self.assertEqual(self.index.search("al"), ["alain", "alba", "albert", "Alice"])
+        self.assertEqual(len(self.index), 6)
+
+
+class TestTrigramIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex([
+            ("ines", "Inés Martin"), ("alexandre", "Alex Dupont"), ("maria", "María López"), ("bob", None),
+        ])
+
+    def test_typo_tolerant_search(self):
+        self.assertEqual(self.index.search("alexandr")[0], "alexandre")
+        self.assertEqual(self.index.search("inse martin"), ["ines"])
+        self.assertEqual(self.index.search("LOPEZ"), ["maria"])
+        self.assertEqual(self.index.search("zzzz"), [])
+        self.assertEqual(self.index.search("alexandre", exclude={"alexandre"}), [])
+
+    def test_incremental_updates(self):
+        self.index.add("ines", "Inès Durand")
+        self.assertEqual(self.index.search("durand"), ["ines"])
+        self.assertEqual(self.index.search("martin"), [])
+        self.index.remove("ines")
+        self.assertEqual(self.index.search("durand"), [])
+        self.assertEqual(len(self.index), 3)
+
+
+class TestDatabasesKeepIndex(TempDirTestCase):
+
+    def check(self, db):
+        db.add_user(User("ines", "ines@mail.com", "Pass123!", "Inés", 20, "Andorra"))
+        db.add_user(User("inna", "inna@mail.com", "Pass321!", "Inna", 19, "Miami"))
+        self.assertEqual(db.username_index.search("in"), ["ines", "inna"])
+        db.remove_user("ines")
+        self.assertEqual(db.username_index.search("in"), ["inna"])
+        self.assertEqual(db.trigram_index.search("ines"), [])
+
+        # Modification du profil : le nom est réindexé à la sauvegarde
+        inna = db.get_user("inna")
+        inna.name = "Inna Karlsson"
+        db.save_user(inna)
+        self.assertEqual(db.trigram_index.search("karlson"), ["inna"])
+
+    def test_json_database(self):
+        db_file = self.path("users.json")
+        self.check(UsersDatabase(db_file))
+        self.assertEqual(UsersDatabase(db_file).username_index.search("i"), ["inna"])
+        self.assertEqual(UsersDatabase(db_file).trigram_index.search("karlsson"), ["inna"])
+
+    def test_sqlite_database(self):
+        db = SQLiteUsersDatabase(self.path("users.sqlite3"))
+        self.check(db)
+        db.conn.close()
+        db = SQLiteUsersDatabase(self.path("users.sqlite3"))
+        self.assertEqual(db.username_index.search("i"), ["inna"])
+        self.assertEqual(db.trigram_index.search("karlsson"), ["inna"])
+        db.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from backend.user import User, UsernameSet
+from backend.users_db import UsersDatabase
+from conftest import TempDirTestCase
+
+
+class TestUsernameSet(unittest.TestCase):
+
+    def test_behaves_like_a_list(self):
+        s = UsernameSet(["alex", "maria", "alex"])
+        s.append("ines")
+        self.assertEqual(list(s), ["alex", "maria", "ines"])
+        self.assertIn("maria", s)
+        self.assertEqual(len(s), 3)
+        self.assertEqual(s + ["bob"], ["alex", "maria", "ines", "bob"])
+        self.assertEqual(s, ["alex", "maria", "ines"])
+        s.remove("maria")
+        self.assertNotIn("maria", s)
+        with self.assertRaises(ValueError):
+            s.remove("maria")
+
+
+class TestUserSocialGraph(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ines = User("ines", "ines@mail.com", "Pass123!", "Inés", 20, "Andorra")
+        self.alex = User("alex", "alex@mail.com", "Pass321!", "Alex", 19, "Miami")
+
+    def test_follow_block_unfollow(self):
+        self.ines.follow(self.alex)
+        self.assertTrue(self.ines.follows(self.alex))
+        self.assertIn("ines", self.alex.followers)
+        self.assertEqual(list(self.ines.followers), [])
+
+        self.alex.block(self.ines)
+        self.assertFalse(self.ines.follows(self.alex))
+        self.assertTrue(self.alex.blocks(self.ines))
+        self.ines.follow(self.alex)
+        self.assertFalse(self.ines.follows(self.alex))
+
+    def test_follow_is_one_way(self):
+        # Avant : NewFollowerNotification.send ajoutait aussi l'abonnement inverse
+        events = []
+        User.follow_listeners.append(lambda *event: events.append(event))
+        try:
+            self.ines.follow(self.alex)
+        finally:
+            User.follow_listeners.pop()
+        self.assertEqual(events, [("ines", "alex", True)])
+        self.assertEqual(list(self.alex.following), [])
+        self.assertEqual(list(self.ines.followers), [])
+
+    def test_user_objects_are_stored_as_usernames(self):
+        self.alex.is_public = False
+        self.ines.follow(self.alex)
+        self.assertEqual(list(self.alex.pending_requests), ["ines"])
+        self.assertEqual(self.alex.to_dict()["pending_requests"], ["ines"])
+
+    def test_json_round_trip(self):
+        db = UsersDatabase(self.path("users.json"))
+        db.add_user(self.ines)
+        db.add_user(self.alex)
+        self.ines.follow(self.alex)
+        db.save_users()
+
+        reloaded = UsersDatabase(db.db_file)
+        alex = reloaded.get_user("alex")
+        self.assertIsInstance(alex.followers, UsernameSet)
+        self.assertEqual(alex.to_dict()["followers"], ["ines"])
+        self.assertTrue(reloaded.get_user("ines").follows(alex))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,21 +2,86 @@
 
 import json
 import os
+import threading
+from collections import Counter
 from backend.user import *  # module user.py qui contient la classe User
 from backend.change_password import SecureUser
+from backend.storage import read_jsonl, atomic_write_json, GroupCommitWriter
+from backend.user_search import UsernameIndex, TrigramIndex
 
 class UsersDatabase:
-    def __init__(self, db_file='users_database.json'):
+    """
+    Base des utilisateurs : un snapshot JSON (users_database.json) et un
+    journal JSONL des enregistrements modifiés depuis le dernier snapshot.
+    save_users() n'ajoute au journal que les utilisateurs marqués "dirty" ;
+    le snapshot est réécrit tous les `compact_every` enregistrements.
+    """
+
+    COMPACT_EVERY = 1000
+
+    def __init__(self, db_file='users_database.json', journal_file=None, compact_every=COMPACT_EVERY):
         self.db_file = db_file
+        if journal_file is None:
+            journal_file = os.path.splitext(db_file)[0] + ".journal.jsonl"
+        self.journal_file = journal_file
+        self.writer = GroupCommitWriter(journal_file)
+        self._lock = threading.RLock()
+        self.compact_every = compact_every
+        self.journal_records = 0
+        self._dirty_users = set()
+        self._removed_usernames = set()
         self.users_list = self.load_users()
-        self.usernames_list = self.get_usernames()
+
+    # Index en mémoire : username -> User, email (minuscules) -> User
+    # usernames triés pour la recherche par préfixe et trigrammes pour la recherche approchée
+    @property
+    def users_list(self):
+        return list(self._users_by_name.values())
+
+    @users_list.setter
+    def users_list(self, users):
+        self._users_by_name = {}
+        self._users_by_email = {}
+        self.username_index = UsernameIndex()
+        self.trigram_index = TrigramIndex()
+        for u in users:
+            self._index_user(u)
+
+    @property
+    def usernames_list(self):
+        return list(self._users_by_name)
+
+    @usernames_list.setter
+    def usernames_list(self, usernames):
+        usernames = set(usernames)
+        self.users_list = [u for u in self._users_by_name.values() if u.username in usernames]
+
+    def _index_user(self, u):
+        self._users_by_name[u.username] = u
+        self.username_index.add(u.username)
+        self.trigram_index.add(u.username, u.name)
+        u._dirty_sink = self._dirty_users
+        if u.is_dirty():
+            self._dirty_users.add(u)
+        if u.email:
+            self._users_by_email.setdefault(u.email.lower(), u)
+
+    def _unindex_user(self, u):
+        del self._users_by_name[u.username]
+        self.username_index.remove(u.username)
+        self.trigram_index.remove(u.username)
+        u._dirty_sink = None
+        self._dirty_users.discard(u)
+        if u.email and self._users_by_email.get(u.email.lower()) is u:
+            del self._users_by_email[u.email.lower()]
 
     def new_database(self):
-        if os.path.exists(self.db_file):
-            os.remove(self.db_file)
+        for path in (self.db_file, self.journal_file):
+            if os.path.exists(path):
+                os.remove(path)
         self.users_list = []
-        self.usernames_list = []
-        self.save_users()
+        self._removed_usernames = set()
+        self.compact()
     
     def show_users(self):
         print("Current users in the database:")
@@ -27,85 +92,157 @@ class UsersDatabase:
             )
 
     def load_users(self):
-        users_list = []
+        records = {}
         if os.path.exists(self.db_file):
             with open(self.db_file, 'r', encoding="utf-8") as file:
-                json_file = json.load(file)
-            for username_item, data in json_file.items():
-                image = json_file[username_item].get('profile_picture', None)
-                email = json_file[username_item]['email']
-                password = json_file[username_item]['password']
-                name = json_file[username_item]['name']
-                age = json_file[username_item]['age']
-                country = json_file[username_item]['country']
-                is_public = data.get('is_public', True)
-
-                # listes sérialisables dans le JSON (usernames)
-                followers = data.get('followers', [])
-                following = data.get('following', [])
-                blocked_users = data.get('blocked_users', [])
-                pending_requests = data.get('pending_requests', [])
-                notifications = data.get('notifications', [])
-
-                # on recrée l'objet User
-                user_new = SecureUser(username_item, email, password, name, age, country, is_public, profile_picture=image, hashed=True)
-
-                # on réinjecte les listes (listes de usernames)
-                user_new.followers = followers
-                user_new.following = following
-                user_new.blocked_users = blocked_users
-                user_new.pending_requests = pending_requests
-                user_new.notifications = notifications
-
-                users_list.append(user_new)
-            
-        return users_list
-    
+                records = json.load(file)
+
+        # on rejoue le journal : dernière version de chaque utilisateur modifié
+        journal = read_jsonl(self.journal_file)
+        self.journal_records = len(journal)
+        for record in journal:
+            if record.get("deleted"):
+                records.pop(record["username"], None)
+            else:
+                records[record["username"]] = record["user"]
+
+        return [self._user_from_record(username, data) for username, data in records.items()]
+
+    @staticmethod
+    def _user_from_record(username_item, data):
+        image = data.get('profile_picture', None)
+        email = data['email']
+        password = data['password']
+        name = data['name']
+        age = data['age']
+        country = data['country']
+        is_public = data.get('is_public', True)
+
+        # on recrée l'objet User
+        user_new = SecureUser(username_item, email, password, name, age, country, is_public, profile_picture=image, hashed=True)
+
+        # on réinjecte les listes sérialisables dans le JSON (usernames)
+        user_new.followers = data.get('followers', [])
+        user_new.following = data.get('following', [])
+        user_new.blocked_users = data.get('blocked_users', [])
+        user_new.pending_requests = data.get('pending_requests', [])
+        user_new.notifications = data.get('notifications', [])
+
+        user_new.mark_clean()
+        return user_new
+
     def get_usernames(self):
-        return [u.username for u in self.users_list]
+        return list(self._users_by_name)
     
     def save_users(self):
         """
-        Sauvegarde les utilisateurs dans le JSON en ne stockant
-        que des types sérialisables (str, int, bool, listes, dict).
+        Ajoute au journal les utilisateurs modifiés (et les suppressions)
+        depuis la dernière sauvegarde, en ne stockant que des types
+        sérialisables (str, int, bool, listes, dict).
         """
-        users_dict = {}
+        with self._lock:
+            records = [{"username": username, "deleted": True} for username in self._removed_usernames]
+            dirty = list(self._dirty_users)
+            records += [{"username": user.username, "user": user.to_dict()} for user in dirty]
+            if not records:
+                return
+
+            ticket = self.writer.submit(records)
+            self.journal_records += len(records)
+            self._removed_usernames.clear()
+            for user in dirty:
+                self.trigram_index.add(user.username, user.name)  # le nom a pu changer
+                user.mark_clean()
+                self._dirty_users.discard(user)
 
-        for user in self.users_list : 
-            users_dict[user.username] = user.to_dict()
+            if self.journal_records >= self.compact_every:
+                self.compact()
+        self.writer.wait(ticket)
 
-        with open(self.db_file, 'w', encoding="utf-8") as file:
-            json.dump(users_dict, file, indent=4)
+    def save_user(self, user):
+        """Sauvegarde après la modification d'un utilisateur (seuls les modifiés sont écrits)."""
+        self.save_users()
+
+    def compact(self):
+        """Réécrit tout le snapshot JSON (de façon atomique) et vide le journal."""
+        with self._lock:
+            users_dict = {}
+            for user in self._users_by_name.values():
+                users_dict[user.username] = user.to_dict()
+
+            self.writer.flush()
+            atomic_write_json(self.db_file, users_dict)
+            self.writer.truncate()
+            self.journal_records = 0
+            self._removed_usernames.clear()
+            for user in list(self._dirty_users):
+                user.mark_clean()
+            self._dirty_users.clear()
 
     def add_user(self, u):
-        if u.username in self.usernames_list:
-            raise ValueError("Username already exists")
-        self.users_list.append(u)
-        self.usernames_list.append(u.username)
+        with self._lock:
+            if u.username in self._users_by_name:
+                raise ValueError("Username already exists")
+            u.mark_dirty()
+            self._index_user(u)
+            self._removed_usernames.discard(u.username)
         self.save_users()
 
     def remove_user(self, username):
-        if username not in self.usernames_list:
-            raise ValueError("User does not exist")
-        self.users_list.remove(self.get_user(username))
-        self.usernames_list.remove(username)
+        with self._lock:
+            if username not in self._users_by_name:
+                raise ValueError("User does not exist")
+            self._unindex_user(self._users_by_name[username])
+            self._removed_usernames.add(username)
         self.save_users()
 
     def get_user(self, username):
-        if username in self.usernames_list:
-            idx = self.usernames_list.index(username)
-            return self.users_list[idx]
-        return None
+        return self._users_by_name.get(username)
+
+    def get_user_by_email(self, email):
+        if not email:
+            return None
+        return self._users_by_email.get(email.lower())
+
+    def update_email(self, username, new_email):
+        """Change l'email d'un utilisateur en gardant l'index à jour."""
+        user = self._users_by_name.get(username)
+        if user is None:
+            raise ValueError("User does not exist")
+        owner = self.get_user_by_email(new_email)
+        if owner is not None and owner is not user:
+            raise ValueError("Email already exists")
+        self._unindex_user(user)
+        user.email = new_email
+        self._index_user(user)
+        self.save_user(user)
 
     def authenticate_user(self, username, password):
-        if username in self.usernames_list:
-            user_obj = self.get_user(username)
-            if user_obj and user_obj.check_password(password):
-                return True
+        user_obj = self.get_user(username)
+        if user_obj and user_obj.check_password(password):
+            return True
         return False
     
     def unique_user(self, username):
-        return username not in self.usernames_list
+        return username not in self._users_by_name
 
     def get_all_users(self):
         return self.users_list
+
+    # --- Requêtes sur toute la base (mêmes méthodes que SQLiteUsersDatabase) ---
+    def users_with_notifications(self):
+        """Utilisateurs qui ont encore des notifications dans leur fiche."""
+        return [u for u in self.users_list if getattr(u, "notifications", None)]
+
+    def follower_counts(self):
+        """username -> nombre de comptes qui le suivent (d'après les listes "following")."""
+        counts = Counter()
+        for u in self.users_list:
+            counts.update(u.following)
+        return dict(counts)
+
+    def popular_usernames(self):
+        """Comptes publics, du plus suivi (liste "followers") au moins suivi, puis par ordre alphabétique."""
+        users = [u for u in self.users_list if getattr(u, "is_public", False)]
+        users.sort(key=lambda u: (-len(u.followers), u.username))
+        return [u.username for u in users]
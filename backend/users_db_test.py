@@ -0,0 +1,103 @@
+import os
+import unittest
+from backend.user import User
+from backend.users_db import UsersDatabase
+from conftest import TempDirTestCase
+
+
+class TestUsersDatabaseIndexes(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db_file = self.path("users.json")
+        self.db = UsersDatabase(self.db_file)
+        self.ines = User("ines", "Ines@Mail.com", "Pass123!", "Inés", 20, "Andorra")
+        self.alex = User("alex", "alex@mail.com", "Pass321!", "Alex", 19, "Miami")
+        self.db.add_user(self.ines)
+        self.db.add_user(self.alex)
+
+    def test_lookups(self):
+        self.assertIs(self.db.get_user("ines"), self.ines)
+        self.assertIsNone(self.db.get_user("Ines"))
+        self.assertIs(self.db.get_user_by_email("ines@mail.com"), self.ines)
+        self.assertIs(self.db.get_user_by_email("ALEX@mail.com"), self.alex)
+        self.assertIsNone(self.db.get_user_by_email("nobody@mail.com"))
+        self.assertEqual(self.db.usernames_list, ["ines", "alex"])
+
+    def test_indexes_follow_add_remove_and_edit(self):
+        self.db.remove_user("ines")
+        self.assertIsNone(self.db.get_user("ines"))
+        self.assertIsNone(self.db.get_user_by_email("ines@mail.com"))
+
+        self.db.update_email("alex", "alexandre@mail.com")
+        self.assertIsNone(self.db.get_user_by_email("alex@mail.com"))
+        self.assertIs(self.db.get_user_by_email("alexandre@mail.com"), self.alex)
+
+        maria = User("maria", "maria@mail.com", "Pass231!", "María", 21, "Spain")
+        self.db.add_user(maria)
+        with self.assertRaises(ValueError):
+            self.db.update_email("alex", "MARIA@mail.com")
+
+        reloaded = UsersDatabase(self.db_file)
+        self.assertEqual(reloaded.get_user_by_email("alexandre@mail.com").username, "alex")
+        self.assertEqual(reloaded.get_usernames(), ["alex", "maria"])
+
+    def test_list_assignment_rebuilds_indexes(self):
+        self.db.users_list = []
+        self.assertTrue(self.db.unique_user("ines"))
+        self.assertIsNone(self.db.get_user_by_email("alex@mail.com"))
+
+
+class TestUsersDatabaseJournal(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db_file = self.path("users.json")
+        self.db = UsersDatabase(self.db_file)
+        self.db.add_user(User("ines", "ines@mail.com", "Pass123!", "Inés", 20, "Andorra"))
+        self.db.add_user(User("alex", "alex@mail.com", "Pass321!", "Alex", 19, "Miami"))
+        self.db.add_user(User("maria", "maria@mail.com", "Pass231!", "María", 21, "Spain"))
+
+    def journal_lines(self):
+        with open(self.db.journal_file, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_only_changed_users_are_written(self):
+        before = len(self.journal_lines())
+        self.db.get_user("alex").notify("ines liked your post")
+        self.db.save_users()
+        self.db.save_users()
+        lines = self.journal_lines()[before:]
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"alex"', lines[0])
+
+        self.db.get_user("ines").follow(self.db.get_user("maria"))
+        self.db.save_users()
+        self.assertEqual(len(self.journal_lines()), before + 3)
+
+        reloaded = UsersDatabase(self.db_file)
+        self.assertEqual(reloaded.get_user("alex").notifications, ["ines liked your post"])
+        self.assertTrue(reloaded.get_user("ines").follows(reloaded.get_user("maria")))
+        self.assertEqual(reloaded.get_usernames(), ["ines", "alex", "maria"])
+
+    def test_removal_and_compaction(self):
+        self.db.remove_user("alex")
+        self.assertIsNone(UsersDatabase(self.db_file).get_user("alex"))
+
+        self.db.compact()
+        self.assertEqual(self.journal_lines(), [])
+        reloaded = UsersDatabase(self.db_file)
+        self.assertEqual(reloaded.get_usernames(), ["ines", "maria"])
+        self.assertFalse(any(u.is_dirty() for u in reloaded.get_all_users()))
+
+    def test_automatic_compaction(self):
+        db = UsersDatabase(self.path("small.json"), compact_every=2)
+        db.add_user(User("ines", "ines@mail.com", "Pass123!", "Inés", 20, "Andorra"))
+        db.get_user("ines").name = "Inès"
+        db.save_users()
+        self.assertEqual(os.path.getsize(db.journal_file), 0)
+        self.assertEqual(UsersDatabase(db.db_file).get_user("ines").name, "Inès")
+
+
+if __name__ == "__main__":
+    unittest.main()
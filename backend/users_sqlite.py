@@ -0,0 +1,274 @@
+# Base de données des utilisateurs stockée dans SQLite (alternative à users_database.json)
+
+import sqlite3
+import threading
+from backend.change_password import SecureUser
+from backend.user_search import UsernameIndex, TrigramIndex
+
+# Tables des listes de chaque utilisateur (une ligne par élément, ordre = rowid)
+RELATION_TABLES = ("followers", "following", "blocked_users", "pending_requests", "notifications")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username        TEXT PRIMARY KEY,
+    username_lower  TEXT NOT NULL,
+    email           TEXT NOT NULL,
+    email_lower     TEXT NOT NULL,
+    password        TEXT NOT NULL,
+    name            TEXT,
+    profile_picture TEXT,
+    age             INTEGER,
+    country         TEXT,
+    is_public       INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users(username_lower);
+CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users(email_lower);
+""" + "".join(
+    f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+    value    TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_{table}_username;
+CREATE INDEX IF NOT EXISTS idx_{table}_username_value ON {table}(username, value);
+"""
+    for table in RELATION_TABLES
+)
+
+
+class SQLiteUsersDatabase:
+    """
+    Même API publique que UsersDatabase (add_user, remove_user, get_user,
+    get_all_users, authenticate_user, unique_user, save_users), mais chaque
+    écriture ne touche que les lignes de l'utilisateur concerné.
+
+    Les utilisateurs sont chargés à la demande puis gardés en mémoire, pour que
+    get_user renvoie toujours le même objet (comme avec le fichier JSON).
+    """
+
+    def __init__(self, db_file='users_database.sqlite3', json_file=None):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._users = {}
+        self._dirty_users = set()
+
+        # Premier démarrage : on importe l'ancien fichier JSON s'il existe
+        if json_file and not self.get_usernames():
+            self.import_json(json_file)
+        else:
+            self._build_search_indexes()
+
+    def import_json(self, json_file):
+        from backend.users_db import UsersDatabase
+        with self._lock, self.conn:
+            for user in UsersDatabase(json_file).get_all_users():
+                self._write_user(user, full=True)
+        self._build_search_indexes()
+
+    def _build_search_indexes(self):
+        # Usernames triés (recherche par préfixe) et trigrammes (recherche approchée) en mémoire
+        self.username_index = UsernameIndex(self.get_usernames())
+        self.trigram_index = TrigramIndex(self.conn.execute("SELECT username, name FROM users"))
+
+    def new_database(self):
+        with self._lock, self.conn:
+            for table in RELATION_TABLES + ("users",):
+                self.conn.execute(f"DELETE FROM {table}")
+        self._users = {}
+        self._dirty_users = set()
+        self._build_search_indexes()
+
+    def show_users(self):
+        print("Current users in the database:")
+        for u in self.get_all_users():
+            print(
+                f"Username: {u.username}, Email: {u.email}, "
+                f"Name: {u.name}, Age: {u.age}, Country: {u.country}"
+            )
+
+    # --- Lecture ---
+    def _load_user(self, username):
+        row = self.conn.execute(
+            "SELECT username, email, password, name, age, country, is_public, profile_picture "
+            "FROM users WHERE username = ?",
+            (username,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        username, email, password, name, age, country, is_public, image = row
+        user = SecureUser(username, email, password, name, age, country, bool(is_public), profile_picture=image, hashed=True)
+        for table in RELATION_TABLES:
+            values = [
+                v for (v,) in self.conn.execute(
+                    f"SELECT value FROM {table} WHERE username = ? ORDER BY rowid", (username,)
+                )
+            ]
+            setattr(user, table, values)
+        user.mark_clean()
+        return user
+
+    def _cache_user(self, user):
+        self._users[user.username] = user
+        user._dirty_sink = self._dirty_users
+        if user.is_dirty():
+            self._dirty_users.add(user)
+
+    def get_user(self, username):
+        with self._lock:
+            user = self._users.get(username)
+            if user is None:
+                user = self._load_user(username)
+                if user is not None:
+                    self._cache_user(user)
+            return user
+
+    def get_user_by_email(self, email):
+        if not email:
+            return None
+        row = self.conn.execute(
+            "SELECT username FROM users WHERE email_lower = ? ORDER BY rowid LIMIT 1", (email.lower(),)
+        ).fetchone()
+        return self.get_user(row[0]) if row else None
+
+    def get_usernames(self):
+        return [u for (u,) in self.conn.execute("SELECT username FROM users ORDER BY rowid")]
+
+    def get_all_users(self):
+        return [self.get_user(u) for u in self.get_usernames()]
+
+    @property
+    def users_list(self):
+        return self.get_all_users()
+
+    # --- Requêtes sur toute la base (sans charger les utilisateurs) ---
+    def users_with_notifications(self):
+        """Utilisateurs qui ont encore des notifications dans leur fiche."""
+        self.save_users()
+        rows = self.conn.execute("SELECT DISTINCT username FROM notifications").fetchall()
+        return [self.get_user(u) for (u,) in rows]
+
+    def follower_counts(self):
+        """username -> nombre de comptes qui le suivent (d'après les listes "following")."""
+        self.save_users()
+        return dict(self.conn.execute("SELECT value, COUNT(*) FROM following GROUP BY value"))
+
+    def popular_usernames(self):
+        """Comptes publics, du plus suivi (liste "followers") au moins suivi, puis par ordre alphabétique."""
+        self.save_users()
+        return [u for (u,) in self.conn.execute(
+            "SELECT u.username FROM users u LEFT JOIN followers f ON f.username = u.username "
+            "WHERE u.is_public = 1 GROUP BY u.username ORDER BY COUNT(f.value) DESC, u.username"
+        )]
+
+    @property
+    def usernames_list(self):
+        return self.get_usernames()
+
+    # --- Écriture ---
+    def _write_user(self, user, full=False):
+        """
+        Écrit la ligne de l'utilisateur, puis seulement les éléments ajoutés ou
+        retirés de ses listes depuis la dernière sauvegarde (une ligne chacun).
+        Une liste remplacée en entier, ou `full`, est réécrite.
+        """
+        self.conn.execute(
+            "INSERT INTO users "
+            "(username, username_lower, email, email_lower, password, name, profile_picture, age, country, is_public) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(username) DO UPDATE SET "
+            "email = excluded.email, email_lower = excluded.email_lower, password = excluded.password, "
+            "name = excluded.name, profile_picture = excluded.profile_picture, age = excluded.age, "
+            "country = excluded.country, is_public = excluded.is_public",
+            (
+                user.username, user.username.lower(), user.email, user.email.lower(),
+                user.get_password(), user.name, user.profile_picture, user.age,
+                user.country, int(getattr(user, "is_public", True)),
+            ),
+        )
+        changes = user._relation_changes()
+        for table in RELATION_TABLES:
+            if full or table in changes and changes[table] is None:
+                self._rewrite(table, user.username, getattr(user, table))
+                continue
+            for value, added in changes.get(table, ()):
+                if added:
+                    self.conn.execute(f"INSERT INTO {table} (username, value) VALUES (?, ?)", (user.username, str(value)))
+                else:
+                    # Une seule ligne : les notifications peuvent avoir des doublons
+                    self.conn.execute(
+                        f"DELETE FROM {table} WHERE rowid = "
+                        f"(SELECT rowid FROM {table} WHERE username = ? AND value = ? ORDER BY rowid LIMIT 1)",
+                        (user.username, str(value)),
+                    )
+
+    def _rewrite(self, table, username, values):
+        self.conn.execute(f"DELETE FROM {table} WHERE username = ?", (username,))
+        self.conn.executemany(
+            f"INSERT INTO {table} (username, value) VALUES (?, ?)",
+            [(username, str(value)) for value in values],
+        )
+
+    def save_user(self, user):
+        """Sauvegarde après la modification d'un utilisateur (seuls les modifiés sont écrits)."""
+        self.save_users()
+
+    def save_users(self):
+        with self._lock, self.conn:
+            for user in list(self._dirty_users):
+                self._write_user(user)
+                self.trigram_index.add(user.username, user.name)  # le nom a pu changer
+                user.mark_clean()
+            self._dirty_users.clear()
+
+    def add_user(self, u):
+        with self._lock:
+            if not self.unique_user(u.username):
+                raise ValueError("Username already exists")
+            with self.conn:
+                self._write_user(u, full=True)
+            u.mark_clean()
+            self._cache_user(u)
+            self.username_index.add(u.username)
+            self.trigram_index.add(u.username, u.name)
+
+    def remove_user(self, username):
+        with self._lock:
+            if self.unique_user(username):
+                raise ValueError("User does not exist")
+            with self.conn:
+                self.conn.execute("DELETE FROM users WHERE username = ?", (username,))
+            self.username_index.remove(username)
+            self.trigram_index.remove(username)
+            user = self._users.pop(username, None)
+            if user is not None:
+                user._dirty_sink = None
+                self._dirty_users.discard(user)
+
+    def update_email(self, username, new_email):
+        with self._lock:
+            user = self.get_user(username)
+            if user is None:
+                raise ValueError("User does not exist")
+            owner = self.get_user_by_email(new_email)
+            if owner is not None and owner is not user:
+                raise ValueError("Email already exists")
+            user.email = new_email
+            self.save_user(user)
+
+    def authenticate_user(self, username, password):
+        user_obj = self.get_user(username)
+        if user_obj and user_obj.check_password(password):
+            return True
+        return False
+
+    def unique_user(self, username):
+        if username in self._users:
+            return False
+        row = self.conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone()
+        return row is None
@@ -0,0 +1,119 @@
+import unittest
+from backend.user import User
+from backend.users_db import UsersDatabase
+from backend.users_sqlite import SQLiteUsersDatabase
+from conftest import TempDirTestCase
+
+
+class TestSQLiteUsersDatabase(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db_file = self.path("users.sqlite3")
+        self.db = SQLiteUsersDatabase(self.db_file)
+        self.ines = User("ines", "ines@mail.com", "Pass123!", "Inés", 20, "Andorra")
+        self.alex = User("alex", "alex@mail.com", "Pass321!", "Alex", 19, "Miami")
+        self.db.add_user(self.ines)
+        self.db.add_user(self.alex)
+
+    def tearDown(self):
+        self.db.conn.close()
+        super().tearDown()
+
+    def test_same_api_as_json_database(self):
+        self.assertIs(self.db.get_user("ines"), self.ines)
+        self.assertIsNone(self.db.get_user("nobody"))
+        self.assertFalse(self.db.unique_user("ines"))
+        self.assertTrue(self.db.unique_user("maria"))
+        self.assertTrue(self.db.authenticate_user("ines", "Pass123!"))
+        self.assertFalse(self.db.authenticate_user("ines", "wrong"))
+        self.assertEqual([u.username for u in self.db.get_all_users()], ["ines", "alex"])
+        with self.assertRaises(ValueError):
+            self.db.add_user(User("ines", "other@mail.com", "Pass123!", "", 0, ""))
+
+        self.db.remove_user("alex")
+        self.assertIsNone(self.db.get_user("alex"))
+        with self.assertRaises(ValueError):
+            self.db.remove_user("alex")
+
+    def test_save_user_persists_lists(self):
+        self.ines.following.append("alex")
+        self.alex.followers.append("ines")
+        self.alex.notifications.append("ines is now following you.")
+        self.ines.name = "Inès"
+        self.db.save_user(self.ines)
+        self.db.save_user(self.alex)
+
+        reopened = SQLiteUsersDatabase(self.db_file)
+        ines = reopened.get_user("ines")
+        alex = reopened.get_user("alex")
+        self.assertEqual(ines.name, "Inès")
+        self.assertEqual(ines.following, ["alex"])
+        self.assertEqual(alex.followers, ["ines"])
+        self.assertEqual(alex.notifications, ["ines is now following you."])
+        self.assertTrue(reopened.authenticate_user("alex", "Pass321!"))
+        reopened.conn.close()
+
+    def test_save_writes_only_changed_rows(self):
+        for i in range(20):
+            self.ines.followers.append(f"fan{i}")
+        self.ines.notifications.append("old")
+        self.db.save_user(self.ines)
+
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        self.ines.following.append("alex")
+        self.ines.followers.remove("fan3")
+        self.ines.notifications.append("new")
+        self.db.save_user(self.ines)
+        self.db.conn.set_trace_callback(None)
+
+        writes = [s for s in statements if s.startswith(("INSERT", "DELETE"))]
+        self.assertEqual(len(writes), 4)  # ligne users + un abonnement + un follower + une notification
+        self.assertFalse([s for s in statements if s.startswith("SELECT")])  # rien n'est relu
+
+        reopened = SQLiteUsersDatabase(self.db_file)
+        ines = reopened.get_user("ines")
+        self.assertEqual(ines.following, ["alex"])
+        self.assertEqual(list(ines.followers), [f"fan{i}" for i in range(20) if i != 3])
+        self.assertEqual(ines.notifications, ["old", "new"])
+        reopened.conn.close()
+
+    def test_notification_removed_once(self):
+        self.ines.notifications.append("hello")
+        self.ines.notifications.append("hello")
+        self.db.save_user(self.ines)
+        self.ines.notifications.remove("hello")
+        self.db.save_user(self.ines)
+
+        reopened = SQLiteUsersDatabase(self.db_file)
+        self.assertEqual(reopened.get_user("ines").notifications, ["hello"])
+        reopened.conn.close()
+
+    def test_aggregates_do_not_load_users(self):
+        self.ines.following.append("alex")
+        self.alex.followers.append("ines")
+        self.alex.notifications.append("ines is now following you.")
+        self.db.save_users()
+
+        reopened = SQLiteUsersDatabase(self.db_file)
+        self.assertEqual(reopened.follower_counts(), {"alex": 1})
+        self.assertEqual(reopened.popular_usernames(), ["alex", "ines"])
+        self.assertEqual(list(reopened._users), [])
+        self.assertEqual([u.username for u in reopened.users_with_notifications()], ["alex"])
+        self.assertEqual(list(reopened._users), ["alex"])
+        reopened.conn.close()
+
+    def test_import_from_json(self):
+        json_file = self.path("users.json")
+        json_db = UsersDatabase(json_file)
+        json_db.add_user(User("maria", "maria@mail.com", "Pass231!", "María", 21, "Spain"))
+
+        imported = SQLiteUsersDatabase(self.path("imported.sqlite3"), json_file=json_file)
+        self.assertEqual(imported.get_usernames(), ["maria"])
+        self.assertTrue(imported.authenticate_user("maria", "Pass231!"))
+        imported.conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
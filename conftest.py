@@ -0,0 +1,47 @@
+# Aides partagées par les tests (backend/*_test.py) : posts de test et dossiers temporaires.
+# Module de test uniquement, hors du paquet backend ; pytest le charge tout seul et
+# `python -m backend.xxx_test` le trouve depuis la racine du dépôt.
+
+import os
+import tempfile
+import unittest
+from backend.post_log import PostLog
+
+DATE = "2025-12-01 10:00:00"
+
+
+def make_post(username="ines", content="hello", hashtags=(), date=DATE, image=None):
+    """Post au format du stockage, tel que le crée l'application (l'id est attribué par create)."""
+    return {
+        "poster_username": username,
+        "poster_pfp": None,
+        "content": content,
+        "image": image,
+        "date": date,
+        "likes": [],
+        "comments": [],
+        "hashtags": list(hashtags),
+        "post_id": 1,
+    }
+
+
+class TempDirTestCase(unittest.TestCase):
+    """Dossier temporaire (self.tmp, fichiers via self.path(nom)) effacé après chaque test."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = self.path("posts.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+
+class PostStoreTestCase(TempDirTestCase):
+    """Comme TempDirTestCase, avec un PostLog vide dans self.store."""
+
+    def setUp(self):
+        super().setUp()
+        self.store = PostLog(self.snapshot)